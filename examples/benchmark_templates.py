@@ -0,0 +1,66 @@
+"""Benchmark request body encoding with and without a RequestTemplate.
+
+Measures only the client-side cost of building and encoding a scrape body
+for a large schema, so no API key or credits are needed.
+"""
+
+import time
+
+from oxylabs_ai_studio.apps.ai_scraper import AiScraper
+from oxylabs_ai_studio.client import encode_json_body
+from oxylabs_ai_studio.schema import schema_body
+
+JOBS = 10_000
+FIELDS = 200
+
+schema = {
+    "type": "object",
+    "properties": {
+        f"field_{index}": {
+            "type": "string",
+            "description": f"Value of field {index} as shown on the page",
+        }
+        for index in range(FIELDS)
+    },
+    "required": [f"field_{index}" for index in range(FIELDS)],
+}
+browser_instructions = [{"type": "wait", "wait_time_s": 1}] * 5
+urls = [f"https://example.com/products/{index}" for index in range(JOBS)]
+scraper = AiScraper(api_key="unused")
+
+
+def per_job_body(url: str) -> bytes:
+    """What every scrape did before templates: build the dict, encode it all."""
+    body = {
+        "url": url,
+        "output_format": "json",
+        "openapi_schema": schema_body(schema),
+        "render_javascript": True,
+        "geo_location": "US",
+        "user_agent": None,
+        "optimize_content": True,
+        "browser_instructions": browser_instructions,
+    }
+    return encode_json_body(body)
+
+
+started = time.perf_counter()
+for url in urls:
+    plain = per_job_body(url)
+plain_seconds = time.perf_counter() - started
+
+started = time.perf_counter()
+template = scraper.template(
+    output_format="json",
+    schema=schema,
+    render_javascript=True,
+    geo_location="US",
+    browser_instructions=browser_instructions,
+)
+for url in urls:
+    templated = template.encode(url=url).value
+template_seconds = time.perf_counter() - started
+
+print(f"{FIELDS}-field schema, {len(plain)} byte bodies, {JOBS} jobs")
+print(f"  per-job encoding: {plain_seconds / JOBS * 1e6:7.1f} us/job")
+print(f"  RequestTemplate:  {template_seconds / JOBS * 1e6:7.1f} us/job")
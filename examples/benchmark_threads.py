@@ -0,0 +1,36 @@
+"""Benchmark a shared AiScraper used from many threads.
+
+Runs against the local stand-in server, so no API key or credits are needed.
+"""
+
+import time
+
+from oxylabs_ai_studio.apps import ai_scraper
+from oxylabs_ai_studio.apps.ai_scraper import AiScraper
+from oxylabs_ai_studio.testing import StandInServer
+
+JOBS = 512
+PROCESSING_SECONDS = 1.0
+# Poll the stand-in server faster than the real API would need.
+ai_scraper.POLL_INTERVAL_SECONDS = 0.25
+
+with StandInServer(processing_seconds=PROCESSING_SECONDS) as server:
+    for threads in (8, 32, 128):
+        scraper = AiScraper(api_key="stand-in", max_in_flight=threads)
+        scraper.base_url = server.url
+        server.reset_counters()
+        urls = [f"https://example.com/{threads}/{index}" for index in range(JOBS)]
+
+        started = time.monotonic()
+        failed = 0
+        for result in scraper.scrape_threaded(urls, max_workers=threads):
+            failed += not result.ok
+        elapsed = time.monotonic() - started
+        scraper.close()
+
+        print(
+            f"{threads:>4} threads: {JOBS} jobs in {elapsed:.2f}s "
+            f"({JOBS / elapsed:.0f} jobs/s, {failed} failed), "
+            f"{server.connections} connections, "
+            f"{sum(server.requests.values())} requests"
+        )
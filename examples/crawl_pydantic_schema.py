@@ -19,9 +19,9 @@ result = crawler.crawl(
     url=url,
     user_prompt="Find all pages with proxy products pricing",
     output_format="json",
-    schema=ProxyPlans.model_json_schema(),
+    schema=ProxyPlans,
     render_javascript=False,
 )
 print("Results:\n")
-for item in result.data:
+for item in result.parse(ProxyPlans):
     print(item, "\n")
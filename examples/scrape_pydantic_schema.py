@@ -17,10 +17,10 @@ url = "https://sandbox.oxylabs.io/products/1"
 result = scraper.scrape(
     url=url,
     output_format="json",
-    schema=Game.model_json_schema(),
+    schema=Game,
     render_javascript=False,
 )
-print(result)
+print(result.parse(Game))
 
 
 
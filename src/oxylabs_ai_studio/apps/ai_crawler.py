@@ -1,16 +1,34 @@
-import asyncio
-import time
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Sequence
 from typing import Any, Literal
 
 from pydantic import BaseModel
 
-from oxylabs_ai_studio.client import OxyStudioAIClient
+from oxylabs_ai_studio.batch import (
+    DEFAULT_MAX_CONCURRENCY,
+    NO_RETRIES,
+    BatchResult,
+    JobRetryPolicy,
+    run_batch,
+    url_domain,
+)
+from oxylabs_ai_studio.client import OxyStudioAIClient, RawJson
+from oxylabs_ai_studio.completion import CompletionNotifier
+from oxylabs_ai_studio.compression import (
+    DEFAULT_COMPRESSION_THRESHOLD,
+    RequestCompression,
+)
 from oxylabs_ai_studio.logger import get_logger
 from oxylabs_ai_studio.models import SchemaResponse
+from oxylabs_ai_studio.retry import RetryPolicy
+from oxylabs_ai_studio.schema import ModelT, SchemaArg, parse_models, schema_body
+from oxylabs_ai_studio.templates import RequestTemplate
+from oxylabs_ai_studio.timeouts import Timeouts
+from oxylabs_ai_studio.urls import UrlIndex, deduplicated, remember_succeeded
 
 CRAWLER_TIMEOUT_SECONDS = 60 * 10
 POLL_INTERVAL_SECONDS = 5
 POLL_MAX_ATTEMPTS = CRAWLER_TIMEOUT_SECONDS // POLL_INTERVAL_SECONDS
+DEFAULT_MAX_PER_DOMAIN = 2
 
 logger = get_logger(__name__)
 
@@ -20,134 +38,163 @@ class AiCrawlerJob(BaseModel):
     message: str | None = None
     data: list[dict[str, Any]] | list[str] | None = None
 
+    def parse(self, model: type[ModelT]) -> list[ModelT]:
+        """`data` of a json crawl as instances of `model`."""
+        return [] if self.data is None else parse_models(model, self.data)
+
+
+def _build_crawl_body(
+    *,
+    url: str,
+    user_prompt: str,
+    output_format: Literal["json", "markdown", "csv", "toon"],
+    schema: SchemaArg | None,
+    render_javascript: bool,
+    return_sources_limit: int,
+    geo_location: str | None,
+    max_credits: int | None,
+) -> dict[str, Any]:
+    if output_format in ["json", "csv", "toon"] and schema is None:
+        raise ValueError(
+            "openapi_schema is required when output_format is json, csv or toon.",
+        )
+    return {
+        "url": url,
+        "user_prompt": user_prompt,
+        "output_format": output_format,
+        "openapi_schema": schema_body(schema),
+        "render_javascript": render_javascript,
+        "return_sources_limit": return_sources_limit,
+        "geo_location": geo_location,
+        "max_credits": max_credits,
+    }
+
 
 class AiCrawler(OxyStudioAIClient):
     """AI Crawl app."""
 
-    def __init__(self, api_key: str | None = None):
-        super().__init__(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str | None = None,
+        api_keys: Sequence[str] | None = None,
+        request_compression: RequestCompression | None = None,
+        compression_threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+        max_in_flight: int | None = None,
+        notifier: CompletionNotifier | None = None,
+        http_retry_policy: RetryPolicy | None = None,
+        timeout: float | Timeouts | None = None,
+    ):
+        super().__init__(
+            api_key=api_key,
+            api_keys=api_keys,
+            request_compression=request_compression,
+            compression_threshold=compression_threshold,
+            max_in_flight=max_in_flight,
+            notifier=notifier,
+            http_retry_policy=http_retry_policy,
+            timeout=timeout,
+        )
 
     def crawl(
         self,
         url: str,
         user_prompt: str,
         output_format: Literal["json", "markdown", "csv", "toon"] = "markdown",
-        schema: dict[str, Any] | None = None,
+        schema: SchemaArg | None = None,
         render_javascript: bool = False,
         return_sources_limit: int = 25,
         geo_location: str | None = None,
         max_credits: int | None = None,
     ) -> AiCrawlerJob:
-        if output_format in ["json", "csv", "toon"] and schema is None:
-            raise ValueError(
-                "openapi_schema is required when output_format is json, csv or toon.",
+        return self._run_sync(
+            self.crawl_async(
+                url=url,
+                user_prompt=user_prompt,
+                output_format=output_format,
+                schema=schema,
+                render_javascript=render_javascript,
+                return_sources_limit=return_sources_limit,
+                geo_location=geo_location,
+                max_credits=max_credits,
             )
-
-        body = {
-            "url": url,
-            "user_prompt": user_prompt,
-            "output_format": output_format,
-            "openapi_schema": schema,
-            "render_javascript": render_javascript,
-            "return_sources_limit": return_sources_limit,
-            "geo_location": geo_location,
-            "max_credits": max_credits,
-        }
-        client = self.get_client()
-        create_response = self.call_api(
-            client=client, url="/crawl/run", method="POST", body=body
         )
-        if create_response.status_code != 200:
-            raise Exception(
-                f"Failed to create crawl job for {url}: {create_response.text}"
-            )
-        resp_body = create_response.json()
-        run_id = resp_body["run_id"]
-        logger.info(f"Starting crawl for url: {url}. Job id: {run_id}.")
-        try:
-            for _ in range(POLL_MAX_ATTEMPTS):
-                try:
-                    get_response = self.call_api(
-                        client=client,
-                        url="/crawl/run/data",
-                        method="GET",
-                        params={"run_id": run_id},
-                    )
-                except Exception:
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                if get_response.status_code == 202:
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                if get_response.status_code != 200:
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                resp_body = get_response.json()
-                if resp_body["status"] == "processing":
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                if resp_body["status"] == "completed":
-                    return AiCrawlerJob(
-                        run_id=run_id,
-                        message=resp_body.get("error_code", None),
-                        data=resp_body["data"],
-                    )
-                if resp_body["status"] == "failed":
-                    return AiCrawlerJob(
-                        run_id=run_id,
-                        message=resp_body.get("error_code", None),
-                        data=None,
-                    )
-                time.sleep(POLL_INTERVAL_SECONDS)
-        except KeyboardInterrupt:
-            logger.info("[Cancelled] Crawling was cancelled by user.")
-            raise KeyboardInterrupt from None
-        raise TimeoutError(f"Failed to crawl {url}: timeout.")
 
     def generate_schema(self, prompt: str) -> dict[str, Any] | None:
-        logger.info("Generating schema")
-        body = {"user_prompt": prompt}
-        response = self.call_api(
-            client=self.get_client(),
-            url="/crawl/generate-params",
-            method="POST",
-            body=body,
+        return self._run_sync(self.generate_schema_async(prompt=prompt))
+
+    def template(
+        self,
+        user_prompt: str = "",
+        output_format: Literal["json", "markdown", "csv", "toon"] = "markdown",
+        schema: SchemaArg | None = None,
+        render_javascript: bool = False,
+        return_sources_limit: int = 25,
+        geo_location: str | None = None,
+        max_credits: int | None = None,
+    ) -> RequestTemplate:
+        """Crawl options checked and encoded once for many seed URLs.
+
+        Takes the same options as `crawl`; pass the template to
+        `crawl_with_template`.
+        """
+        body = _build_crawl_body(
+            url="",
+            user_prompt=user_prompt,
+            output_format=output_format,
+            schema=schema,
+            render_javascript=render_javascript,
+            return_sources_limit=return_sources_limit,
+            geo_location=geo_location,
+            max_credits=max_credits,
         )
-        if response.status_code != 200:
-            raise Exception(f"Failed to generate schema: {response.text}")
-        json_response: SchemaResponse = response.json()
-        return json_response.get("openapi_schema", None)
+        del body["url"]
+        return RequestTemplate("/crawl/run", body, job_fields=("url",))
+
+    def crawl_with_template(self, url: str, template: RequestTemplate) -> AiCrawlerJob:
+        """Crawl from `url` with the options of a `template`."""
+        return self._run_sync(self.crawl_with_template_async(url, template))
 
     async def crawl_async(
         self,
         url: str,
         user_prompt: str = "",
         output_format: Literal["json", "markdown", "csv", "toon"] = "markdown",
-        schema: dict[str, Any] | None = None,
+        schema: SchemaArg | None = None,
         render_javascript: bool = False,
         return_sources_limit: int = 25,
         geo_location: str | None = None,
         max_credits: int | None = None,
     ) -> AiCrawlerJob:
         """Async version of crawl."""
-        if output_format in ["json", "csv", "toon"] and schema is None:
-            raise ValueError(
-                "openapi_schema is required when output_format is json, csv or toon.",
-            )
+        body = _build_crawl_body(
+            url=url,
+            user_prompt=user_prompt,
+            output_format=output_format,
+            schema=schema,
+            render_javascript=render_javascript,
+            return_sources_limit=return_sources_limit,
+            geo_location=geo_location,
+            max_credits=max_credits,
+        )
+        return await self._crawl_async(url, body)
 
-        body = {
-            "url": url,
-            "user_prompt": user_prompt,
-            "output_format": output_format,
-            "openapi_schema": schema,
-            "render_javascript": render_javascript,
-            "return_sources_limit": return_sources_limit,
-            "geo_location": geo_location,
-            "max_credits": max_credits,
-        }
+    async def crawl_with_template_async(
+        self, url: str, template: RequestTemplate
+    ) -> AiCrawlerJob:
+        """Async version of crawl_with_template."""
+        template.check_path("/crawl/run")
+        return await self._crawl_async(url, template.encode(url=url))
+
+    async def _crawl_async(
+        self, url: str, body: dict[str, Any] | RawJson
+    ) -> AiCrawlerJob:
         async with self.async_client() as client:
             create_response = await self.call_api_async(
-                client=client, url="/crawl/run", method="POST", body=body
+                client=client,
+                url="/crawl/run",
+                method="POST",
+                body=self._submission_body(body),
+                operation="create",
             )
             if create_response.status_code != 200:
                 raise Exception(
@@ -155,56 +202,101 @@ class AiCrawler(OxyStudioAIClient):
                 )
             resp_body = create_response.json()
             run_id = resp_body["run_id"]
-            logger.info(f"Starting async crawl for url: {url}. Job id: {run_id}.")
-            try:
-                for _ in range(POLL_MAX_ATTEMPTS):
-                    try:
-                        get_response = await self.call_api_async(
-                            client=client,
-                            url="/crawl/run/data",
-                            method="GET",
-                            params={"run_id": run_id},
-                        )
-                    except Exception:
-                        await asyncio.sleep(POLL_INTERVAL_SECONDS)
-                        continue
-                    if get_response.status_code == 202:
-                        await asyncio.sleep(POLL_INTERVAL_SECONDS)
-                        continue
-                    if get_response.status_code != 200:
-                        await asyncio.sleep(POLL_INTERVAL_SECONDS)
-                        continue
-                    resp_body = get_response.json()
-                    if resp_body["status"] == "processing":
-                        await asyncio.sleep(POLL_INTERVAL_SECONDS)
-                        continue
-                    if resp_body["status"] == "completed":
-                        return AiCrawlerJob(
-                            run_id=run_id,
-                            message=resp_body.get("error_code", None),
-                            data=resp_body["data"],
-                        )
-                    if resp_body["status"] == "failed":
-                        return AiCrawlerJob(
-                            run_id=run_id,
-                            message=resp_body.get("error_code", None),
-                            data=None,
-                        )
-                    await asyncio.sleep(POLL_INTERVAL_SECONDS)
-            except KeyboardInterrupt:
-                logger.info("[Cancelled] Crawling was cancelled by user.")
-                raise KeyboardInterrupt from None
-            raise TimeoutError(f"Failed to crawl {url}: timeout.")
+            logger.info("Starting crawl for url: %s. Job id: %s.", url, run_id)
+            resp_body = await self._wait_for_run(
+                client,
+                "/crawl/run/data",
+                run_id,
+                poll_interval=POLL_INTERVAL_SECONDS,
+                max_attempts=POLL_MAX_ATTEMPTS,
+            )
+            if resp_body is None:
+                raise TimeoutError(f"Failed to crawl {url}: timeout.")
+            if resp_body["status"] == "completed":
+                return AiCrawlerJob(
+                    run_id=run_id,
+                    message=resp_body.get("error_code", None),
+                    data=resp_body["data"],
+                )
+            return AiCrawlerJob(
+                run_id=run_id,
+                message=resp_body.get("error_code", None),
+                data=None,
+            )
 
     async def generate_schema_async(self, prompt: str) -> dict[str, Any] | None:
         """Async version of generate_schema. Uses httpx.AsyncClient."""
-        logger.info("Generating schema (async)")
+        logger.info("Generating schema")
         body = {"user_prompt": prompt}
         async with self.async_client() as client:
             response = await self.call_api_async(
-                client=client, url="/crawl/generate-params", method="POST", body=body
+                client=client,
+                url="/crawl/generate-params",
+                method="POST",
+                body=body,
+                operation="generate_schema",
             )
             if response.status_code != 200:
                 raise Exception(f"Failed to generate schema: {response.text}")
             json_response: SchemaResponse = response.json()
             return json_response.get("openapi_schema", None)
+
+    async def crawl_many(
+        self,
+        urls: Iterable[str] | AsyncIterable[str],
+        user_prompt: str = "",
+        output_format: Literal["json", "markdown", "csv", "toon"] = "markdown",
+        schema: SchemaArg | None = None,
+        render_javascript: bool = False,
+        return_sources_limit: int = 25,
+        geo_location: str | None = None,
+        max_credits: int | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_per_domain: int = DEFAULT_MAX_PER_DOMAIN,
+        retry_policy: JobRetryPolicy = NO_RETRIES,
+        deduplicate: bool | UrlIndex = False,
+        max_buffered: int | None = None,
+    ) -> AsyncIterator[BatchResult[str, AiCrawlerJob]]:
+        """Crawl many seed URLs, yielding each result as soon as it completes.
+
+        All crawls share one connection pool. At most `max_concurrency` crawls
+        run at once, and at most `max_per_domain` of them for the same host.
+        Crawls that raise or finish as failed are resubmitted according to
+        `retry_policy`, independently of the HTTP-level retries.
+
+        Every URL is crawled unless `deduplicate` is set: True skips URLs that
+        canonicalize to an already submitted one, and they yield no result. A
+        `DedupIndex` or `BloomDedupIndex` also skips URLs crawled successfully
+        by earlier calls sharing it.
+
+        `urls` may be a sync or async iterable and is read lazily. At most
+        `max_buffered` finished crawls wait for the consumer; while they do,
+        no more URLs are read.
+        """
+        template = self.template(
+            user_prompt=user_prompt,
+            output_format=output_format,
+            schema=schema,
+            render_javascript=render_javascript,
+            return_sources_limit=return_sources_limit,
+            geo_location=geo_location,
+            max_credits=max_credits,
+        )
+
+        async def crawl_one(url: str) -> AiCrawlerJob:
+            return await self.crawl_with_template_async(url, template)
+
+        async with self._batch_session():
+            async for result in run_batch(
+                deduplicated(urls, deduplicate),
+                crawl_one,
+                max_concurrency=max_concurrency,
+                group_key=url_domain,
+                max_per_group=max_per_domain,
+                retry_policy=retry_policy,
+                is_failed=lambda job: job.data is None,
+                max_buffered=max_buffered,
+            ):
+                if result.job is not None and result.job.data is not None:
+                    remember_succeeded(deduplicate, result.input)
+                yield result
@@ -1,11 +1,18 @@
-import asyncio
-import time
+from collections.abc import Sequence
 from typing import Any
 
 from pydantic import BaseModel
 
-from oxylabs_ai_studio.client import OxyStudioAIClient
+from oxylabs_ai_studio.client import OxyStudioAIClient, RawJson
+from oxylabs_ai_studio.completion import CompletionNotifier
+from oxylabs_ai_studio.compression import (
+    DEFAULT_COMPRESSION_THRESHOLD,
+    RequestCompression,
+)
 from oxylabs_ai_studio.logger import get_logger
+from oxylabs_ai_studio.retry import RetryPolicy
+from oxylabs_ai_studio.templates import RequestTemplate
+from oxylabs_ai_studio.timeouts import Timeouts
 
 MAP_TIMEOUT_SECONDS = 60 * 5
 POLL_INTERVAL_SECONDS = 5
@@ -20,11 +27,59 @@ class AiMapJob(BaseModel):
     data: dict[str, Any] | list[str] | None
 
 
+def _build_map_body(
+    *,
+    url: str,
+    search_keywords: list[str] | None,
+    user_prompt: str | None,
+    max_crawl_depth: int,
+    limit: int,
+    geo_location: str | None,
+    render_javascript: bool,
+    include_sitemap: bool,
+    max_credits: int | None,
+    allow_subdomains: bool,
+    allow_external_domains: bool,
+) -> dict[str, Any]:
+    return {
+        "url": url,
+        "search_keywords": (search_keywords or []),
+        "user_prompt": user_prompt,
+        "max_crawl_depth": max_crawl_depth,
+        "limit": limit,
+        "geo_location": geo_location,
+        "render_javascript": render_javascript,
+        "include_sitemap": include_sitemap,
+        "max_credits": max_credits,
+        "allow_subdomains": allow_subdomains,
+        "allow_external_domains": allow_external_domains,
+    }
+
+
 class AiMap(OxyStudioAIClient):
     """AI Map app."""
 
-    def __init__(self, api_key: str | None = None):
-        super().__init__(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str | None = None,
+        api_keys: Sequence[str] | None = None,
+        request_compression: RequestCompression | None = None,
+        compression_threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+        max_in_flight: int | None = None,
+        notifier: CompletionNotifier | None = None,
+        http_retry_policy: RetryPolicy | None = None,
+        timeout: float | Timeouts | None = None,
+    ):
+        super().__init__(
+            api_key=api_key,
+            api_keys=api_keys,
+            request_compression=request_compression,
+            compression_threshold=compression_threshold,
+            max_in_flight=max_in_flight,
+            notifier=notifier,
+            http_retry_policy=http_retry_policy,
+            timeout=timeout,
+        )
 
     def map(
         self,
@@ -40,64 +95,59 @@ class AiMap(OxyStudioAIClient):
         allow_subdomains: bool = False,
         allow_external_domains: bool = False,
     ) -> AiMapJob:
-        body = {
-            "url": url,
-            "search_keywords": (search_keywords or []),
-            "user_prompt": user_prompt,
-            "max_crawl_depth": max_crawl_depth,
-            "limit": limit,
-            "geo_location": geo_location,
-            "render_javascript": render_javascript,
-            "include_sitemap": include_sitemap,
-            "max_credits": max_credits,
-            "allow_subdomains": allow_subdomains,
-            "allow_external_domains": allow_external_domains,
-        }
-        client = self.get_client()
-        create_response = self.call_api(
-            client=client, url="/map", method="POST", body=body
-        )
-        if create_response.status_code != 200:
-            raise Exception(
-                f"Failed to create map job for {url}: {create_response.text}"
+        return self._run_sync(
+            self.map_async(
+                url=url,
+                search_keywords=search_keywords,
+                user_prompt=user_prompt,
+                max_crawl_depth=max_crawl_depth,
+                limit=limit,
+                geo_location=geo_location,
+                render_javascript=render_javascript,
+                include_sitemap=include_sitemap,
+                max_credits=max_credits,
+                allow_subdomains=allow_subdomains,
+                allow_external_domains=allow_external_domains,
             )
-        resp_body = create_response.json()
-        run_id = resp_body["run_id"]
-        try:
-            for _ in range(POLL_MAX_ATTEMPTS):
-                try:
-                    get_response = self.call_api(
-                        client=client,
-                        url="/map/run/data",
-                        method="GET",
-                        params={"run_id": run_id},
-                    )
-                except Exception:
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                if get_response.status_code != 200:
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                resp_body = get_response.json()
-                if resp_body["status"] == "completed":
-                    return AiMapJob(
-                        run_id=run_id,
-                        message=resp_body.get("error_code", None),
-                        data=resp_body.get("data", {}) or {},
-                    )
-                if resp_body["status"] == "failed":
-                    return AiMapJob(
-                        run_id=run_id,
-                        message=resp_body.get("error_code", None),
-                        data=None,
-                    )
-                time.sleep(POLL_INTERVAL_SECONDS)
-        except KeyboardInterrupt:
-            logger.info("[Cancelled] Mapping was cancelled by user.")
-            raise KeyboardInterrupt from None
-        except Exception as e:
-            raise e
-        raise TimeoutError(f"Failed to map {url}: timeout.")
+        )
+
+    def template(
+        self,
+        search_keywords: list[str] | None = None,
+        user_prompt: str | None = None,
+        max_crawl_depth: int = 1,
+        limit: int = 25,
+        geo_location: str | None = None,
+        render_javascript: bool = False,
+        include_sitemap: bool = True,
+        max_credits: int | None = None,
+        allow_subdomains: bool = False,
+        allow_external_domains: bool = False,
+    ) -> RequestTemplate:
+        """Map options encoded once for many start URLs.
+
+        Takes the same options as `map`; pass the template to
+        `map_with_template`.
+        """
+        body = _build_map_body(
+            url="",
+            search_keywords=search_keywords,
+            user_prompt=user_prompt,
+            max_crawl_depth=max_crawl_depth,
+            limit=limit,
+            geo_location=geo_location,
+            render_javascript=render_javascript,
+            include_sitemap=include_sitemap,
+            max_credits=max_credits,
+            allow_subdomains=allow_subdomains,
+            allow_external_domains=allow_external_domains,
+        )
+        del body["url"]
+        return RequestTemplate("/map", body, job_fields=("url",))
+
+    def map_with_template(self, url: str, template: RequestTemplate) -> AiMapJob:
+        """Map from `url` with the options of a `template`."""
+        return self._run_sync(self.map_with_template_async(url, template))
 
     async def map_async(
         self,
@@ -113,22 +163,36 @@ class AiMap(OxyStudioAIClient):
         allow_subdomains: bool = False,
         allow_external_domains: bool = False,
     ) -> AiMapJob:
-        body = {
-            "url": url,
-            "search_keywords": (search_keywords or []),
-            "user_prompt": user_prompt,
-            "max_crawl_depth": max_crawl_depth,
-            "limit": limit,
-            "geo_location": geo_location,
-            "render_javascript": render_javascript,
-            "include_sitemap": include_sitemap,
-            "max_credits": max_credits,
-            "allow_subdomains": allow_subdomains,
-            "allow_external_domains": allow_external_domains,
-        }
+        body = _build_map_body(
+            url=url,
+            search_keywords=search_keywords,
+            user_prompt=user_prompt,
+            max_crawl_depth=max_crawl_depth,
+            limit=limit,
+            geo_location=geo_location,
+            render_javascript=render_javascript,
+            include_sitemap=include_sitemap,
+            max_credits=max_credits,
+            allow_subdomains=allow_subdomains,
+            allow_external_domains=allow_external_domains,
+        )
+        return await self._map_async(url, body)
+
+    async def map_with_template_async(
+        self, url: str, template: RequestTemplate
+    ) -> AiMapJob:
+        """Async version of map_with_template."""
+        template.check_path("/map")
+        return await self._map_async(url, template.encode(url=url))
+
+    async def _map_async(self, url: str, body: dict[str, Any] | RawJson) -> AiMapJob:
         async with self.async_client() as client:
             create_response = await self.call_api_async(
-                client=client, url="/map", method="POST", body=body
+                client=client,
+                url="/map",
+                method="POST",
+                body=self._submission_body(body),
+                operation="create",
             )
             if create_response.status_code != 200:
                 raise Exception(
@@ -136,38 +200,23 @@ class AiMap(OxyStudioAIClient):
                 )
             resp_body = create_response.json()
             run_id = resp_body["run_id"]
-            try:
-                for _ in range(POLL_MAX_ATTEMPTS):
-                    try:
-                        get_response = await self.call_api_async(
-                            client=client,
-                            url="/map/run/data",
-                            method="GET",
-                            params={"run_id": run_id},
-                        )
-                    except Exception:
-                        await asyncio.sleep(POLL_INTERVAL_SECONDS)
-                        continue
-                    if get_response.status_code != 200:
-                        await asyncio.sleep(POLL_INTERVAL_SECONDS)
-                        continue
-                    resp_body = get_response.json()
-                    if resp_body["status"] == "completed":
-                        return AiMapJob(
-                            run_id=run_id,
-                            message=resp_body.get("error_code", None),
-                            data=resp_body.get("data", {}) or {},
-                        )
-                    if resp_body["status"] == "failed":
-                        return AiMapJob(
-                            run_id=run_id,
-                            message=resp_body.get("error_code", None),
-                            data=None,
-                        )
-                    await asyncio.sleep(POLL_INTERVAL_SECONDS)
-            except KeyboardInterrupt:
-                logger.info("[Cancelled] Mapping was cancelled by user.")
-                raise KeyboardInterrupt from None
-            except Exception as e:
-                raise e
-            raise TimeoutError(f"Failed to map {url}: timeout.")
+            resp_body = await self._wait_for_run(
+                client,
+                "/map/run/data",
+                run_id,
+                poll_interval=POLL_INTERVAL_SECONDS,
+                max_attempts=POLL_MAX_ATTEMPTS,
+            )
+            if resp_body is None:
+                raise TimeoutError(f"Failed to map {url}: timeout.")
+            if resp_body["status"] == "completed":
+                return AiMapJob(
+                    run_id=run_id,
+                    message=resp_body.get("error_code", None),
+                    data=resp_body.get("data", {}) or {},
+                )
+            return AiMapJob(
+                run_id=run_id,
+                message=resp_body.get("error_code", None),
+                data=None,
+            )
@@ -1,12 +1,31 @@
-import asyncio
-import time
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator, Sequence
 from typing import Any, Literal
 
 from pydantic import BaseModel
 
-from oxylabs_ai_studio.client import OxyStudioAIClient
+from oxylabs_ai_studio.batch import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_WORKERS,
+    NO_RETRIES,
+    BatchResult,
+    JobRetryPolicy,
+    map_threaded,
+    run_batch,
+    url_domain,
+)
+from oxylabs_ai_studio.client import OxyStudioAIClient, RawJson
+from oxylabs_ai_studio.completion import CompletionNotifier
+from oxylabs_ai_studio.compression import (
+    DEFAULT_COMPRESSION_THRESHOLD,
+    RequestCompression,
+)
 from oxylabs_ai_studio.logger import get_logger
 from oxylabs_ai_studio.models import BrowserInstruction, SchemaResponse
+from oxylabs_ai_studio.retry import RetryPolicy
+from oxylabs_ai_studio.schema import ModelT, SchemaArg, parse_model, schema_body
+from oxylabs_ai_studio.templates import RequestTemplate
+from oxylabs_ai_studio.timeouts import Timeouts
+from oxylabs_ai_studio.urls import UrlIndex, deduplicated, remember_succeeded
 
 SCRAPE_TIMEOUT_SECONDS = 60 * 3
 POLL_INTERVAL_SECONDS = 5
@@ -22,12 +41,16 @@ class AiScraperJob(BaseModel):
     message: str | None = None
     data: dict[str, Any] | str | None
 
+    def parse(self, model: type[ModelT]) -> ModelT | None:
+        """`data` of a json scrape as an instance of `model`."""
+        return None if self.data is None else parse_model(model, self.data)
+
 
 def _build_scrape_body(
     *,
     url: str,
     output_format: ScrapeOutputFormat,
-    schema: dict[str, Any] | None,
+    schema: SchemaArg | None,
     render_javascript: bool | Literal["auto"],
     geo_location: str | None,
     user_agent: str | None,
@@ -38,11 +61,10 @@ def _build_scrape_body(
         raise ValueError(
             "openapi_schema is required when output_format is json, csv or toon.",
         )
-
     body: dict[str, Any] = {
         "url": url,
         "output_format": output_format,
-        "openapi_schema": schema,
+        "openapi_schema": schema_body(schema),
         "render_javascript": render_javascript,
         "geo_location": geo_location,
         "user_agent": user_agent,
@@ -52,25 +74,143 @@ def _build_scrape_body(
     return body
 
 
+def _build_scrape_template(
+    *,
+    output_format: ScrapeOutputFormat = "markdown",
+    schema: SchemaArg | None = None,
+    render_javascript: bool | Literal["auto"] = False,
+    geo_location: str | None = None,
+    user_agent: str | None = None,
+    optimize_content: bool = True,
+    browser_instructions: list[BrowserInstruction] | None = None,
+) -> RequestTemplate:
+    body = _build_scrape_body(
+        url="",
+        output_format=output_format,
+        schema=schema,
+        render_javascript=render_javascript,
+        geo_location=geo_location,
+        user_agent=user_agent,
+        optimize_content=optimize_content,
+        browser_instructions=browser_instructions,
+    )
+    del body["url"]
+    return RequestTemplate("/scrape", body, job_fields=("url",))
+
+
+async def _scrape_with_client(
+    app: OxyStudioAIClient, url: str, body: dict[str, Any] | RawJson
+) -> AiScraperJob:
+    """Create a scrape job through `app` and wait for it.
+
+    Also used by other apps, e.g. to fetch the contents of search results.
+    """
+    async with app.async_client() as client:
+        create_response = await app.call_api_async(
+            client=client,
+            url="/scrape",
+            method="POST",
+            body=app._submission_body(body),
+            operation="create",
+        )
+        if create_response.status_code != 200:
+            raise Exception(
+                f"Failed to create scrape job for {url}: {create_response.text}"
+            )
+
+        resp_body = create_response.json()
+        run_id = resp_body["run_id"]
+        resp_body = await app._wait_for_run(
+            client,
+            "/scrape/run/data",
+            run_id,
+            poll_interval=POLL_INTERVAL_SECONDS,
+            max_attempts=POLL_MAX_ATTEMPTS,
+        )
+        if resp_body is None:
+            raise TimeoutError(f"Failed to scrape {url}: timeout.")
+        if resp_body["status"] == "completed":
+            data = resp_body.get("data", None)
+            return AiScraperJob(
+                run_id=run_id,
+                message=resp_body.get("error_code", None),
+                data=data,
+            )
+        return AiScraperJob(
+            run_id=run_id,
+            message=resp_body.get("error_code", None),
+            data=None,
+        )
+
+
 class AiScraper(OxyStudioAIClient):
     """AI Scraper app."""
 
-    def __init__(self, api_key: str | None = None):
-        super().__init__(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str | None = None,
+        api_keys: Sequence[str] | None = None,
+        request_compression: RequestCompression | None = None,
+        compression_threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+        max_in_flight: int | None = None,
+        notifier: CompletionNotifier | None = None,
+        http_retry_policy: RetryPolicy | None = None,
+        timeout: float | Timeouts | None = None,
+    ):
+        super().__init__(
+            api_key=api_key,
+            api_keys=api_keys,
+            request_compression=request_compression,
+            compression_threshold=compression_threshold,
+            max_in_flight=max_in_flight,
+            notifier=notifier,
+            http_retry_policy=http_retry_policy,
+            timeout=timeout,
+        )
 
     def scrape(
         self,
         url: str,
         output_format: ScrapeOutputFormat = "markdown",
-        schema: dict[str, Any] | None = None,
+        schema: SchemaArg | None = None,
         render_javascript: bool | Literal["auto"] = False,
         geo_location: str | None = None,
         user_agent: str | None = None,
         optimize_content: bool = True,
         browser_instructions: list[BrowserInstruction] | None = None,
     ) -> AiScraperJob:
-        body = _build_scrape_body(
-            url=url,
+        return self._run_sync(
+            self.scrape_async(
+                url=url,
+                output_format=output_format,
+                schema=schema,
+                render_javascript=render_javascript,
+                geo_location=geo_location,
+                user_agent=user_agent,
+                optimize_content=optimize_content,
+                browser_instructions=browser_instructions,
+            )
+        )
+
+    def generate_schema(self, prompt: str) -> dict[str, Any] | None:
+        return self._run_sync(self.generate_schema_async(prompt=prompt))
+
+    def template(
+        self,
+        output_format: ScrapeOutputFormat = "markdown",
+        schema: SchemaArg | None = None,
+        render_javascript: bool | Literal["auto"] = False,
+        geo_location: str | None = None,
+        user_agent: str | None = None,
+        optimize_content: bool = True,
+        browser_instructions: list[BrowserInstruction] | None = None,
+    ) -> RequestTemplate:
+        """Scrape options checked and encoded once for many URLs.
+
+        Takes the same options as `scrape`; pass the template to
+        `scrape_with_template`.
+        """
+        return _build_scrape_template(
             output_format=output_format,
             schema=schema,
             render_javascript=render_javascript,
@@ -79,69 +219,64 @@ class AiScraper(OxyStudioAIClient):
             optimize_content=optimize_content,
             browser_instructions=browser_instructions,
         )
-        client = self.get_client()
-        create_response = self.call_api(
-            client=client, url="/scrape", method="POST", body=body
-        )
-        if create_response.status_code != 200:
-            raise Exception(
-                f"Failed to create scrape job for {url}: {create_response.text}"
-            )
-        resp_body = create_response.json()
-        run_id = resp_body["run_id"]
-        try:
-            for _ in range(POLL_MAX_ATTEMPTS):
-                try:
-                    get_response = self.call_api(
-                        client=client,
-                        url="/scrape/run/data",
-                        method="GET",
-                        params={"run_id": run_id},
-                    )
-                except Exception:
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                if get_response.status_code != 200:
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                resp_body = get_response.json()
-                if resp_body["status"] == "completed":
-                    data = resp_body.get("data", None)
-                    return AiScraperJob(
-                        run_id=run_id,
-                        message=resp_body.get("error_code", None),
-                        data=data,
-                    )
-                if resp_body["status"] == "failed":
-                    return AiScraperJob(
-                        run_id=run_id,
-                        message=resp_body.get("error_code", None),
-                        data=None,
-                    )
-                time.sleep(POLL_INTERVAL_SECONDS)
-        except KeyboardInterrupt:
-            logger.info("[Cancelled] Scraping was cancelled by user.")
-            raise KeyboardInterrupt from None
-        except Exception as e:
-            raise e
-        raise TimeoutError(f"Failed to scrape {url}: timeout.")
 
-    def generate_schema(self, prompt: str) -> dict[str, Any] | None:
-        logger.info("Generating schema")
-        body = {"user_prompt": prompt}
-        response = self.call_api(
-            client=self.get_client(), url="/scrape/schema", method="POST", body=body
+    def scrape_with_template(self, url: str, template: RequestTemplate) -> AiScraperJob:
+        """Scrape `url` with the options of a `template`."""
+        return self._run_sync(self.scrape_with_template_async(url, template))
+
+    def scrape_threaded(
+        self,
+        urls: Iterable[str],
+        output_format: ScrapeOutputFormat = "markdown",
+        schema: SchemaArg | None = None,
+        render_javascript: bool | Literal["auto"] = False,
+        geo_location: str | None = None,
+        user_agent: str | None = None,
+        optimize_content: bool = True,
+        browser_instructions: list[BrowserInstruction] | None = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        deduplicate: bool | UrlIndex = False,
+    ) -> Iterator[BatchResult[str, AiScraperJob]]:
+        """Scrape `urls` from a thread pool, yielding results in input order.
+
+        A failed URL yields a result with `error` set instead of raising.
+
+        Args:
+            max_workers: Number of threads calling `scrape`. Jobs in flight
+                are further limited by `max_in_flight` of the scraper.
+            deduplicate: True skips URLs that canonicalize to an already
+                submitted one (they yield no result). A `DedupIndex` or
+                `BloomDedupIndex` also skips URLs scraped successfully by
+                earlier calls sharing it. By default every URL is scraped.
+        """
+        template = self.template(
+            output_format=output_format,
+            schema=schema,
+            render_javascript=render_javascript,
+            geo_location=geo_location,
+            user_agent=user_agent,
+            optimize_content=optimize_content,
+            browser_instructions=browser_instructions,
         )
-        if response.status_code != 200:
-            raise Exception(f"Failed to generate schema: {response.text}")
-        json_response: SchemaResponse = response.json()
-        return json_response.get("openapi_schema", None)
+
+        def scrape_one(url: str) -> AiScraperJob:
+            return self.scrape_with_template(url, template)
+
+        def scrape_all() -> Iterator[BatchResult[str, AiScraperJob]]:
+            for result in map_threaded(
+                deduplicated(urls, deduplicate), scrape_one, max_workers=max_workers
+            ):
+                if result.job is not None and result.job.data is not None:
+                    remember_succeeded(deduplicate, result.input)
+                yield result
+
+        return scrape_all()
 
     async def scrape_async(
         self,
         url: str,
         output_format: ScrapeOutputFormat = "markdown",
-        schema: dict[str, Any] | None = None,
+        schema: SchemaArg | None = None,
         render_javascript: bool | Literal["auto"] = False,
         geo_location: str | None = None,
         user_agent: str | None = None,
@@ -159,59 +294,92 @@ class AiScraper(OxyStudioAIClient):
             optimize_content=optimize_content,
             browser_instructions=browser_instructions,
         )
-        async with self.async_client() as client:
-            create_response = await client.post(url="/scrape", json=body)
-            if create_response.status_code != 200:
-                raise Exception(
-                    f"Failed to create scrape job for {url}: {create_response.text}"
-                )
-
-            resp_body = create_response.json()
-            run_id = resp_body["run_id"]
-            try:
-                for _ in range(POLL_MAX_ATTEMPTS):
-                    try:
-                        get_response = await self.call_api_async(
-                            client=client,
-                            url="/scrape/run/data",
-                            method="GET",
-                            params={"run_id": run_id},
-                        )
-                    except Exception:
-                        await asyncio.sleep(POLL_INTERVAL_SECONDS)
-                        continue
-                    if get_response.status_code != 200:
-                        await asyncio.sleep(POLL_INTERVAL_SECONDS)
-                        continue
-                    resp_body = get_response.json()
-                    if resp_body["status"] == "completed":
-                        data = resp_body.get("data", None)
-                        return AiScraperJob(
-                            run_id=run_id,
-                            message=resp_body.get("error_code", None),
-                            data=data,
-                        )
-                    if resp_body["status"] == "failed":
-                        return AiScraperJob(
-                            run_id=run_id,
-                            message=resp_body.get("error_code", None),
-                            data=None,
-                        )
-                    await asyncio.sleep(POLL_INTERVAL_SECONDS)
-            except KeyboardInterrupt:
-                logger.info("[Cancelled] Scraping was cancelled by user.")
-                raise KeyboardInterrupt from None
-            except Exception as e:
-                raise e
-            raise TimeoutError(f"Failed to scrape {url}: timeout.")
+        return await self._scrape_async(url, body)
+
+    async def scrape_with_template_async(
+        self, url: str, template: RequestTemplate
+    ) -> AiScraperJob:
+        """Async version of scrape_with_template."""
+        template.check_path("/scrape")
+        return await self._scrape_async(url, template.encode(url=url))
+
+    async def _scrape_async(
+        self, url: str, body: dict[str, Any] | RawJson
+    ) -> AiScraperJob:
+        return await _scrape_with_client(self, url, body)
+
+    async def scrape_many(
+        self,
+        urls: Iterable[str] | AsyncIterable[str],
+        output_format: ScrapeOutputFormat = "markdown",
+        schema: SchemaArg | None = None,
+        render_javascript: bool | Literal["auto"] = False,
+        geo_location: str | None = None,
+        user_agent: str | None = None,
+        optimize_content: bool = True,
+        browser_instructions: list[BrowserInstruction] | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_per_domain: int | None = None,
+        retry_policy: JobRetryPolicy = NO_RETRIES,
+        deduplicate: bool | UrlIndex = False,
+        max_buffered: int | None = None,
+    ) -> AsyncIterator[BatchResult[str, AiScraperJob]]:
+        """Scrape many URLs, yielding each result as soon as it completes.
+
+        All scrapes share one connection pool. At most `max_concurrency`
+        scrapes run at once, and at most `max_per_domain` of them for the same
+        host when it is set. Scrapes that raise or finish as failed are
+        resubmitted according to `retry_policy`, independently of the
+        HTTP-level retries.
+
+        Every URL is scraped unless `deduplicate` is set: True skips URLs that
+        canonicalize to an already submitted one, and they yield no result. A
+        `DedupIndex` or `BloomDedupIndex` also skips URLs scraped successfully
+        by earlier calls sharing it.
+
+        `urls` may be a sync or async iterable and is read lazily. At most
+        `max_buffered` finished scrapes wait for the consumer; while they do,
+        no more URLs are read.
+        """
+        template = self.template(
+            output_format=output_format,
+            schema=schema,
+            render_javascript=render_javascript,
+            geo_location=geo_location,
+            user_agent=user_agent,
+            optimize_content=optimize_content,
+            browser_instructions=browser_instructions,
+        )
+
+        async def scrape_one(url: str) -> AiScraperJob:
+            return await self.scrape_with_template_async(url, template)
+
+        async with self._batch_session():
+            async for result in run_batch(
+                deduplicated(urls, deduplicate),
+                scrape_one,
+                max_concurrency=max_concurrency,
+                group_key=url_domain if max_per_domain is not None else None,
+                max_per_group=max_per_domain,
+                retry_policy=retry_policy,
+                is_failed=lambda job: job.data is None,
+                max_buffered=max_buffered,
+            ):
+                if result.job is not None and result.job.data is not None:
+                    remember_succeeded(deduplicate, result.input)
+                yield result
 
     async def generate_schema_async(self, prompt: str) -> dict[str, Any] | None:
         """Async version of generate_schema. Uses httpx.AsyncClient."""
-        logger.info("Generating schema (async)")
+        logger.info("Generating schema")
         body = {"user_prompt": prompt}
         async with self.async_client() as client:
             response = await self.call_api_async(
-                client=client, url="/scrape/schema", method="POST", body=body
+                client=client,
+                url="/scrape/schema",
+                method="POST",
+                body=body,
+                operation="generate_schema",
             )
             if response.status_code != 200:
                 raise Exception(f"Failed to generate schema: {response.text}")
@@ -1,10 +1,23 @@
-import asyncio
-import time
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator, Sequence
 
+import httpx
 from pydantic import BaseModel
 
+from oxylabs_ai_studio.apps.ai_scraper import (
+    _build_scrape_template,
+    _scrape_with_client,
+)
+from oxylabs_ai_studio.batch import DEFAULT_MAX_CONCURRENCY, run_batch
 from oxylabs_ai_studio.client import OxyStudioAIClient
+from oxylabs_ai_studio.completion import CompletionNotifier
+from oxylabs_ai_studio.compression import (
+    DEFAULT_COMPRESSION_THRESHOLD,
+    RequestCompression,
+)
 from oxylabs_ai_studio.logger import get_logger
+from oxylabs_ai_studio.retry import RetryPolicy
+from oxylabs_ai_studio.timeouts import Timeouts
+from oxylabs_ai_studio.urls import DEFAULT_CANONICALIZER, UrlCanonicalizer
 
 SEARCH_TIMEOUT_SECONDS = 60 * 3
 POLL_INTERVAL_SECONDS = 5
@@ -26,11 +39,66 @@ class AiSearchJob(BaseModel):
     data: list[SearchResult] | None
 
 
+class AiSearchManyResult(BaseModel):
+    """Merged results of `AiSearch.search_many`.
+
+    `results` holds unique results in order of first appearance, `queries` the
+    URLs each query returned in rank order and `errors` the failed queries.
+    """
+
+    results: list[SearchResult]
+    queries: dict[str, list[str]]
+    errors: dict[str, str]
+
+
+def _unique_queries(
+    queries: Iterable[str] | AsyncIterable[str],
+) -> Iterable[str] | AsyncIterable[str]:
+    """`queries` without repeats, lazily; async iterables stay async."""
+
+    def unique(queries: Iterable[str]) -> Iterator[str]:
+        seen: set[str] = set()
+        for query in queries:
+            if query not in seen:
+                seen.add(query)
+                yield query
+
+    async def unique_async(queries: AsyncIterable[str]) -> AsyncIterator[str]:
+        seen: set[str] = set()
+        async for query in queries:
+            if query not in seen:
+                seen.add(query)
+                yield query
+
+    if isinstance(queries, AsyncIterable):
+        return unique_async(queries)
+    return unique(queries)
+
+
 class AiSearch(OxyStudioAIClient):
     """AI Search app."""
 
-    def __init__(self, api_key: str | None = None):
-        super().__init__(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str | None = None,
+        api_keys: Sequence[str] | None = None,
+        request_compression: RequestCompression | None = None,
+        compression_threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+        max_in_flight: int | None = None,
+        notifier: CompletionNotifier | None = None,
+        http_retry_policy: RetryPolicy | None = None,
+        timeout: float | Timeouts | None = None,
+    ):
+        super().__init__(
+            api_key=api_key,
+            api_keys=api_keys,
+            request_compression=request_compression,
+            compression_threshold=compression_threshold,
+            max_in_flight=max_in_flight,
+            notifier=notifier,
+            http_retry_policy=http_retry_policy,
+            timeout=timeout,
+        )
 
     def search(
         self,
@@ -40,94 +108,26 @@ class AiSearch(OxyStudioAIClient):
         return_content: bool = True,
         geo_location: str | None = None,
     ) -> AiSearchJob:
-        if not query:
-            raise ValueError("query is required")
-
-        body = {
-            "query": query,
-            "limit": limit,
-            "render_javascript": render_javascript,
-            "return_content": return_content,
-            "geo_location": geo_location,
-        }
-        # Use instant endpoint if limit <= 10 and return_content is False
-        if limit <= 10 and not return_content:
-            return self.instant_search(
-                query=query, limit=limit, geo_location=geo_location
+        return self._run_sync(
+            self.search_async(
+                query=query,
+                limit=limit,
+                render_javascript=render_javascript,
+                return_content=return_content,
+                geo_location=geo_location,
             )
-
-        # Use regular polling endpoint
-        client = self.get_client()
-        create_response = self.call_api(
-            client=client, url="/search/run", method="POST", body=body
         )
-        status_code = create_response.status_code
-        if status_code != 200:
-            raise Exception(f"Failed to create search job: `{create_response.text}`")
-        resp_body = create_response.json()
-        run_id = resp_body["run_id"]
-        try:
-            for _ in range(POLL_MAX_ATTEMPTS):
-                try:
-                    get_response = self.call_api(
-                        client=client,
-                        url="/search/run/data",
-                        method="GET",
-                        params={"run_id": run_id},
-                    )
-                except Exception:
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                if get_response.status_code == 202:
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                if get_response.status_code != 200:
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                resp_body = get_response.json()
-                if resp_body["status"] == "completed":
-                    return AiSearchJob(
-                        run_id=run_id,
-                        message=resp_body.get("error_code", None),
-                        data=resp_body["data"],
-                    )
-                if resp_body["status"] == "failed":
-                    return AiSearchJob(
-                        run_id=run_id,
-                        message=resp_body.get("error_code", None),
-                        data=None,
-                    )
-                time.sleep(POLL_INTERVAL_SECONDS)
-        except KeyboardInterrupt:
-            logger.info("[Cancelled] Request was cancelled by user.")
-            raise KeyboardInterrupt from None
-        except Exception as e:
-            raise e
-        raise TimeoutError(f"Failed to search {query=}")
 
     def instant_search(
         self, query: str, limit: int = 10, geo_location: str | None = None
     ) -> AiSearchJob:
         """Instant SERP search without content (returns up to 10 results)."""
-        if not query:
-            raise ValueError("query is required")
-        body = {
-            "query": query,
-            "limit": limit,
-            "geo_location": geo_location,
-        }
-        client = self.get_client()
-        response = self.call_api(
-            client=client, url="/search/instant", method="POST", body=body
-        )
-        status_code = response.status_code
-        if status_code != 200:
-            raise Exception(f"Failed to perform instant search: `{response.text}`")
-        resp_body = response.json()
-        return AiSearchJob(
-            run_id=resp_body.get("run_id", ""),
-            message=resp_body.get("status", None),
-            data=resp_body.get("data", None),
+        return self._run_sync(
+            self.instant_search_async(
+                query=query,
+                limit=limit,
+                geo_location=geo_location,
+            )
         )
 
     async def search_async(
@@ -152,56 +152,45 @@ class AiSearch(OxyStudioAIClient):
         async with self.async_client() as client:
             # Use instant endpoint if limit <= 10 and return_content is False
             if limit <= 10 and not return_content:
-                return await self.instant_search_async(
-                    query=query, limit=limit, geo_location=geo_location
+                return await self._instant_search_async(
+                    client=client, query=query, limit=limit, geo_location=geo_location
                 )
 
             # Use regular polling endpoint
             create_response = await self.call_api_async(
-                client=client, url="/search/run", method="POST", body=body
+                client=client,
+                url="/search/run",
+                method="POST",
+                body=self._submission_body(body),
+                operation="create",
             )
-
+            if create_response.status_code != 200:
+                raise Exception(
+                    f"Failed to create search job: `{create_response.text}`"
+                )
             resp_body = create_response.json()
             run_id = resp_body["run_id"]
-            try:
-                for _ in range(POLL_MAX_ATTEMPTS):
-                    try:
-                        get_response = await self.call_api_async(
-                            client=client,
-                            url="/search/run/data",
-                            method="GET",
-                            params={"run_id": run_id},
-                        )
-                    except Exception:
-                        await asyncio.sleep(POLL_INTERVAL_SECONDS)
-                        continue
-                    if get_response.status_code == 202:
-                        await asyncio.sleep(POLL_INTERVAL_SECONDS)
-                        continue
-                    if get_response.status_code != 200:
-                        await asyncio.sleep(POLL_INTERVAL_SECONDS)
-                        continue
-                    resp_body = get_response.json()
-                    if resp_body["status"] == "completed":
-                        return AiSearchJob(
-                            run_id=run_id,
-                            message=resp_body.get("error_code"),
-                            data=resp_body["data"],
-                        )
-                    if resp_body["status"] == "failed":
-                        logger.error("[search_async] job failed run_id=%s", run_id)
-                        return AiSearchJob(
-                            run_id=run_id,
-                            message=resp_body.get("error_code", None),
-                            data=None,
-                        )
-                    await asyncio.sleep(POLL_INTERVAL_SECONDS)
-            except KeyboardInterrupt:
-                logger.info("[Cancelled] Request was cancelled by user.")
-                raise KeyboardInterrupt from None
-            except Exception as e:
-                raise e
-            raise TimeoutError(f"Failed to search {query=}")
+            resp_body = await self._wait_for_run(
+                client,
+                "/search/run/data",
+                run_id,
+                poll_interval=POLL_INTERVAL_SECONDS,
+                max_attempts=POLL_MAX_ATTEMPTS,
+            )
+            if resp_body is None:
+                raise TimeoutError(f"Failed to search {query=}")
+            if resp_body["status"] == "completed":
+                return AiSearchJob(
+                    run_id=run_id,
+                    message=resp_body.get("error_code"),
+                    data=resp_body["data"],
+                )
+            logger.error("[search_async] job failed run_id=%s", run_id)
+            return AiSearchJob(
+                run_id=run_id,
+                message=resp_body.get("error_code", None),
+                data=None,
+            )
 
     async def instant_search_async(
         self, query: str, limit: int = 10, geo_location: str | None = None
@@ -209,21 +198,123 @@ class AiSearch(OxyStudioAIClient):
         """Async version of instant SERP search without content."""
         if not query:
             raise ValueError("query is required")
+        async with self.async_client() as client:
+            return await self._instant_search_async(
+                client=client, query=query, limit=limit, geo_location=geo_location
+            )
+
+    async def _instant_search_async(
+        self,
+        client: httpx.AsyncClient,
+        query: str,
+        limit: int,
+        geo_location: str | None,
+    ) -> AiSearchJob:
         body = {
             "query": query,
             "limit": limit,
             "geo_location": geo_location,
         }
-        async with self.async_client() as client:
-            response = await self.call_api_async(
-                client=client, url="/search/instant", method="POST", body=body
-            )
-            status_code = response.status_code
-            if status_code != 200:
-                raise Exception(f"Failed to perform instant search: `{response.text}`")
-            resp_body = response.json()
-            return AiSearchJob(
-                run_id=resp_body.get("run_id", ""),
-                message=resp_body.get("status"),
-                data=resp_body.get("data", None),
+        response = await self.call_api_async(
+            client=client,
+            url="/search/instant",
+            method="POST",
+            body=body,
+            operation="result",
+        )
+        status_code = response.status_code
+        if status_code != 200:
+            raise Exception(f"Failed to perform instant search: `{response.text}`")
+        resp_body = response.json()
+        return AiSearchJob(
+            run_id=resp_body.get("run_id", ""),
+            message=resp_body.get("status"),
+            data=resp_body.get("data", None),
+        )
+
+    async def search_many(
+        self,
+        queries: Iterable[str] | AsyncIterable[str],
+        limit: int = 10,
+        render_javascript: bool = False,
+        return_content: bool = True,
+        geo_location: str | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        fetch_content_once: bool = False,
+        canonicalizer: UrlCanonicalizer = DEFAULT_CANONICALIZER,
+    ) -> AiSearchManyResult:
+        """Run many queries and merge their results.
+
+        Each query goes through `search_async`, so it uses the instant endpoint
+        when `limit <= 10` and content is not requested; repeated queries are
+        run once. Results are
+        deduplicated across queries by their URL canonicalized with
+        `canonicalizer`, which also gives the URLs listed in `queries`. With
+        `fetch_content_once`, queries are run without content and the
+        markdown of every unique URL is then scraped once, instead of being
+        fetched again for every query that returns it.
+        """
+        fetch_separately = return_content and fetch_content_once
+
+        async def search_one(query: str) -> AiSearchJob:
+            return await self.search_async(
+                query=query,
+                limit=limit,
+                render_javascript=render_javascript,
+                return_content=return_content and not fetch_separately,
+                geo_location=geo_location,
             )
+
+        unique: dict[str, SearchResult] = {}
+        per_query: dict[str, list[str]] = {}
+        errors: dict[str, str] = {}
+        async with self._batch_session():
+            async for result in run_batch(
+                _unique_queries(queries), search_one, max_concurrency=max_concurrency
+            ):
+                query, job = result.input, result.job
+                if job is None or job.data is None:
+                    errors[query] = (
+                        result.error or (job.message if job else None) or "failed"
+                    )
+                    continue
+                urls = per_query.setdefault(query, [])
+                for item in job.data:
+                    key = canonicalizer.canonicalize(item.url)
+                    urls.append(key)
+                    known = unique.get(key)
+                    if known is None:
+                        unique[key] = item
+                    elif known.content is None and item.content is not None:
+                        known.content = item.content
+
+            if fetch_separately and unique:
+                await self._fetch_contents(unique, render_javascript, max_concurrency)
+        return AiSearchManyResult(
+            results=list(unique.values()), queries=per_query, errors=errors
+        )
+
+    async def _fetch_contents(
+        self,
+        results: dict[str, SearchResult],
+        render_javascript: bool,
+        max_concurrency: int,
+    ) -> None:
+        """Scrape the markdown of `results`, keyed by canonical URL."""
+        template = _build_scrape_template(render_javascript=render_javascript)
+
+        async def scrape_one(key: str) -> str | None:
+            url = results[key].url
+            job = await _scrape_with_client(self, url, template.encode(url=url))
+            return job.data if isinstance(job.data, str) else None
+
+        async for fetched in run_batch(
+            list(results), scrape_one, max_concurrency=max_concurrency
+        ):
+            if fetched.error is not None:
+                logger.warning(
+                    "Failed to fetch content for %s: %s",
+                    results[fetched.input].url,
+                    fetched.error,
+                )
+            results[fetched.input].content = fetched.job
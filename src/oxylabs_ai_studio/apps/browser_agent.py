@@ -1,19 +1,40 @@
 import asyncio
 import time
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Sequence
 from typing import Any, Literal
 
+import httpx
 from pydantic import BaseModel
 
-from oxylabs_ai_studio.client import OxyStudioAIClient
+from oxylabs_ai_studio.batch import (
+    DEFAULT_MAX_CONCURRENCY,
+    NO_RETRIES,
+    JobRetryPolicy,
+    run_batch,
+)
+from oxylabs_ai_studio.client import OxyStudioAIClient, RawJson
+from oxylabs_ai_studio.completion import CompletionNotifier
+from oxylabs_ai_studio.compression import (
+    DEFAULT_COMPRESSION_THRESHOLD,
+    RequestCompression,
+)
 from oxylabs_ai_studio.logger import get_logger
-from oxylabs_ai_studio.models import SchemaResponse
+from oxylabs_ai_studio.models import BrowserAgentTask, SchemaResponse
+from oxylabs_ai_studio.retry import RetryPolicy
+from oxylabs_ai_studio.schema import ModelT, SchemaArg, parse_model, schema_body
+from oxylabs_ai_studio.templates import RequestTemplate
+from oxylabs_ai_studio.timeouts import Timeouts
 
 BROWSER_AGENT_TIMEOUT_SECONDS = 60 * 10
 POLL_INTERVAL_SECONDS = 5
 POLL_MAX_ATTEMPTS = BROWSER_AGENT_TIMEOUT_SECONDS // POLL_INTERVAL_SECONDS
+LONG_RUN_THRESHOLD_SECONDS = 60
+DEFAULT_MAX_LONG_RUNNING = 3
 
 logger = get_logger(__name__)
 
+AgentOutputFormat = Literal["json", "markdown", "html", "screenshot", "csv", "toon"]
+
 
 class DataModel(BaseModel):
     type: Literal["json", "markdown", "html", "screenshot", "csv", "toon"]
@@ -25,10 +46,88 @@ class BrowserAgentJob(BaseModel):
     message: str | None = None
     data: DataModel | None = None
 
+    def parse(self, model: type[ModelT]) -> ModelT | None:
+        """`data` content of a json run as an instance of `model`."""
+        if self.data is None or self.data.content is None:
+            return None
+        return parse_model(model, self.data.content)
+
+
+class BrowserAgentTimings(BaseModel):
+    queued_seconds: float
+    submit_seconds: float
+    run_seconds: float
+    total_seconds: float
+    lane: Literal["short", "long"]
+
+
+class BrowserAgentRunResult(BaseModel):
+    # The submitted BrowserAgentTask (typing.TypedDict can't be a pydantic
+    # field on Python < 3.12).
+    task: dict[str, Any]
+    job: BrowserAgentJob | None = None
+    error: str | None = None
+    attempts: int = 1
+    timings: BrowserAgentTimings | None = None
+
+
+async def _acquire_unless_done(
+    semaphore: asyncio.Semaphore, task: "asyncio.Future[Any]"
+) -> bool:
+    """Acquire `semaphore` unless `task` finishes first."""
+    acquire = asyncio.ensure_future(semaphore.acquire())
+    try:
+        await asyncio.wait({task, acquire}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        if not acquire.done():
+            acquire.cancel()
+            await asyncio.wait({acquire})
+    return not acquire.cancelled()
+
+
+def _build_run_body(
+    *,
+    url: str,
+    user_prompt: str,
+    output_format: AgentOutputFormat,
+    schema: SchemaArg | None,
+    geo_location: str | None,
+) -> dict[str, Any]:
+    if output_format in ["json", "csv", "toon"] and schema is None:
+        raise ValueError(
+            "openapi_schema is required when output_format is json, csv or toon.",
+        )
+    return {
+        "url": url,
+        "output_format": output_format,
+        "openapi_schema": schema_body(schema),
+        "user_prompt": user_prompt,
+        "geo_location": geo_location,
+    }
+
 
 class BrowserAgent(OxyStudioAIClient):
-    def __init__(self, api_key: str | None = None):
-        super().__init__(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str | None = None,
+        api_keys: Sequence[str] | None = None,
+        request_compression: RequestCompression | None = None,
+        compression_threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+        max_in_flight: int | None = None,
+        notifier: CompletionNotifier | None = None,
+        http_retry_policy: RetryPolicy | None = None,
+        timeout: float | Timeouts | None = None,
+    ):
+        super().__init__(
+            api_key=api_key,
+            api_keys=api_keys,
+            request_compression=request_compression,
+            compression_threshold=compression_threshold,
+            max_in_flight=max_in_flight,
+            notifier=notifier,
+            http_retry_policy=http_retry_policy,
+            timeout=timeout,
+        )
 
     def run(
         self,
@@ -37,83 +136,49 @@ class BrowserAgent(OxyStudioAIClient):
         output_format: Literal[
             "json", "markdown", "html", "screenshot", "csv", "toon"
         ] = "markdown",
-        schema: dict[str, Any] | None = None,
+        schema: SchemaArg | None = None,
         geo_location: str | None = None,
     ) -> BrowserAgentJob:
-        if output_format in ["json", "csv", "toon"] and schema is None:
-            raise ValueError(
-                "openapi_schema is required when output_format is json, csv or toon.",
+        return self._run_sync(
+            self.run_async(
+                url=url,
+                user_prompt=user_prompt,
+                output_format=output_format,
+                schema=schema,
+                geo_location=geo_location,
             )
-
-        body = {
-            "url": url,
-            "output_format": output_format,
-            "openapi_schema": schema,
-            "user_prompt": user_prompt,
-            "geo_location": geo_location,
-        }
-        client = self.get_client()
-        create_response = self.call_api(
-            client=client, url="/browser-agent/run", method="POST", body=body
         )
-        if create_response.status_code != 200:
-            raise Exception(f"Failed to launch browser agent: {create_response.text}")
-        resp_body = create_response.json()
-        run_id = resp_body["run_id"]
-        logger.info(f"Starting browser agent run for url: {url}. Job id: {run_id}.")
-        try:
-            for _ in range(POLL_MAX_ATTEMPTS):
-                try:
-                    get_response = self.call_api(
-                        client=client,
-                        url="/browser-agent/run/data",
-                        method="GET",
-                        params={"run_id": run_id},
-                    )
-                except Exception:
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                if get_response.status_code == 202:
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                if get_response.status_code != 200:
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                resp_body = get_response.json()
-                if resp_body["status"] == "processing":
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                if resp_body["status"] == "completed":
-                    return BrowserAgentJob(
-                        run_id=run_id,
-                        message=resp_body.get("error_code", None),
-                        data=resp_body["data"],
-                    )
-                if resp_body["status"] == "failed":
-                    return BrowserAgentJob(
-                        run_id=run_id,
-                        message=resp_body.get("error_code", None),
-                        data=None,
-                    )
-                time.sleep(POLL_INTERVAL_SECONDS)
-        except KeyboardInterrupt:
-            logger.info("[Cancelled] Browser agent was cancelled by user.")
-            raise KeyboardInterrupt from None
-        raise TimeoutError(f"Failed to scrape {url}: timeout.")
 
     def generate_schema(self, prompt: str) -> dict[str, Any] | None:
-        logger.info("Generating schema")
-        body = {"user_prompt": prompt}
-        response = self.call_api(
-            client=self.get_client(),
-            url="/browser-agent/generate-params",
-            method="POST",
-            body=body,
+        return self._run_sync(self.generate_schema_async(prompt=prompt))
+
+    def template(
+        self,
+        output_format: AgentOutputFormat = "markdown",
+        schema: SchemaArg | None = None,
+        geo_location: str | None = None,
+    ) -> RequestTemplate:
+        """Run options checked and encoded once for many runs.
+
+        `url` and `user_prompt` are given per run to `run_with_template`.
+        """
+        body = _build_run_body(
+            url="",
+            user_prompt="",
+            output_format=output_format,
+            schema=schema,
+            geo_location=geo_location,
         )
-        if response.status_code != 200:
-            raise Exception(f"Failed to generate schema: {response.text}")
-        json_response: SchemaResponse = response.json()
-        return json_response.get("openapi_schema", None)
+        del body["url"], body["user_prompt"]
+        return RequestTemplate(
+            "/browser-agent/run", body, job_fields=("url", "user_prompt")
+        )
+
+    def run_with_template(
+        self, url: str, template: RequestTemplate, user_prompt: str = ""
+    ) -> BrowserAgentJob:
+        """Run on `url` with the options of a `template`."""
+        return self._run_sync(self.run_with_template_async(url, template, user_prompt))
 
     async def run_async(
         self,
@@ -127,78 +192,80 @@ class BrowserAgent(OxyStudioAIClient):
             "csv",
             "toon",
         ] = "markdown",
-        schema: dict[str, Any] | None = None,
+        schema: SchemaArg | None = None,
         geo_location: str | None = None,
     ) -> BrowserAgentJob:
         """Async version of run."""
-        if output_format in ["json", "csv", "toon"] and schema is None:
-            raise ValueError(
-                "openapi_schema is required when output_format is json, csv or toon.",
-            )
+        body = _build_run_body(
+            url=url,
+            user_prompt=user_prompt,
+            output_format=output_format,
+            schema=schema,
+            geo_location=geo_location,
+        )
+        return await self._run_async(url, body)
 
-        body = {
-            "url": url,
-            "output_format": output_format,
-            "openapi_schema": schema,
-            "user_prompt": user_prompt,
-            "geo_location": geo_location,
-        }
+    async def run_with_template_async(
+        self, url: str, template: RequestTemplate, user_prompt: str = ""
+    ) -> BrowserAgentJob:
+        """Async version of run_with_template."""
+        template.check_path("/browser-agent/run")
+        body = template.encode(url=url, user_prompt=user_prompt)
+        return await self._run_async(url, body)
+
+    async def _run_async(
+        self, url: str, body: dict[str, Any] | RawJson
+    ) -> BrowserAgentJob:
         async with self.async_client() as client:
-            create_response = await self.call_api_async(
-                client=client, url="/browser-agent/run", method="POST", body=body
-            )
-            if create_response.status_code != 200:
-                raise Exception(
-                    f"Failed to launch browser agent: {create_response.text}"
-                )
-            resp_body = create_response.json()
-            run_id = resp_body["run_id"]
+            run_id = await self._create_run_async(client, body)
             logger.info(
-                f"Starting async browser agent run for url: {url}. Job id: {run_id}."
+                "Starting browser agent run for url: %s. Job id: %s.", url, run_id
             )
-            try:
-                for _ in range(POLL_MAX_ATTEMPTS):
-                    try:
-                        get_response = await self.call_api_async(
-                            client=client,
-                            url="/browser-agent/run/data",
-                            method="GET",
-                            params={"run_id": run_id},
-                        )
-                    except Exception:
-                        await asyncio.sleep(POLL_INTERVAL_SECONDS)
-                        continue
-                    if get_response.status_code == 202:
-                        await asyncio.sleep(POLL_INTERVAL_SECONDS)
-                        continue
-                    if get_response.status_code != 200:
-                        await asyncio.sleep(POLL_INTERVAL_SECONDS)
-                        continue
-                    resp_body = get_response.json()
-                    if resp_body["status"] == "processing":
-                        await asyncio.sleep(POLL_INTERVAL_SECONDS)
-                        continue
-                    if resp_body["status"] == "completed":
-                        return BrowserAgentJob(
-                            run_id=run_id,
-                            message=resp_body.get("error_code", None),
-                            data=resp_body["data"],
-                        )
-                    if resp_body["status"] == "failed":
-                        return BrowserAgentJob(
-                            run_id=run_id,
-                            message=resp_body.get("error_code", None),
-                            data=None,
-                        )
-                    await asyncio.sleep(POLL_INTERVAL_SECONDS)
-            except KeyboardInterrupt:
-                logger.info("[Cancelled] Browser agent was cancelled by user.")
-                raise KeyboardInterrupt from None
+            return await self._wait_for_run_async(client, run_id, url)
+
+    async def _create_run_async(
+        self, client: httpx.AsyncClient, body: dict[str, Any] | RawJson
+    ) -> str:
+        create_response = await self.call_api_async(
+            client=client,
+            url="/browser-agent/run",
+            method="POST",
+            body=self._submission_body(body),
+            operation="create",
+        )
+        if create_response.status_code != 200:
+            raise Exception(f"Failed to launch browser agent: {create_response.text}")
+        resp_body = create_response.json()
+        run_id: str = resp_body["run_id"]
+        return run_id
+
+    async def _wait_for_run_async(
+        self, client: httpx.AsyncClient, run_id: str, url: str
+    ) -> BrowserAgentJob:
+        resp_body = await self._wait_for_run(
+            client,
+            "/browser-agent/run/data",
+            run_id,
+            poll_interval=POLL_INTERVAL_SECONDS,
+            max_attempts=POLL_MAX_ATTEMPTS,
+        )
+        if resp_body is None:
             raise TimeoutError(f"Failed to scrape {url}: timeout.")
+        if resp_body["status"] == "completed":
+            return BrowserAgentJob(
+                run_id=run_id,
+                message=resp_body.get("error_code", None),
+                data=resp_body["data"],
+            )
+        return BrowserAgentJob(
+            run_id=run_id,
+            message=resp_body.get("error_code", None),
+            data=None,
+        )
 
     async def generate_schema_async(self, prompt: str) -> dict[str, Any] | None:
         """Async version of generate_schema. Uses httpx.AsyncClient."""
-        logger.info("Generating schema (async)")
+        logger.info("Generating schema")
         body = {"user_prompt": prompt}
         async with self.async_client() as client:
             response = await self.call_api_async(
@@ -206,8 +273,111 @@ class BrowserAgent(OxyStudioAIClient):
                 url="/browser-agent/generate-params",
                 method="POST",
                 body=body,
+                operation="generate_schema",
             )
             if response.status_code != 200:
                 raise Exception(f"Failed to generate schema: {response.text}")
             json_response: SchemaResponse = response.json()
             return json_response.get("openapi_schema", None)
+
+    async def run_many(
+        self,
+        tasks: Iterable[BrowserAgentTask] | AsyncIterable[BrowserAgentTask],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_long_running: int = DEFAULT_MAX_LONG_RUNNING,
+        long_run_threshold: float = LONG_RUN_THRESHOLD_SECONDS,
+        retry_policy: JobRetryPolicy = NO_RETRIES,
+        max_buffered: int | None = None,
+    ) -> AsyncIterator[BrowserAgentRunResult]:
+        """Run many browser agent tasks, yielding each result as it finishes.
+
+        Tasks start in the short lane, which has `max_concurrency` slots. A run
+        still going after `long_run_threshold` seconds moves to the long lane
+        (`max_long_running` slots) and frees its short slot, so long runs
+        cannot hog every slot. Tasks with `long_running=True` start in the
+        long lane. All runs share one connection pool.
+
+        `tasks` may be a sync or async iterable and is read lazily; at most
+        `max_buffered` finished runs wait for the consumer before reading
+        pauses.
+        """
+        if max_long_running < 1:
+            raise ValueError("max_long_running must be at least 1")
+        short_lane = asyncio.Semaphore(max_concurrency)
+        long_lane = asyncio.Semaphore(max_long_running)
+        # Tasks usually share their options, so each combination is encoded
+        # once. Holding the schema keeps its id from being reused.
+        templates: dict[tuple[Any, ...], tuple[Any, RequestTemplate]] = {}
+
+        def task_template(task: BrowserAgentTask) -> RequestTemplate:
+            output_format = task.get("output_format", "markdown")
+            schema = task.get("schema")
+            geo_location = task.get("geo_location")
+            key = (output_format, id(schema), geo_location)
+            if key not in templates:
+                templates[key] = (
+                    schema,
+                    self.template(output_format, schema, geo_location),
+                )
+            return templates[key][1]
+
+        async def run_one(
+            task: BrowserAgentTask,
+        ) -> tuple[BrowserAgentJob, BrowserAgentTimings]:
+            body = task_template(task).encode(
+                url=task["url"], user_prompt=task.get("user_prompt", "")
+            )
+            started = time.monotonic()
+            lane = long_lane if task.get("long_running") else short_lane
+            await lane.acquire()
+            try:
+                queued = time.monotonic()
+                async with self.async_client() as client:
+                    run_id = await self._create_run_async(client, body)
+                    submitted = time.monotonic()
+                    poll = asyncio.ensure_future(
+                        self._wait_for_run_async(client, run_id, task["url"])
+                    )
+                    try:
+                        if lane is short_lane:
+                            done, _ = await asyncio.wait(
+                                {poll}, timeout=long_run_threshold
+                            )
+                            if not done and await _acquire_unless_done(long_lane, poll):
+                                logger.info(
+                                    "Browser agent run %s moved to the long lane.",
+                                    run_id,
+                                )
+                                short_lane.release()
+                                lane = long_lane
+                        job = await poll
+                    finally:
+                        poll.cancel()
+            finally:
+                lane.release()
+            finished = time.monotonic()
+            return job, BrowserAgentTimings(
+                queued_seconds=queued - started,
+                submit_seconds=submitted - queued,
+                run_seconds=finished - submitted,
+                total_seconds=finished - started,
+                lane="long" if lane is long_lane else "short",
+            )
+
+        async with self._batch_session():
+            async for result in run_batch(
+                tasks,
+                run_one,
+                max_concurrency=max_concurrency + max_long_running,
+                retry_policy=retry_policy,
+                is_failed=lambda outcome: outcome[0].data is None,
+                max_buffered=max_buffered,
+            ):
+                job, timings = result.job if result.job else (None, None)
+                yield BrowserAgentRunResult(
+                    task=dict(result.input),
+                    job=job,
+                    error=result.error,
+                    attempts=result.attempts,
+                    timings=timings,
+                )
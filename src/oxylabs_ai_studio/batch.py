@@ -0,0 +1,324 @@
+"""Shared machinery for the `*_many` batch methods of the apps."""
+
+import asyncio
+import contextlib
+import time
+from collections import deque
+from collections.abc import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Hashable,
+    Iterable,
+    Iterator,
+)
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Generic, TypeVar, cast
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel
+
+from oxylabs_ai_studio.logger import get_logger
+
+logger = get_logger(__name__)
+
+ItemT = TypeVar("ItemT")
+JobT = TypeVar("JobT")
+
+DEFAULT_MAX_CONCURRENCY = 10
+DEFAULT_MAX_WORKERS = 8
+
+
+class JobRetryPolicy(BaseModel):
+    """Job-level retries of batch methods.
+
+    These are separate from the HTTP retries of `call_api`: a job is
+    resubmitted from scratch when it raised (e.g. timed out) or finished with
+    a `failed` status.
+    """
+
+    max_attempts: int = 3
+    backoff_seconds: float = 5.0
+    backoff_multiplier: float = 2.0
+    max_backoff_seconds: float = 60.0
+    retry_failed_jobs: bool = True
+    retry_errors: bool = True
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retrying after the given failed attempt."""
+        delay = self.backoff_seconds * self.backoff_multiplier ** (attempt - 1)
+        return float(min(self.max_backoff_seconds, delay))
+
+
+NO_RETRIES = JobRetryPolicy(max_attempts=1)
+
+
+# Type parameter syntax is avoided: the package supports Python 3.10.
+class BatchResult(BaseModel, Generic[ItemT, JobT]):  # noqa: UP046
+    """Outcome of one input of a batch method."""
+
+    input: ItemT
+    job: JobT | None = None
+    error: str | None = None
+    attempts: int = 1
+    elapsed_seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def url_domain(url: str) -> str:
+    """Host name of `url`, used to group jobs per domain."""
+    parts = urlsplit(url if "//" in url else f"//{url}")
+    return (parts.hostname or url).lower()
+
+
+async def run_with_retries(  # noqa: UP047
+    item: ItemT,
+    func: Callable[[ItemT], Awaitable[JobT]],
+    retry_policy: JobRetryPolicy,
+    is_failed: Callable[[JobT], bool] | None = None,
+) -> BatchResult[ItemT, JobT]:
+    """Run `func(item)`, retrying per `retry_policy`; never raises."""
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        job: JobT | None = None
+        error: str | None = None
+        try:
+            job = await func(item)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            retry = retry_policy.retry_errors
+        else:
+            failed = is_failed is not None and is_failed(job)
+            retry = failed and retry_policy.retry_failed_jobs
+        if not retry or attempt >= retry_policy.max_attempts:
+            return BatchResult[ItemT, JobT](
+                input=item,
+                job=job,
+                error=error,
+                attempts=attempt,
+                elapsed_seconds=time.monotonic() - started,
+            )
+        delay = retry_policy.delay(attempt)
+        logger.info(
+            "Retrying job for %s in %.1fs (attempt %d failed).", item, delay, attempt
+        )
+        await asyncio.sleep(delay)
+
+
+class _ItemSource(Generic[ItemT]):  # noqa: UP046
+    """Takes items from a sync or async iterable, one at a time.
+
+    An async iterable is read by a task, so the scheduler can keep reaping
+    finished jobs while it waits for the next item.
+    """
+
+    def __init__(self, items: Iterable[ItemT] | AsyncIterable[ItemT]):
+        self.exhausted = False
+        self.fetch: asyncio.Future[ItemT] | None = None
+        self._iterator: Iterator[ItemT] | AsyncIterator[ItemT] = (
+            aiter(items) if isinstance(items, AsyncIterable) else iter(items)
+        )
+
+    def take(self) -> list[ItemT]:
+        """The next item, or nothing when exhausted or not available yet."""
+        if isinstance(self._iterator, Iterator):
+            try:
+                return [next(self._iterator)]
+            except StopIteration:
+                self.exhausted = True
+                return []
+        if self.fetch is None:
+            self.fetch = asyncio.ensure_future(anext(self._iterator))
+        if not self.fetch.done():
+            return []
+        fetch, self.fetch = self.fetch, None
+        try:
+            return [fetch.result()]
+        except StopAsyncIteration:
+            self.exhausted = True
+            return []
+
+    def close(self) -> None:
+        if self.fetch is not None:
+            self.fetch.cancel()
+
+
+class _End:
+    """Marks the end of the results of `run_batch`, or the error ending it."""
+
+    def __init__(self, error: BaseException | None = None):
+        self.error = error
+
+
+async def run_batch(  # noqa: UP047
+    items: Iterable[ItemT] | AsyncIterable[ItemT],
+    func: Callable[[ItemT], Awaitable[JobT]],
+    *,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    group_key: Callable[[ItemT], Hashable] | None = None,
+    max_per_group: int | None = None,
+    retry_policy: JobRetryPolicy = NO_RETRIES,
+    is_failed: Callable[[JobT], bool] | None = None,
+    max_buffered: int | None = None,
+) -> AsyncIterator[BatchResult[ItemT, JobT]]:
+    """Run `func` over `items` and yield results in completion order.
+
+    At most `max_concurrency` jobs run at once and, when `group_key` is given,
+    at most `max_per_group` of them share a group. Items of a group that is at
+    its limit are set aside (up to a few times `max_concurrency` of them) so
+    other groups can keep going.
+
+    `items`, sync or async, is consumed lazily. Up to `max_buffered` results
+    (`max_concurrency` by default) are kept while the consumer is busy; when
+    that many wait, no new jobs are started until the consumer catches up.
+    Memory use therefore doesn't grow with the number of items.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    if max_per_group is not None and max_per_group < 1:
+        raise ValueError("max_per_group must be at least 1")
+    if max_buffered is None:
+        max_buffered = max_concurrency
+    if max_buffered < 1:
+        raise ValueError("max_buffered must be at least 1")
+    per_group = max_per_group if group_key is not None else None
+    deferred_limit = max_concurrency * 4
+    completed: asyncio.Queue[BatchResult[ItemT, JobT] | _End] = asyncio.Queue(
+        max_buffered
+    )
+
+    async def schedule() -> None:
+        source = _ItemSource(items)
+        running: dict[asyncio.Task[BatchResult[ItemT, JobT]], Hashable] = {}
+        active: dict[Hashable, int] = {}
+        deferred: dict[Hashable, deque[ItemT]] = {}
+        deferred_count = 0
+
+        def start(item: ItemT, group: Hashable) -> None:
+            task = asyncio.create_task(
+                run_with_retries(item, func, retry_policy, is_failed)
+            )
+            running[task] = group
+            active[group] = active.get(group, 0) + 1
+
+        def has_room(group: Hashable) -> bool:
+            return per_group is None or active.get(group, 0) < per_group
+
+        try:
+            while True:
+                for group in list(deferred):
+                    queue = deferred[group]
+                    while queue and len(running) < max_concurrency and has_room(group):
+                        start(queue.popleft(), group)
+                        deferred_count -= 1
+                    if not queue:
+                        del deferred[group]
+                while (
+                    not source.exhausted
+                    and len(running) < max_concurrency
+                    and deferred_count < deferred_limit
+                ):
+                    taken = source.take()
+                    if not taken:
+                        break
+                    item = taken[0]
+                    group = group_key(item) if group_key is not None else None
+                    if has_room(group):
+                        start(item, group)
+                    else:
+                        deferred.setdefault(group, deque()).append(item)
+                        deferred_count += 1
+                waiting: set[asyncio.Future[Any]] = set(running)
+                if source.fetch is not None:
+                    waiting.add(source.fetch)
+                if not waiting:
+                    break
+                done, _ = await asyncio.wait(
+                    waiting, return_when=asyncio.FIRST_COMPLETED
+                )
+                for future in done:
+                    if future is source.fetch:
+                        continue
+                    task = cast("asyncio.Task[BatchResult[ItemT, JobT]]", future)
+                    group = running.pop(task)
+                    active[group] -= 1
+                    if not active[group]:
+                        del active[group]
+                    # Waits while the consumer is behind.
+                    await completed.put(task.result())
+        except Exception as exc:
+            error: BaseException | None = exc
+        else:
+            error = None
+        finally:
+            source.close()
+            for task in running:
+                task.cancel()
+        await completed.put(_End(error))
+
+    scheduler = asyncio.create_task(schedule())
+    try:
+        while True:
+            result = await completed.get()
+            if isinstance(result, _End):
+                if result.error is not None:
+                    raise result.error
+                return
+            yield result
+    finally:
+        scheduler.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await scheduler
+
+
+def _call_timed(  # noqa: UP047
+    item: ItemT, func: Callable[[ItemT], JobT]
+) -> BatchResult[ItemT, JobT]:
+    started = time.monotonic()
+    try:
+        job = func(item)
+    except Exception as exc:
+        return BatchResult[ItemT, JobT](
+            input=item,
+            error=f"{type(exc).__name__}: {exc}",
+            elapsed_seconds=time.monotonic() - started,
+        )
+    return BatchResult[ItemT, JobT](
+        input=item, job=job, elapsed_seconds=time.monotonic() - started
+    )
+
+
+def map_threaded(  # noqa: UP047
+    items: Iterable[ItemT],
+    func: Callable[[ItemT], JobT],
+    *,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> Iterator[BatchResult[ItemT, JobT]]:
+    """Like `ThreadPoolExecutor.map`, but never raises for a failed item.
+
+    Results are yielded in input order. `items` is consumed lazily, keeping
+    at most twice `max_workers` items submitted ahead of the consumer.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+    source = iter(items)
+    window: deque[Future[BatchResult[ItemT, JobT]]] = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for item in source:
+                window.append(executor.submit(_call_timed, item, func))
+                if len(window) >= max_workers * 2:
+                    yield window.popleft().result()
+            while window:
+                yield window.popleft().result()
+        finally:
+            for future in window:
+                future.cancel()
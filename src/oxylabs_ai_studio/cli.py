@@ -0,0 +1,389 @@
+"""Command line batch runner.
+
+Usage:
+    python -m oxylabs_ai_studio scrape urls.jsonl --output-dir out/ --workers 4
+
+Input rows are read lazily by the main process, either as JSONL (one object
+of `AiScraper.scrape` arguments per line) or CSV (one column per argument,
+`url` is required), and handed through a bounded queue to the worker process
+that asks next. Every worker parses its rows, runs its own event loop and
+connection pool and appends results to `<output-dir>/part-<worker>.jsonl`.
+Rows that already have a successful result in any part of the output
+directory are skipped; the parts are read once, by the main process, so an
+interrupted run can be resumed by running the same command again, with any
+number of workers.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from oxylabs_ai_studio.apps.ai_scraper import AiScraper
+from oxylabs_ai_studio.sinks import JsonlSink
+
+DEFAULT_WORKERS = 4
+DEFAULT_CONCURRENCY = 16
+PROGRESS_INTERVAL_SECONDS = 2.0
+
+SCRAPE_ARGUMENTS = {
+    "url",
+    "output_format",
+    "schema",
+    "render_javascript",
+    "geo_location",
+    "user_agent",
+    "optimize_content",
+    "browser_instructions",
+}
+_JSON_COLUMNS = {"schema", "browser_instructions"}
+_BOOL_COLUMNS = {"optimize_content"}
+
+
+def _parse_bool(value: str) -> bool:
+    normalized = value.strip().lower()
+    if normalized in ("1", "true", "yes"):
+        return True
+    if normalized in ("0", "false", "no"):
+        return False
+    raise ValueError(f"Invalid boolean value: {value!r}")
+
+
+def _csv_row_to_params(row: dict[str, str]) -> dict[str, Any]:
+    params: dict[str, Any] = {}
+    for column, value in row.items():
+        if value is None or value == "":
+            continue
+        if column in _JSON_COLUMNS:
+            params[column] = json.loads(value)
+        elif column in _BOOL_COLUMNS:
+            params[column] = _parse_bool(value)
+        elif column == "render_javascript":
+            params[column] = "auto" if value == "auto" else _parse_bool(value)
+        else:
+            params[column] = value
+    return params
+
+
+# A row as read from the input: a JSONL line or a CSV record.
+RawRow = str | dict[str, str]
+
+
+def iter_rows(path: Path, input_format: str) -> Iterator[tuple[int, RawRow]]:
+    """Yield `(row index, raw row)` for every row of the input, unparsed."""
+    with path.open(newline="", encoding="utf-8") as file:
+        if input_format == "csv":
+            yield from enumerate(csv.DictReader(file))
+            return
+        index = -1
+        for line in file:
+            if not line.strip():
+                continue
+            index += 1
+            yield index, line
+
+
+def parse_row(row: RawRow) -> dict[str, Any] | Exception:
+    """Scrape params of a raw row, or the exception if it fails to parse."""
+    try:
+        if isinstance(row, dict):
+            return _csv_row_to_params(row)
+        params = json.loads(row)
+    except ValueError as exc:
+        return exc
+    if isinstance(params, str):
+        return {"url": params}
+    if not isinstance(params, dict):
+        return ValueError("Row must be an object or a URL string")
+    return params
+
+
+def load_completed(path: Path) -> set[int]:
+    """Return indexes of rows with a successful result in an output part."""
+    completed: set[int] = set()
+    if not path.exists():
+        return completed
+    with path.open(encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A partially written last line of an interrupted run.
+                continue
+            index = record.get("index")
+            if record.get("error") is None and isinstance(index, int):
+                completed.add(index)
+    return completed
+
+
+def load_completed_dir(output_dir: Path) -> set[int]:
+    """Return indexes of rows with a successful result in any output part."""
+    completed: set[int] = set()
+    for path in sorted(output_dir.glob("part-*.jsonl")):
+        completed |= load_completed(path)
+    return completed
+
+
+def _feed_rows(
+    rows: Iterator[tuple[int, RawRow]],
+    completed: set[int],
+    tasks: "multiprocessing.Queue[tuple[int, RawRow] | None]",
+    workers: int,
+) -> None:
+    """Put the rows not completed yet on `tasks`, then one end marker per worker."""
+    for index, row in rows:
+        if index not in completed:
+            tasks.put((index, row))
+    for _ in range(workers):
+        tasks.put(None)
+
+
+async def _scrape_row(
+    scraper: AiScraper,
+    index: int,
+    params: dict[str, Any] | Exception,
+    defaults: dict[str, Any],
+) -> dict[str, Any]:
+    record: dict[str, Any] = {"index": index}
+    try:
+        if isinstance(params, Exception):
+            raise params
+        if not isinstance(params, dict) or "url" not in params:
+            raise ValueError("Row must contain a `url`")
+        unknown = set(params) - SCRAPE_ARGUMENTS
+        if unknown:
+            raise ValueError(f"Unknown arguments: {', '.join(sorted(unknown))}")
+        record["url"] = params["url"]
+        job = await scraper.scrape_async(**{**defaults, **params})
+        record.update(job.model_dump(mode="json"))
+        record["error"] = None
+    except Exception as exc:
+        record["error"] = f"{type(exc).__name__}: {exc}"
+    return record
+
+
+async def _run_shard(
+    options: argparse.Namespace,
+    shard: int,
+    tasks: "multiprocessing.Queue[tuple[int, RawRow] | None]",
+    progress: "multiprocessing.Queue[tuple[int, int]]",
+) -> None:
+    part_path = Path(options.output_dir) / f"part-{shard:05d}.jsonl"
+    defaults = _defaults_from_options(options)
+
+    sink = JsonlSink(part_path, append=True, fsync=options.fsync)
+    with sink:
+        async with AiScraper(api_key=options.api_key) as scraper:
+            pending: set[asyncio.Task[dict[str, Any]]] = set()
+            # The blocking read of the next row, run in a thread.
+            fetch: asyncio.Future[tuple[int, RawRow] | None] | None = None
+            ok = failed = 0
+            exhausted = False
+            while pending or fetch is not None or not exhausted:
+                if (
+                    not exhausted
+                    and fetch is None
+                    and len(pending) < options.concurrency
+                ):
+                    fetch = asyncio.ensure_future(asyncio.to_thread(tasks.get))
+                waiting: set[asyncio.Future[Any]] = set(pending)
+                if fetch is not None:
+                    waiting.add(fetch)
+                done, _ = await asyncio.wait(
+                    waiting, return_when=asyncio.FIRST_COMPLETED
+                )
+                if fetch is not None and fetch in done:
+                    item = fetch.result()
+                    fetch = None
+                    # Take what is already queued without another thread hop.
+                    while item is not None:
+                        index, row = item
+                        pending.add(
+                            asyncio.create_task(
+                                _scrape_row(scraper, index, parse_row(row), defaults)
+                            )
+                        )
+                        if len(pending) >= options.concurrency:
+                            break
+                        try:
+                            item = tasks.get_nowait()
+                        except queue.Empty:
+                            break
+                    else:
+                        exhausted = True
+                finished = pending & done
+                if not finished:
+                    continue
+                pending -= finished
+                for task in finished:
+                    record = task.result()
+                    sink.write(record)
+                    if record["error"] is None:
+                        ok += 1
+                    else:
+                        failed += 1
+                sink.flush()
+                progress.put((ok, failed))
+                ok = failed = 0
+
+
+def _worker_main(
+    options: argparse.Namespace,
+    shard: int,
+    tasks: "multiprocessing.Queue[tuple[int, RawRow] | None]",
+    progress: "multiprocessing.Queue[tuple[int, int]]",
+) -> None:
+    try:
+        asyncio.run(_run_shard(options, shard, tasks, progress))
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+
+def _defaults_from_options(options: argparse.Namespace) -> dict[str, Any]:
+    defaults: dict[str, Any] = {"output_format": options.output_format}
+    if options.schema_file:
+        defaults["schema"] = json.loads(Path(options.schema_file).read_text())
+    if options.render_javascript is not None:
+        render = options.render_javascript
+        defaults["render_javascript"] = (
+            "auto" if render == "auto" else _parse_bool(render)
+        )
+    if options.geo_location:
+        defaults["geo_location"] = options.geo_location
+    return defaults
+
+
+def run_scrape(options: argparse.Namespace) -> int:
+    if options.input_format is None:
+        options.input_format = (
+            "csv" if options.input.lower().endswith(".csv") else "jsonl"
+        )
+    output_dir = Path(options.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    completed = load_completed_dir(output_dir) if options.resume else set()
+    rows = iter_rows(Path(options.input), options.input_format)
+
+    # Enough queued rows to keep every worker busy, not the whole input.
+    tasks: multiprocessing.Queue[tuple[int, RawRow] | None] = multiprocessing.Queue(
+        options.workers * options.concurrency * 2
+    )
+    progress: multiprocessing.Queue[tuple[int, int]] = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(
+            target=_worker_main, args=(options, shard, tasks, progress), daemon=True
+        )
+        for shard in range(options.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    feeder = threading.Thread(
+        target=_feed_rows,
+        args=(rows, completed, tasks, options.workers),
+        name="row-feeder",
+        daemon=True,
+    )
+    feeder.start()
+
+    started = time.monotonic()
+    last_report = started
+    ok = failed = 0
+    try:
+        while any(worker.is_alive() for worker in workers) or not progress.empty():
+            try:
+                done_ok, done_failed = progress.get(timeout=0.5)
+                ok += done_ok
+                failed += done_failed
+            except queue.Empty:
+                pass
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+                last_report = now
+                _report_progress(ok, failed, now - started)
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+        raise
+    for worker in workers:
+        worker.join()
+    _report_progress(ok, failed, time.monotonic() - started)
+    if any(worker.exitcode != 0 for worker in workers):
+        return 1
+    return 0
+
+
+def _report_progress(ok: int, failed: int, elapsed: float) -> None:
+    done = ok + failed
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(
+        f"processed {done} rows ({ok} ok, {failed} failed), {rate:.1f} rows/s",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m oxylabs_ai_studio",
+        description="Oxylabs AI Studio batch runner.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scrape = commands.add_parser(
+        "scrape", help="Scrape every URL of a JSONL or CSV file."
+    )
+    scrape.add_argument("input", help="JSONL or CSV file with scrape arguments.")
+    scrape.add_argument(
+        "--output-dir", required=True, help="Directory for part-*.jsonl results."
+    )
+    scrape.add_argument(
+        "--input-format",
+        choices=["jsonl", "csv"],
+        default=None,
+        help="Input file format (default: detected from the file extension).",
+    )
+    scrape.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    scrape.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Jobs in flight per worker process.",
+    )
+    scrape.add_argument("--api-key", default=None)
+    scrape.add_argument("--output-format", default="markdown")
+    scrape.add_argument("--schema-file", default=None)
+    scrape.add_argument(
+        "--render-javascript", default=None, help="true, false or auto."
+    )
+    scrape.add_argument("--geo-location", default=None)
+    scrape.add_argument(
+        "--fsync",
+        choices=["never", "flush", "always"],
+        default="never",
+        help="When to fsync result files (default: never).",
+    )
+    scrape.add_argument(
+        "--no-resume",
+        dest="resume",
+        action="store_false",
+        help="Scrape every row even if a result already exists.",
+    )
+    scrape.set_defaults(handler=run_scrape)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    options = build_parser().parse_args(argv)
+    if options.workers < 1 or options.concurrency < 1:
+        raise SystemExit("--workers and --concurrency must be at least 1")
+    try:
+        return int(options.handler(options))
+    except KeyboardInterrupt:
+        return 130
@@ -1,6 +1,11 @@
-from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
-from typing import Any, Literal
+import asyncio
+import json
+import logging
+import threading
+from collections.abc import AsyncGenerator, Coroutine, Iterator, Sequence
+from contextlib import asynccontextmanager, contextmanager
+from types import TracebackType
+from typing import Any, Literal, TypeVar
 
 import httpx
 from tenacity import (
@@ -9,17 +14,65 @@ from tenacity import (
     RetryError,
     Retrying,
     retry_if_exception,
-    stop_after_attempt,
-    wait_exponential,
 )
 
-from oxylabs_ai_studio.logger import get_logger
+from oxylabs_ai_studio.completion import CompletionNotifier, PollingNotifier
+from oxylabs_ai_studio.compression import (
+    DEFAULT_COMPRESSION_THRESHOLD,
+    CompressionStats,
+    RequestCompression,
+    accept_encoding,
+    check_request_compression,
+    compress,
+)
+from oxylabs_ai_studio.event_loop import get_background_loop
+from oxylabs_ai_studio.key_pool import ApiKeyPool
+from oxylabs_ai_studio.logger import SAMPLED, get_logger, log_context
+from oxylabs_ai_studio.retry import DEFAULT_RETRIES as DEFAULT_RETRIES  # re-export
+from oxylabs_ai_studio.retry import DEFAULT_RETRY_POLICY, RetryPolicy
 from oxylabs_ai_studio.settings import settings
+from oxylabs_ai_studio.timeouts import Operation, Timeouts, resolve_timeouts
 
 logger = get_logger(__name__)
 
 _UA_API: str | None = None
-DEFAULT_RETRIES = 5
+DEFAULT_MAX_CONNECTIONS = 100
+
+ClientT = TypeVar("ClientT", bound="OxyStudioAIClient")
+T = TypeVar("T")
+
+
+class RawJson:
+    """Pre-serialized JSON spliced into a request body as is.
+
+    Used for large invariant body values, e.g. the schema of a pydantic
+    model, so they are encoded once instead of on every request.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: bytes):
+        self.value = value
+
+
+def dumps_json(value: Any) -> bytes:
+    """Compact UTF-8 JSON, as sent in request bodies."""
+    return json.dumps(
+        value, ensure_ascii=False, separators=(",", ":"), allow_nan=False
+    ).encode()
+
+
+def encode_json_body(body: dict[str, Any]) -> bytes:
+    """Serialize a request body, splicing in `RawJson` values."""
+    raw = [(key, value) for key, value in body.items() if isinstance(value, RawJson)]
+    if not raw:
+        return dumps_json(body)
+    encoded = dumps_json(
+        {key: value for key, value in body.items() if not isinstance(value, RawJson)}
+    )
+    spliced = b",".join(dumps_json(key) + b":" + value.value for key, value in raw)
+    separator = b"," if len(encoded) > 2 else b""
+    return encoded[:-1] + separator + spliced + b"}"
 
 
 def _resolve_ua() -> str:
@@ -28,14 +81,6 @@ def _resolve_ua() -> str:
     ) or "python-sdk"
 
 
-def _is_retryable_exception(exception: BaseException) -> bool:
-    if isinstance(exception, httpx.HTTPStatusError):
-        status = exception.response.status_code
-        if status == 429 or 500 <= status < 600:
-            return True
-    return False
-
-
 def _before_sleep_warn(state: RetryCallState) -> None:
     exc = state.outcome.exception() if state.outcome is not None else None
     if (
@@ -44,88 +89,425 @@ def _before_sleep_warn(state: RetryCallState) -> None:
         and exc.response.status_code == 429
     ):
         logger.warning(
-            f"Rate limit (HTTP 429). Consider reducing request rate. "
-            f"(attempt {state.attempt_number})"
+            "Rate limit (HTTP 429). Consider reducing request rate. (attempt %d)",
+            state.attempt_number,
+            extra=SAMPLED,
         )
         return
 
 
+def _log_failure(
+    url: str, attempts: int, exc: BaseException | None, operation: Operation | None
+) -> None:
+    # Tracebacks of expected HTTP failures are only useful when debugging.
+    # Every final failure is logged, except for polls: a failed poll is just
+    # followed by the next one and may repeat for the whole run.
+    logger.error(
+        "Failed calling API after %d attempts %s: %s",
+        attempts,
+        url,
+        exc,
+        exc_info=exc if logger.isEnabledFor(logging.DEBUG) else None,
+        extra=SAMPLED if operation == "poll" else None,
+    )
+
+
+class _Attempts:
+    """Tenacity strategies of one request, driven by a `RetryPolicy`."""
+
+    def __init__(self, policy: RetryPolicy, method: str, max_attempts: int):
+        self.policy = policy
+        self.method = method
+        self.max_attempts = max_attempts
+        self.count = 0
+        self._delay: float | None = None
+        if policy.budget is not None:
+            policy.budget.record_request()
+
+    def kwargs(self) -> dict[str, Any]:
+        return {
+            "before": self.before,
+            "retry": retry_if_exception(self.is_retryable),
+            "wait": self.wait,
+            "stop": self.stop,
+            "reraise": True,
+            "before_sleep": _before_sleep_warn,
+        }
+
+    def before(self, state: RetryCallState) -> None:
+        self.count = state.attempt_number
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        return self.policy.is_retryable(exc, self.method)
+
+    # Tenacity asks for the wait before asking whether to stop.
+    def wait(self, state: RetryCallState) -> float:
+        exc = state.outcome.exception() if state.outcome is not None else None
+        self._delay = None if exc is None else self.policy.delay(self.count, exc)
+        return self._delay or 0.0
+
+    def stop(self, state: RetryCallState) -> bool:
+        if state.attempt_number >= self.max_attempts:
+            return True
+        if self._delay is None:
+            logger.warning(
+                "Not retrying: the server asked to wait too long.", extra=SAMPLED
+            )
+            return True
+        budget = self.policy.budget
+        if budget is not None and not budget.try_spend():
+            logger.warning("Retry budget exhausted, not retrying.", extra=SAMPLED)
+            return True
+        return False
+
+
 class OxyStudioAIClient:
-    """Main client for interacting with the Oxy Studio AI API."""
+    """Main client for interacting with the Oxy Studio AI API.
 
-    def __init__(self, api_key: str | None = None, timeout: float = 30.0):
+    Instances are thread-safe and meant to be shared: the sync methods of all
+    threads run on one background event loop and share one connection pool,
+    and `max_in_flight` bounds how many of their jobs run at once.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        timeout: float | Timeouts | None = None,
+        api_keys: Sequence[str] | None = None,
+        request_compression: RequestCompression | None = None,
+        compression_threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+        max_in_flight: int | None = None,
+        notifier: CompletionNotifier | None = None,
+        http_retry_policy: RetryPolicy | None = None,
+    ):
         """Initialize the client.
 
         Args:
             api_key: The API key for the Oxy Studio AI API.
-            timeout: The timeout for the HTTP client.
+            timeout: Request timeouts: `Timeouts` per operation and phase,
+                or seconds for all of them. Defaults to `DEFAULT_TIMEOUTS`.
+            api_keys: Several API keys to spread the load over. Each job is
+                routed to the least loaded key that is not rate limited and
+                polled with the key that created it.
+            request_compression: Compress request bodies with gzip or zstd.
+            compression_threshold: Only bodies of at least this many bytes
+                are compressed.
+            max_in_flight: Maximum number of sync method calls running at
+                once across all threads; further callers wait for a free
+                slot. Also sizes the connection pool.
+            notifier: How to wait for runs to finish: `PollingNotifier`
+                (default), `LongPollNotifier` or `SseNotifier`.
+            http_retry_policy: Which failed requests are retried and how;
+                `DEFAULT_RETRY_POLICY` by default.
         """
-        resolved_key = api_key or settings.OXYLABS_AI_STUDIO_API_KEY
+        check_request_compression(request_compression)
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.max_in_flight = max_in_flight
+        self._in_flight = (
+            threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        )
+        self.request_compression = request_compression
+        self.compression_threshold = compression_threshold
+        self.compression_stats = CompressionStats()
+        self.notifier: CompletionNotifier = notifier or PollingNotifier()
+        self.http_retry_policy = http_retry_policy or DEFAULT_RETRY_POLICY
+        self.key_pool: ApiKeyPool | None = None
+        if api_keys:
+            self.key_pool = ApiKeyPool([*([api_key] if api_key else []), *api_keys])
+            resolved_key: str | None = self.key_pool.keys[0]
+        else:
+            resolved_key = api_key or settings.OXYLABS_AI_STUDIO_API_KEY
         if not resolved_key:
             raise ValueError("API key is required")
         self.api_key = resolved_key
         self.base_url = settings.OXYLABS_AI_STUDIO_API_URL
-        self.timeout = timeout
+        self.timeouts = resolve_timeouts(timeout)
+        self._session_client: httpx.AsyncClient | None = None
+        # Shared by the sync methods, which all run on the background loop.
+        self._loop_client: httpx.AsyncClient | None = None
+        self._loop_client_loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def timeout(self) -> float | None:
+        """Seconds a request without a particular operation may wait for data.
+
+        A number, as before `Timeouts`; the full settings are in `timeouts`.
+        Setting it applies the number to every phase of every operation, and
+        None disables timeouts.
+        """
+        return self.timeouts.default.read
+
+    @timeout.setter
+    def timeout(self, seconds: float | None) -> None:
+        self.timeouts = Timeouts.uniform(seconds)
+
+    def _default_headers(self) -> dict[str, str]:
+        return {
+            "x-api-key": self.api_key,
+            "Content-Type": "application/json",
+            "Accept-Encoding": accept_encoding(),
+            "User-Agent": _resolve_ua(),
+        }
+
+    def _limits(self) -> httpx.Limits:
+        # Keep as many idle connections as may be used at once, so a burst of
+        # jobs does not reconnect on every poll.
+        connections = self.max_in_flight or DEFAULT_MAX_CONNECTIONS
+        return httpx.Limits(
+            max_connections=connections, max_keepalive_connections=connections
+        )
 
     def get_client(self) -> httpx.Client:
         return httpx.Client(
             base_url=self.base_url,
-            headers={
-                "x-api-key": self.api_key,
-                "Content-Type": "application/json",
-                "User-Agent": _resolve_ua(),
-            },
-            timeout=self.timeout,
+            headers=self._default_headers(),
+            timeout=self.timeouts.for_operation(None),
+            limits=self._limits(),
         )
 
-    @asynccontextmanager
-    async def async_client(self) -> AsyncGenerator[httpx.AsyncClient, None]:
-        """Async context manager for async client."""
-        async_client = httpx.AsyncClient(
+    def _new_async_client(
+        self, transport: httpx.AsyncBaseTransport | None = None
+    ) -> httpx.AsyncClient:
+        """A client for async calls; `transport` shares another's connections."""
+        return httpx.AsyncClient(
             base_url=self.base_url,
-            headers={
-                "x-api-key": self.api_key,
-                "Content-Type": "application/json",
-                "User-Agent": _resolve_ua(),
-            },
-            timeout=self.timeout,
+            headers=self._default_headers(),
+            timeout=self.timeouts.for_operation(None),
+            limits=self._limits(),
+            transport=transport,
         )
+
+    async def __aenter__(self: ClientT) -> ClientT:
+        """Open a session: async calls made inside `async with app:` share one
+        connection pool instead of opening a new client per call."""
+        if self._session_client is None:
+            self._session_client = self._new_async_client()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        session_client, self._session_client = self._session_client, None
+        if session_client is not None:
+            await session_client.aclose()
+
+    def __enter__(self: ClientT) -> ClientT:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the connections used by the sync methods."""
+        loop_client, self._loop_client = self._loop_client, None
+        loop, self._loop_client_loop = self._loop_client_loop, None
+        if loop_client is None or loop is None or loop.is_closed():
+            return
+        background_loop = get_background_loop()
+        if loop is background_loop.loop and not background_loop.in_loop_thread():
+            background_loop.run(loop_client.aclose())
+
+    def _run_sync(self, coro: Coroutine[Any, Any, T]) -> T:  # noqa: UP047
+        """Run an async method on the background loop and wait for it.
+
+        Ctrl-C arrives in the calling thread, not on the loop; the method is
+        then cancelled by `BackgroundLoop.run` and the interrupt re-raised.
+        """
+        name = getattr(coro, "__qualname__", type(self).__name__)
+        try:
+            if self._in_flight is None:
+                return get_background_loop().run(coro)
+            with self._in_flight:
+                return get_background_loop().run(coro)
+        except KeyboardInterrupt:
+            logger.info("[Cancelled] %s was cancelled by user.", name)
+            raise
+
+    def _get_loop_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._loop_client is None or self._loop_client_loop is not loop:
+            self._loop_client = self._new_async_client()
+            self._loop_client_loop = loop
+        return self._loop_client
+
+    @asynccontextmanager
+    async def _batch_session(self) -> AsyncGenerator[None, None]:
+        """Share one connection pool for a batch, reusing an open session."""
+        if self._session_client is not None or get_background_loop().in_loop_thread():
+            yield
+            return
+        async with self:
+            yield
+
+    @asynccontextmanager
+    async def async_client(self) -> AsyncGenerator[httpx.AsyncClient, None]:
+        """Async context manager for async client.
+
+        Reuses the session client when called inside `async with app:` and
+        the shared client of the sync methods on the background loop.
+        """
+        if get_background_loop().in_loop_thread():
+            yield self._get_loop_client()
+            return
+        if self._session_client is not None:
+            yield self._session_client
+            return
+        async_client = self._new_async_client()
         try:
             yield async_client
         finally:
             await async_client.aclose()
 
+    def _encode_body(
+        self, body: dict[str, Any] | RawJson | None
+    ) -> tuple[bytes | None, dict[str, str]]:
+        """Serialize a JSON body, compressing it when it is large enough."""
+        if body is None:
+            return None, {}
+        content = body.value if isinstance(body, RawJson) else encode_json_body(body)
+        raw_size = len(content)
+        headers: dict[str, str] = {}
+        if self.request_compression and raw_size >= self.compression_threshold:
+            content = compress(content, self.request_compression)
+            headers["Content-Encoding"] = self.request_compression
+        self.compression_stats.record_request(raw_size, len(content))
+        return content, headers
+
+    def _submission_body(
+        self, body: dict[str, Any] | RawJson
+    ) -> dict[str, Any] | RawJson:
+        """Add the `callback_url` of the notifier, if it has one, to a new run."""
+        callback_url: str | None = getattr(self.notifier, "callback_url", None)
+        if callback_url is None:
+            return body
+        if isinstance(body, RawJson):
+            field = b'"callback_url":' + dumps_json(callback_url)
+            separator = b"," if body.value != b"{}" else b""
+            return RawJson(body.value[:-1] + separator + field + b"}")
+        return {**body, "callback_url": callback_url}
+
+    @contextmanager
+    def _request_headers(
+        self, params: dict[str, Any] | None, headers: dict[str, str]
+    ) -> Iterator[dict[str, str]]:
+        """Add the API key for one request when a key pool is configured."""
+        if self.key_pool is None:
+            yield headers
+            return
+        run_id = params.get("run_id") if params else None
+        with self.key_pool.lease(run_id) as key:
+            yield {**headers, "x-api-key": key}
+
+    def _record_response(
+        self,
+        method: str,
+        headers: dict[str, str],
+        response: httpx.Response,
+    ) -> None:
+        self.compression_stats.record_response(response)
+        if self.key_pool is None:
+            return
+        key = headers["x-api-key"]
+        self.key_pool.record_response(key, response)
+        if method == "POST" and response.status_code == 200:
+            try:
+                run_id = response.json().get("run_id")
+            except ValueError:
+                return
+            if isinstance(run_id, str) and run_id:
+                self.key_pool.pin_run(run_id, key)
+
+    async def _wait_for_run(
+        self,
+        client: httpx.AsyncClient,
+        data_path: str,
+        run_id: str,
+        *,
+        poll_interval: float,
+        max_attempts: int,
+    ) -> dict[str, Any] | None:
+        """Wait for a run with the notifier, logging with its `run_id`.
+
+        The run's key pin is released once the wait is over, whether the run
+        finished, timed out or the wait was cancelled.
+        """
+        try:
+            with log_context(run_id=run_id):
+                return await self.notifier.wait(
+                    self,
+                    client,
+                    data_path,
+                    run_id,
+                    poll_interval=poll_interval,
+                    max_attempts=max_attempts,
+                )
+        finally:
+            if self.key_pool is not None:
+                self.key_pool.release_run(run_id)
+
+    def _request_timeout(
+        self, timeout: float | httpx.Timeout | None, operation: Operation | None
+    ) -> float | httpx.Timeout:
+        if timeout is not None:
+            return timeout
+        return self.timeouts.for_operation(operation)
+
+    def _attempts(
+        self, method: str, retries: int | None, retry_policy: RetryPolicy | None
+    ) -> _Attempts:
+        policy = retry_policy or self.http_retry_policy
+        max_attempts = policy.max_attempts if retries is None else retries
+        return _Attempts(policy, method, max_attempts)
+
     async def call_api_async(
         self,
         client: httpx.AsyncClient,
         url: str,
         method: Literal["GET", "POST"],
-        body: dict[str, Any] | None = None,
+        body: dict[str, Any] | RawJson | None = None,
         params: dict[str, Any] | None = None,
-        retries: int = DEFAULT_RETRIES,
+        retries: int | None = None,
+        timeout: float | httpx.Timeout | None = None,
+        retry_policy: RetryPolicy | None = None,
+        operation: Operation | None = None,
     ) -> httpx.Response:
+        """Send a request, retrying per `retry_policy` (the client's by default).
+
+        `retries` overrides the policy's `max_attempts`. The request uses the
+        timeouts of `operation` unless `timeout` is given.
+        """
+        content, body_headers = self._encode_body(body)
+        request_timeout = self._request_timeout(timeout, operation)
+        attempts = self._attempts(method, retries, retry_policy)
         try:
-            async for attempt in AsyncRetrying(
-                stop=stop_after_attempt(retries),
-                wait=wait_exponential(multiplier=1, min=1, max=8),
-                retry=retry_if_exception(_is_retryable_exception),
-                reraise=True,
-                before_sleep=_before_sleep_warn,
-            ):
-                with attempt:
+            async for attempt in AsyncRetrying(**attempts.kwargs()):
+                with attempt, self._request_headers(params, body_headers) as headers:
                     response = await client.request(
-                        method, url, json=body, params=params
+                        method,
+                        url,
+                        content=content,
+                        params=params,
+                        headers=headers,
+                        timeout=request_timeout,
                     )
+                    self._record_response(method, headers, response)
                     response.raise_for_status()
                     return response
         except RetryError as retry_error:
             exc = retry_error.last_attempt.exception()
-            logger.error(f"Failed calling API after {retries} attempts {url}: {exc}")
+            _log_failure(url, attempts.count, exc, operation)
             raise Exception(str(exc)) from None
         except Exception as exc:
-            logger.exception(
-                f"Failed calling API after {retries} attempts {url}: {exc}"
-            )
+            _log_failure(url, attempts.count, exc, operation)
             raise exc
 
         raise RuntimeError("Unreachable state in call_api_async")
@@ -135,30 +517,36 @@ class OxyStudioAIClient:
         client: httpx.Client,
         url: str,
         method: Literal["GET", "POST"],
-        body: dict[str, Any] | None = None,
+        body: dict[str, Any] | RawJson | None = None,
         params: dict[str, Any] | None = None,
-        retries: int = DEFAULT_RETRIES,
+        retries: int | None = None,
+        retry_policy: RetryPolicy | None = None,
+        timeout: float | httpx.Timeout | None = None,
+        operation: Operation | None = None,
     ) -> httpx.Response:
+        content, body_headers = self._encode_body(body)
+        request_timeout = self._request_timeout(timeout, operation)
+        attempts = self._attempts(method, retries, retry_policy)
         try:
-            for attempt in Retrying(
-                stop=stop_after_attempt(retries),
-                wait=wait_exponential(multiplier=1, min=1, max=8),
-                retry=retry_if_exception(_is_retryable_exception),
-                reraise=True,
-                before_sleep=_before_sleep_warn,
-            ):
-                with attempt:
-                    response = client.request(method, url, json=body, params=params)
+            for attempt in Retrying(**attempts.kwargs()):
+                with attempt, self._request_headers(params, body_headers) as headers:
+                    response = client.request(
+                        method,
+                        url,
+                        content=content,
+                        params=params,
+                        headers=headers,
+                        timeout=request_timeout,
+                    )
+                    self._record_response(method, headers, response)
                     response.raise_for_status()
                     return response
         except RetryError as retry_error:
             exc = retry_error.last_attempt.exception()
-            logger.error(f"Failed calling API after {retries} attempts {url}: {exc}")
+            _log_failure(url, attempts.count, exc, operation)
             raise Exception(str(exc)) from None
         except Exception as exc:
-            logger.exception(
-                f"Failed calling API after {retries} attempts {url}: {exc}"
-            )
+            _log_failure(url, attempts.count, exc, operation)
             raise exc
 
         raise RuntimeError("Unreachable state in call_api")
@@ -0,0 +1,283 @@
+"""Ways of finding out that a run finished.
+
+The apps create a run and then wait for its `run/data` endpoint to report
+`completed` or `failed`. How they wait is pluggable through the `notifier`
+argument of every app:
+
+- `PollingNotifier` (the default) asks every `POLL_INTERVAL_SECONDS`, so a
+  result is seen up to a whole interval late.
+- `LongPollNotifier` asks with a `wait` parameter and the server holds the
+  request until the run finishes or the wait is over.
+- `SseNotifier` subscribes to the server-sent event stream of the run at
+  `run/events` and returns as soon as the final event arrives.
+
+Long-poll and SSE fall back to polling when the backend does not offer them,
+so they are safe to enable against any deployment. Polls are sent without
+HTTP retries: a failed poll is simply followed by the next one.
+
+    scraper = AiScraper(api_key="...", notifier=SseNotifier())
+"""
+
+import asyncio
+import json
+import time
+from typing import TYPE_CHECKING, Any, Protocol
+
+import httpx
+
+from oxylabs_ai_studio.logger import SAMPLED, get_logger
+from oxylabs_ai_studio.retry import NO_RETRY_POLICY
+from oxylabs_ai_studio.timeouts import Operation
+
+if TYPE_CHECKING:
+    from oxylabs_ai_studio.client import OxyStudioAIClient
+
+logger = get_logger(__name__)
+
+TERMINAL_STATUSES = frozenset({"completed", "failed"})
+DEFAULT_LONG_POLL_SECONDS = 20.0
+# Responses meaning the backend has no such endpoint or feature.
+_UNSUPPORTED_STATUSES = frozenset({404, 405, 406, 501})
+
+
+class CompletionNotifier(Protocol):
+    """Waits for a run to finish."""
+
+    async def wait(
+        self,
+        app: "OxyStudioAIClient",
+        client: httpx.AsyncClient,
+        data_path: str,
+        run_id: str,
+        *,
+        poll_interval: float,
+        max_attempts: int,
+    ) -> dict[str, Any] | None:
+        """Return the final `run/data` body, or None after the timeout.
+
+        The timeout is `max_attempts` poll intervals, as for polling.
+        """
+        ...
+
+
+def _final_body(response: httpx.Response) -> dict[str, Any] | None:
+    if response.status_code != 200:
+        return None
+    body: dict[str, Any] = response.json()
+    return body if body.get("status") in TERMINAL_STATUSES else None
+
+
+async def fetch_final_body(
+    app: "OxyStudioAIClient",
+    client: httpx.AsyncClient,
+    data_path: str,
+    run_id: str,
+    operation: Operation = "poll",
+) -> dict[str, Any] | None:
+    """Ask `run/data` once; the body if the run finished, else None."""
+    try:
+        response = await app.call_api_async(
+            client=client,
+            url=data_path,
+            method="GET",
+            params={"run_id": run_id},
+            retry_policy=NO_RETRY_POLICY,
+            operation=operation,
+        )
+    except Exception:
+        return None
+    body = _final_body(response)
+    if body is None:
+        logger.debug("Run %s is still running.", run_id, extra=SAMPLED)
+    return body
+
+
+class PollingNotifier:
+    """Asks the `run/data` endpoint every `poll_interval` seconds."""
+
+    async def wait(
+        self,
+        app: "OxyStudioAIClient",
+        client: httpx.AsyncClient,
+        data_path: str,
+        run_id: str,
+        *,
+        poll_interval: float,
+        max_attempts: int,
+    ) -> dict[str, Any] | None:
+        for _ in range(max_attempts):
+            body = await fetch_final_body(app, client, data_path, run_id)
+            if body is not None:
+                return body
+            await asyncio.sleep(poll_interval)
+        return None
+
+
+class LongPollNotifier:
+    """Asks `run/data` with `wait`, so the server answers on completion.
+
+    A backend that ignores `wait` answers right away; the notifier then
+    sleeps `poll_interval` between requests like `PollingNotifier`.
+
+    Args:
+        wait_seconds: Longest time the server is asked to hold a request.
+    """
+
+    def __init__(self, wait_seconds: float = DEFAULT_LONG_POLL_SECONDS):
+        if wait_seconds <= 0:
+            raise ValueError("wait_seconds must be positive")
+        self.wait_seconds = wait_seconds
+
+    async def wait(
+        self,
+        app: "OxyStudioAIClient",
+        client: httpx.AsyncClient,
+        data_path: str,
+        run_id: str,
+        *,
+        poll_interval: float,
+        max_attempts: int,
+    ) -> dict[str, Any] | None:
+        deadline = time.monotonic() + poll_interval * max_attempts
+        while (remaining := deadline - time.monotonic()) > 0:
+            wait = min(self.wait_seconds, remaining)
+            started = time.monotonic()
+            try:
+                response = await app.call_api_async(
+                    client=client,
+                    url=data_path,
+                    method="GET",
+                    params={"run_id": run_id, "wait": round(wait, 3)},
+                    timeout=app.timeouts.for_operation("poll", extra_read=wait),
+                    retry_policy=NO_RETRY_POLICY,
+                    operation="poll",
+                )
+            except Exception:
+                await asyncio.sleep(poll_interval)
+                continue
+            body = _final_body(response)
+            if body is not None:
+                return body
+            if time.monotonic() - started < wait / 2:
+                await asyncio.sleep(poll_interval)
+        return None
+
+
+class _UnsupportedError(Exception):
+    pass
+
+
+class SseNotifier:
+    """Listens to the server-sent events of a run at `run/events`.
+
+    Every event carries a `run/data` body as JSON; the stream is reopened
+    after `poll_interval` if it ends before a final one. A response showing
+    the backend has no event streams switches this notifier to `fallback`
+    for good, but only before any stream has worked; afterwards, e.g. for a
+    404 of an unknown or expired run, only that run falls back.
+
+    Args:
+        fallback: Used when event streams are not supported; polling by
+            default.
+    """
+
+    def __init__(self, fallback: CompletionNotifier | None = None):
+        self.fallback: CompletionNotifier = fallback or PollingNotifier()
+        self.supported: bool | None = None
+
+    async def wait(
+        self,
+        app: "OxyStudioAIClient",
+        client: httpx.AsyncClient,
+        data_path: str,
+        run_id: str,
+        *,
+        poll_interval: float,
+        max_attempts: int,
+    ) -> dict[str, Any] | None:
+        deadline = time.monotonic() + poll_interval * max_attempts
+        events_path = data_path.removesuffix("/data") + "/events"
+        while self.supported is not False:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                body = await asyncio.wait_for(
+                    self._listen(app, client, events_path, run_id), remaining
+                )
+            except _UnsupportedError as exc:
+                if self.supported is None:
+                    logger.info(
+                        "No event stream at %s, falling back to polling.",
+                        events_path,
+                    )
+                    self.supported = False
+                else:
+                    logger.debug(
+                        "No event stream for run %s (%s), polling it instead.",
+                        run_id,
+                        exc,
+                    )
+                break
+            except asyncio.TimeoutError:  # noqa: UP041 (builtin only on 3.11+)
+                return None
+            except (httpx.HTTPError, ValueError) as exc:
+                logger.debug("Event stream of run %s failed: %s", run_id, exc)
+                body = None
+            if body is not None:
+                return body
+            await asyncio.sleep(min(poll_interval, max(0.0, remaining)))
+        remaining = deadline - time.monotonic()
+        return await self.fallback.wait(
+            app,
+            client,
+            data_path,
+            run_id,
+            poll_interval=poll_interval,
+            max_attempts=max(1, int(remaining / poll_interval)),
+        )
+
+    async def _listen(
+        self,
+        app: "OxyStudioAIClient",
+        client: httpx.AsyncClient,
+        events_path: str,
+        run_id: str,
+    ) -> dict[str, Any] | None:
+        params = {"run_id": run_id}
+        # Events may be minutes apart, so only the read phase is unbounded.
+        poll_timeouts = app.timeouts.phases("poll").model_copy(update={"read": None})
+        with app._request_headers(params, {"Accept": "text/event-stream"}) as headers:
+            async with client.stream(
+                "GET",
+                events_path,
+                params=params,
+                headers=headers,
+                timeout=poll_timeouts.to_httpx(),
+            ) as response:
+                content_type = response.headers.get("Content-Type", "")
+                if response.status_code in _UNSUPPORTED_STATUSES or (
+                    response.status_code == 200
+                    and not content_type.startswith("text/event-stream")
+                ):
+                    raise _UnsupportedError(
+                        f"HTTP {response.status_code} {content_type}".rstrip()
+                    )
+                response.raise_for_status()
+                self.supported = True
+                data: list[str] = []
+                async for line in response.aiter_lines():
+                    if line.startswith(":"):
+                        continue
+                    if line:
+                        field, _, value = line.partition(":")
+                        if field == "data":
+                            data.append(value.removeprefix(" "))
+                        continue
+                    if not data:
+                        continue
+                    body: dict[str, Any] = json.loads("\n".join(data))
+                    data = []
+                    if body.get("status") in TERMINAL_STATUSES:
+                        return body
+        return None
@@ -0,0 +1,111 @@
+import gzip
+import importlib.util
+import threading
+from typing import Any, Literal
+
+import httpx
+
+RequestCompression = Literal["gzip", "zstd"]
+
+DEFAULT_COMPRESSION_THRESHOLD = 8 * 1024
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def _module_available(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+def accept_encoding() -> str:
+    """Build an `Accept-Encoding` value from the decoders httpx can use.
+
+    httpx decodes brotli when `brotli`/`brotlicffi` is installed and zstd when
+    `zstandard` is installed; gzip and deflate are always available.
+    """
+    encodings = []
+    if _module_available("zstandard"):
+        encodings.append("zstd")
+    if _module_available("brotli") or _module_available("brotlicffi"):
+        encodings.append("br")
+    encodings.extend(["gzip", "deflate"])
+    return ", ".join(encodings)
+
+
+def check_request_compression(encoding: RequestCompression | None) -> None:
+    if encoding == "zstd" and not _module_available("zstandard"):
+        raise ValueError(
+            "zstd request compression requires the `zstandard` package: "
+            "pip install zstandard"
+        )
+    if encoding not in (None, "gzip", "zstd"):
+        raise ValueError(f"Unsupported request compression: {encoding}")
+
+
+def compress(data: bytes, encoding: RequestCompression) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    import zstandard
+
+    compressed: bytes = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return compressed
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    """Decode a body sent with the `Content-Encoding` `encoding`."""
+    encoding = encoding.strip().lower()
+    if encoding in ("", "identity"):
+        return data
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "zstd":
+        import zstandard
+
+        # Frames written without their size can't be decoded in one call.
+        decompressed: bytes = (
+            zstandard.ZstdDecompressor().decompressobj().decompress(data)
+        )
+        return decompressed
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+class CompressionStats:
+    """Byte counters for request and response compression."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests_compressed = 0
+        self.request_bytes_raw = 0
+        self.request_bytes_sent = 0
+        self.response_bytes_received = 0
+        self.response_bytes_decoded = 0
+
+    @property
+    def request_bytes_saved(self) -> int:
+        return self.request_bytes_raw - self.request_bytes_sent
+
+    @property
+    def response_bytes_saved(self) -> int:
+        return self.response_bytes_decoded - self.response_bytes_received
+
+    def record_request(self, raw: int, sent: int) -> None:
+        with self._lock:
+            self.request_bytes_raw += raw
+            self.request_bytes_sent += sent
+            if sent != raw:
+                self.requests_compressed += 1
+
+    def record_response(self, response: httpx.Response) -> None:
+        with self._lock:
+            self.response_bytes_received += response.num_bytes_downloaded
+            self.response_bytes_decoded += len(response.content)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requests_compressed": self.requests_compressed,
+            "request_bytes_raw": self.request_bytes_raw,
+            "request_bytes_sent": self.request_bytes_sent,
+            "request_bytes_saved": self.request_bytes_saved,
+            "response_bytes_received": self.response_bytes_received,
+            "response_bytes_decoded": self.response_bytes_decoded,
+            "response_bytes_saved": self.response_bytes_saved,
+        }
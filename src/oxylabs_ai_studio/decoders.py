@@ -0,0 +1,296 @@
+"""Typed row decoding for `csv` and `toon` output formats.
+
+`AiScraper.scrape` and `AiCrawler.crawl` return tabular extractions as raw CSV
+or TOON strings. `RowDecoder` turns them into typed rows using the same
+`openapi_schema` that was sent with the request, as a dict or a pydantic model
+class; local `$ref`s, e.g. to the `$defs` of nested models, are resolved.
+Column converters are built once per schema, rows are produced lazily as
+tuples in schema column order, and `to_columns` builds one list per column
+without a dict per row.
+"""
+
+import csv
+import io
+import json
+import re
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from typing import Any, Literal
+
+from oxylabs_ai_studio.schema import SchemaArg, resolve_schema
+
+TabularFormat = Literal["csv", "toon"]
+
+Converter = Callable[[str], Any]
+
+_TOON_HEADER = re.compile(
+    r"^(?P<indent>\s*)(?P<key>[^\s\[:]*)\[#?(?P<length>\d+)(?P<delimiter>[\t|]?)\]"
+    r"\{(?P<fields>[^}]*)\}:\s*$"
+)
+_TOON_ESCAPES = {"\\": "\\", '"': '"', "n": "\n", "r": "\r", "t": "\t"}
+
+
+def _to_bool(value: str) -> bool:
+    normalized = value.strip().lower()
+    if normalized in ("true", "1", "yes"):
+        return True
+    if normalized in ("false", "0", "no"):
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def _to_int(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        number = float(value)
+        if not number.is_integer():
+            raise
+        return int(number)
+
+
+def _to_json(value: str) -> Any:
+    stripped = value.strip()
+    if stripped[:1] in ("[", "{"):
+        return json.loads(stripped)
+    return value
+
+
+_CONVERTERS: dict[str, Converter] = {
+    "integer": _to_int,
+    "number": float,
+    "boolean": _to_bool,
+    "string": str,
+    "array": _to_json,
+    "object": _to_json,
+}
+
+
+def _resolve(node: Any, root: dict[str, Any]) -> Any:
+    """Follow the local `$ref`s (`#/$defs/...`) of `node` within `root`."""
+    seen: set[str] = set()
+    while isinstance(node, dict) and isinstance(node.get("$ref"), str):
+        ref = node["$ref"]
+        if not ref.startswith("#/") or ref in seen:
+            break
+        seen.add(ref)
+        target: Any = root
+        for part in ref[2:].split("/"):
+            part = part.replace("~1", "/").replace("~0", "~")
+            if not isinstance(target, dict) or part not in target:
+                return node
+            target = target[part]
+        node = target
+    return node
+
+
+def _schema_type(schema: Any, root: dict[str, Any]) -> str | None:
+    schema = _resolve(schema, root)
+    if not isinstance(schema, dict):
+        return None
+    schema_type = schema.get("type")
+    if isinstance(schema_type, list):
+        non_null = [item for item in schema_type if item != "null"]
+        return non_null[0] if non_null else None
+    if schema_type is None:
+        for option in schema.get("anyOf") or schema.get("oneOf") or []:
+            option_type = _schema_type(option, root)
+            if option_type not in (None, "null"):
+                return option_type
+        if "properties" in schema:
+            return "object"
+    return schema_type if isinstance(schema_type, str) else None
+
+
+def row_schema(schema: dict[str, Any]) -> tuple[str | None, dict[str, Any]]:
+    """Return `(array property name, row object schema)` for a request schema.
+
+    A schema whose only property is an array of objects describes a table of
+    those objects; any other object schema describes a single row.
+    """
+    properties = schema.get("properties") or {}
+    if len(properties) == 1:
+        ((name, prop),) = properties.items()
+        prop = _resolve(prop, schema)
+        items = _resolve(prop.get("items"), schema) if isinstance(prop, dict) else None
+        if _schema_type(prop, schema) == "array" and isinstance(items, dict):
+            if _schema_type(items, schema) == "object":
+                return name, items
+    return None, schema
+
+
+def _split_toon_row(line: str, delimiter: str) -> list[str | None]:
+    if '"' not in line:
+        return [
+            None if value == "null" else value
+            for value in (part.strip() for part in line.split(delimiter))
+        ]
+    values: list[str | None] = []
+    index, length = 0, len(line)
+    while index <= length:
+        while index < length and line[index] == " ":
+            index += 1
+        if index < length and line[index] == '"':
+            chars: list[str] = []
+            index += 1
+            while index < length and line[index] != '"':
+                if line[index] == "\\" and index + 1 < length:
+                    index += 1
+                    chars.append(_TOON_ESCAPES.get(line[index], line[index]))
+                else:
+                    chars.append(line[index])
+                index += 1
+            values.append("".join(chars))
+            end = line.find(delimiter, index + 1)
+        else:
+            end = line.find(delimiter, index)
+            value = line[index : end if end != -1 else length].strip()
+            values.append(None if value == "null" else value)
+        if end == -1:
+            break
+        index = end + len(delimiter)
+    return values
+
+
+class RowDecoder:
+    """Decodes CSV or TOON payloads into typed rows.
+
+    Args:
+        schema: The `openapi_schema` used for the request, or the pydantic
+            model it was generated from.
+        strict: Raise `ValueError` on values that don't match the column type.
+            When False such values are kept as the original string.
+    """
+
+    def __init__(self, schema: SchemaArg, strict: bool = True):
+        root = resolve_schema(schema)
+        self.table_name, table_schema = row_schema(root)
+        properties: dict[str, Any] = table_schema.get("properties") or {}
+        self.columns: tuple[str, ...] = tuple(properties)
+        self.strict = strict
+        self._converters: tuple[Converter, ...] = tuple(
+            _CONVERTERS.get(_schema_type(prop, root) or "string", str)
+            for prop in properties.values()
+        )
+
+    def iter_rows(
+        self, payload: str | Iterable[str], output_format: TabularFormat
+    ) -> Iterator[tuple[Any, ...]]:
+        """Yield one tuple per row, values ordered like `columns`.
+
+        `payload` is the `data` of a scrape job or the list of page payloads of
+        a crawl job. Columns that are not in the schema are dropped, missing
+        ones are None.
+        """
+        payloads = [payload] if isinstance(payload, str) else payload
+        parse = self._iter_csv if output_format == "csv" else self._iter_toon
+        for text in payloads:
+            if text:
+                yield from parse(text)
+
+    def iter_dicts(
+        self, payload: str | Iterable[str], output_format: TabularFormat
+    ) -> Iterator[dict[str, Any]]:
+        columns = self.columns
+        for row in self.iter_rows(payload, output_format):
+            yield dict(zip(columns, row, strict=True))
+
+    def to_columns(
+        self, payload: str | Iterable[str], output_format: TabularFormat
+    ) -> dict[str, list[Any]]:
+        """Decode all rows into one list per column."""
+        columns: list[list[Any]] = [[] for _ in self.columns]
+        appends = [column.append for column in columns]
+        for row in self.iter_rows(payload, output_format):
+            for append, value in zip(appends, row, strict=True):
+                append(value)
+        return dict(zip(self.columns, columns, strict=True))
+
+    def _plan(self, header: list[str]) -> list[tuple[int, int, Converter]]:
+        """Map payload header positions to (column index, converter)."""
+        positions = {name.strip(): index for index, name in enumerate(header)}
+        return [
+            (column_index, positions[name], self._converters[column_index])
+            for column_index, name in enumerate(self.columns)
+            if name in positions
+        ]
+
+    def _convert(
+        self,
+        values: Sequence[str | None],
+        plan: list[tuple[int, int, Converter]],
+    ) -> tuple[Any, ...]:
+        row: list[Any] = [None] * len(self.columns)
+        size = len(values)
+        for column_index, position, convert in plan:
+            if position >= size:
+                continue
+            value = values[position]
+            if value is None or value == "":
+                continue
+            try:
+                row[column_index] = convert(value)
+            except ValueError:
+                if self.strict:
+                    raise ValueError(
+                        f"Invalid value {value!r} for column "
+                        f"{self.columns[column_index]!r}"
+                    ) from None
+                row[column_index] = value
+        return tuple(row)
+
+    def _iter_csv(self, text: str) -> Iterator[tuple[Any, ...]]:
+        reader = csv.reader(io.StringIO(text))
+        header = next(reader, None)
+        if header is None:
+            return
+        plan = self._plan(header)
+        for values in reader:
+            if values:
+                yield self._convert(values, plan)
+
+    def _iter_toon(self, text: str) -> Iterator[tuple[Any, ...]]:
+        lines = text.splitlines()
+        start = self._find_toon_table(lines)
+        if start is None:
+            return
+        match = _TOON_HEADER.match(lines[start])
+        if match is None:
+            return
+        delimiter = match["delimiter"] or ","
+        fields = [
+            field.strip().strip('"') for field in match["fields"].split(delimiter)
+        ]
+        plan = self._plan(fields)
+        indent = len(match["indent"])
+        remaining = int(match["length"])
+        for line in lines[start + 1 :]:
+            if remaining == 0:
+                break
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if len(line) - len(line.lstrip()) <= indent:
+                break
+            yield self._convert(_split_toon_row(stripped, delimiter), plan)
+            remaining -= 1
+
+    def _find_toon_table(self, lines: list[str]) -> int | None:
+        first: int | None = None
+        for index, line in enumerate(lines):
+            match = _TOON_HEADER.match(line)
+            if match is None:
+                continue
+            if self.table_name is None or match["key"] == self.table_name:
+                return index
+            if first is None:
+                first = index
+        return first
+
+
+def decode_rows(
+    payload: str | Iterable[str],
+    schema: SchemaArg,
+    output_format: TabularFormat,
+) -> Iterator[tuple[Any, ...]]:
+    """Shortcut for `RowDecoder(schema).iter_rows(payload, output_format)`."""
+    return RowDecoder(schema).iter_rows(payload, output_format)
@@ -0,0 +1,93 @@
+"""Background event loop driving the sync API.
+
+The sync app methods (`scrape`, `crawl`, ...) submit their async counterparts
+to one event loop running in a daemon thread and block on the result. All
+connections and polling live on that loop, so many threads calling the sync
+API share a handful of sockets instead of each holding a client and sleeping
+in its own poll loop.
+"""
+
+import asyncio
+import os
+import threading
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """An asyncio event loop running forever in a daemon thread."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running loop, started on first use."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = self._start()
+            return self._loop
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run() -> None:
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        self._thread = threading.Thread(
+            target=run, name="oxylabs-ai-studio-loop", daemon=True
+        )
+        self._thread.start()
+        ready.wait()
+        return loop
+
+    def in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:  # noqa: UP047
+        """Run `coro` on the background loop and block until it finishes.
+
+        A `KeyboardInterrupt` (or any other exception) raised while waiting
+        cancels the coroutine before it is re-raised.
+        """
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError(
+                "Sync methods can't be called from the background event loop; "
+                "await the async version instead."
+            )
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def _reset(self) -> None:
+        # The loop thread does not survive a fork; the child starts its own.
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+
+_background_loop = BackgroundLoop()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_background_loop._reset)
+
+
+def get_background_loop() -> BackgroundLoop:
+    """Return the process-wide background loop."""
+    return _background_loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:  # noqa: UP047
+    """Shortcut for `get_background_loop().run(coro)`."""
+    return _background_loop.run(coro)
@@ -0,0 +1,342 @@
+"""Persistent URL frontier for incremental site discovery with `AiMap`.
+
+`UrlFrontier` stores every URL discovered by `AiMap.map` in a local SQLite
+database, deduplicated by canonical URL, with the URL as first discovered,
+the seed it was found from, its depth and first/last seen timestamps.
+`MapExplorer` issues follow-up maps seeded from URLs that were not used as
+seeds yet, spreading them over site regions (host and first path segment)
+that were explored least, so each map of a large site discovers new URLs
+instead of repeating earlier ones.
+
+    explorer = MapExplorer(AiMap(api_key="..."), "frontier.db")
+    explorer.explore(seeds=["https://example.com"], rounds=3)
+    print(len(explorer.frontier), explorer.frontier.stats())
+"""
+
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel
+
+from oxylabs_ai_studio.apps.ai_map import AiMap, AiMapJob
+from oxylabs_ai_studio.batch import DEFAULT_MAX_CONCURRENCY, run_batch
+from oxylabs_ai_studio.logger import get_logger
+from oxylabs_ai_studio.urls import DEFAULT_CANONICALIZER, UrlCanonicalizer
+
+logger = get_logger(__name__)
+
+DEFAULT_SEEDS_PER_ROUND = 10
+
+
+def url_region(url: str) -> str:
+    """Host and first path segment of a canonical URL."""
+    parts = urlsplit(url)
+    segment = parts.path.strip("/").split("/", 1)[0]
+    return f"{parts.netloc}/{segment}"
+
+
+def map_urls(data: dict[str, Any] | list[str] | None) -> list[str]:
+    """URLs of the `data` of a map job."""
+    if isinstance(data, dict):
+        data = data.get("urls") or []
+    return [url for url in data or [] if isinstance(url, str) and url]
+
+
+class FrontierEntry(BaseModel):
+    """A frontier URL: `url` is canonical, `original_url` as first discovered."""
+
+    url: str
+    original_url: str
+    seed: str | None
+    depth: int
+    first_seen: float
+    last_seen: float
+    times_seen: int
+    explored_at: float | None
+
+
+class UrlFrontier:
+    """SQLite store of discovered URLs.
+
+    Args:
+        path: Database file, or ":memory:".
+        canonicalizer: Rules applied to every URL; keep them the same for
+            the life of the database.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = ":memory:",
+        canonicalizer: UrlCanonicalizer = DEFAULT_CANONICALIZER,
+    ):
+        self.canonicalizer = canonicalizer
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS urls (
+                    url TEXT PRIMARY KEY,
+                    original_url TEXT,
+                    region TEXT NOT NULL,
+                    seed TEXT,
+                    depth INTEGER NOT NULL,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    times_seen INTEGER NOT NULL DEFAULT 1,
+                    explored_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS urls_unexplored
+                    ON urls (explored_at, depth, first_seen);
+                CREATE TABLE IF NOT EXISTS regions (
+                    region TEXT PRIMARY KEY,
+                    explored INTEGER NOT NULL DEFAULT 0
+                );
+                """
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(urls)")}
+            if "original_url" not in columns:
+                # Databases created before original URLs were stored.
+                self._db.execute("ALTER TABLE urls ADD COLUMN original_url TEXT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def merge(
+        self,
+        urls: Iterable[str],
+        seed: str | None = None,
+        depth: int = 0,
+        now: float | None = None,
+    ) -> int:
+        """Add or refresh URLs; returns how many were not known yet.
+
+        URLs are deduplicated by their canonical form. Known URLs keep their
+        original spelling, seed and depth, only their last seen time and
+        counter change.
+        """
+        now = time.time() if now is None else now
+        rows: dict[str, tuple[str, str, str]] = {}
+        for url in urls:
+            canonical = self.canonicalizer.canonicalize(url)
+            if canonical not in rows:
+                rows[canonical] = (canonical, url.strip(), url_region(canonical))
+        with self._lock, self._db:
+            before = self._count()
+            self._db.executemany(
+                "INSERT INTO urls"
+                " (url, original_url, region, seed, depth, first_seen, last_seen)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET"
+                " last_seen = excluded.last_seen, times_seen = times_seen + 1",
+                (
+                    (url, original, region, seed, depth, now, now)
+                    for url, original, region in rows.values()
+                ),
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO regions (region) VALUES (?)",
+                {(region,) for _, _, region in rows.values()},
+            )
+            return self._count() - before
+
+    def _count(self) -> int:
+        return int(self._db.execute("SELECT COUNT(*) FROM urls").fetchone()[0])
+
+    def mark_explored(self, url: str, now: float | None = None) -> None:
+        """Record that `url` was used as a map seed."""
+        canonical = self.canonicalizer.canonicalize(url)
+        now = time.time() if now is None else now
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "UPDATE urls SET explored_at = ? WHERE url = ? AND explored_at IS NULL",
+                (now, canonical),
+            )
+            if cursor.rowcount:
+                self._db.execute(
+                    "UPDATE regions SET explored = explored + 1 WHERE region = ?",
+                    (url_region(canonical),),
+                )
+
+    def get(self, url: str) -> FrontierEntry | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM urls WHERE url = ?",
+                (self.canonicalizer.canonicalize(url),),
+            ).fetchone()
+        return _entry(row) if row is not None else None
+
+    def __contains__(self, url: object) -> bool:
+        return isinstance(url, str) and self.get(url) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
+
+    def __iter__(self) -> Iterator[FrontierEntry]:
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM urls ORDER BY rowid").fetchall()
+        return (_entry(row) for row in rows)
+
+    def next_seeds(
+        self, limit: int = DEFAULT_SEEDS_PER_ROUND, max_depth: int | None = None
+    ) -> list[FrontierEntry]:
+        """Unexplored URLs to seed the next maps with.
+
+        At most one URL per region is picked, from the least explored regions
+        first and the shallowest URLs within a region.
+        """
+        query = (
+            "SELECT urls.* FROM urls JOIN regions USING (region)"
+            " WHERE urls.explored_at IS NULL"
+        )
+        params: tuple[Any, ...] = ()
+        if max_depth is not None:
+            query += " AND urls.depth <= ?"
+            params = (max_depth,)
+        query += " ORDER BY regions.explored, urls.depth, urls.first_seen"
+        seeds: list[FrontierEntry] = []
+        regions: set[str] = set()
+        with self._lock:
+            for row in self._db.execute(query, params):
+                if row["region"] in regions:
+                    continue
+                regions.add(row["region"])
+                seeds.append(_entry(row))
+                if len(seeds) >= limit:
+                    break
+        return seeds
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COUNT(*), COUNT(explored_at), COALESCE(MAX(depth), 0) FROM urls"
+            ).fetchone()
+            regions = self._db.execute("SELECT COUNT(*) FROM regions").fetchone()[0]
+        return {
+            "urls": row[0],
+            "explored": row[1],
+            "unexplored": row[0] - row[1],
+            "regions": regions,
+            "max_depth": row[2],
+        }
+
+
+def _entry(row: sqlite3.Row) -> FrontierEntry:
+    return FrontierEntry(
+        url=row["url"],
+        original_url=row["original_url"] or row["url"],
+        seed=row["seed"],
+        depth=row["depth"],
+        first_seen=row["first_seen"],
+        last_seen=row["last_seen"],
+        times_seen=row["times_seen"],
+        explored_at=row["explored_at"],
+    )
+
+
+class ExploreReport(BaseModel):
+    seeds: list[str]
+    new_urls: int
+    errors: dict[str, str]
+
+
+class MapExplorer:
+    """Runs `AiMap` maps from frontier seeds and merges their results.
+
+    Args:
+        mapper: The map app used for every map.
+        frontier: A `UrlFrontier` or the path of its database.
+        map_options: Further `map` options for every map, e.g. `limit`,
+            `max_crawl_depth` or `search_keywords`, encoded once into a
+            `RequestTemplate`.
+    """
+
+    def __init__(
+        self,
+        mapper: AiMap,
+        frontier: UrlFrontier | str | Path = ":memory:",
+        **map_options: Any,
+    ):
+        self.mapper = mapper
+        self.frontier = (
+            frontier if isinstance(frontier, UrlFrontier) else UrlFrontier(frontier)
+        )
+        self.map_options = map_options
+        self._template = mapper.template(**map_options)
+
+    async def explore_async(
+        self,
+        seeds: Iterable[str] | None = None,
+        rounds: int = 1,
+        seeds_per_round: int = DEFAULT_SEEDS_PER_ROUND,
+        max_depth: int | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> ExploreReport:
+        """Run `rounds` rounds of maps.
+
+        Args:
+            seeds: URLs to add to the frontier before the first round.
+            rounds: Number of rounds; each maps up to `seeds_per_round`
+                seeds picked by `UrlFrontier.next_seeds`.
+            max_depth: Don't seed maps from URLs deeper than this.
+            max_concurrency: Maximum number of maps at the same time.
+        """
+        if seeds is not None:
+            self.frontier.merge(seeds)
+        used: list[str] = []
+        errors: dict[str, str] = {}
+        new_urls = 0
+        async with self.mapper._batch_session():
+            for _ in range(rounds):
+                entries = self.frontier.next_seeds(seeds_per_round, max_depth)
+                if not entries:
+                    break
+                async for result in run_batch(
+                    entries, self._map_entry, max_concurrency=max_concurrency
+                ):
+                    entry = result.input
+                    self.frontier.mark_explored(entry.url)
+                    used.append(entry.url)
+                    job = result.job
+                    if job is None or job.data is None:
+                        errors[entry.url] = (
+                            result.error or (job and job.message) or "failed"
+                        )
+                        continue
+                    new_urls += self.frontier.merge(
+                        map_urls(job.data), seed=entry.url, depth=entry.depth + 1
+                    )
+        logger.info("Explored %d seeds, discovered %d new urls.", len(used), new_urls)
+        return ExploreReport(seeds=used, new_urls=new_urls, errors=errors)
+
+    async def _map_entry(self, entry: FrontierEntry) -> AiMapJob:
+        # Mapped as discovered; the canonical spelling may not exist.
+        return await self.mapper.map_with_template_async(
+            entry.original_url, self._template
+        )
+
+    def explore(
+        self,
+        seeds: Iterable[str] | None = None,
+        rounds: int = 1,
+        seeds_per_round: int = DEFAULT_SEEDS_PER_ROUND,
+        max_depth: int | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> ExploreReport:
+        """Sync version of `explore_async`."""
+        return self.mapper._run_sync(
+            self.explore_async(
+                seeds,
+                rounds=rounds,
+                seeds_per_round=seeds_per_round,
+                max_depth=max_depth,
+                max_concurrency=max_concurrency,
+            )
+        )
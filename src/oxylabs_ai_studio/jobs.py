@@ -0,0 +1,215 @@
+"""Running jobs of different apps together.
+
+A `JobGroup` takes jobs of any app (`AiScraper`, `AiCrawler`, `AiMap`,
+`AiSearch`, `BrowserAgent`), runs at most `max_concurrency` of them at once
+over one shared connection pool and yields their results as they complete,
+so a pipeline mixing several apps doesn't have to juggle tasks itself. Jobs
+can be submitted while results are being consumed, e.g. a scrape for every
+URL a map found:
+
+    async with JobGroup(max_concurrency=20) as group:
+        group.submit(mapper.map_async, "https://example.com")
+        async for result in group.as_completed():
+            if isinstance(result.job, AiMapJob):
+                for url in result.job.data or []:
+                    group.submit(scraper.scrape_async, url)
+            print(group.progress)
+"""
+
+import asyncio
+import itertools
+from collections.abc import AsyncIterator, Awaitable, Callable
+from types import TracebackType
+from typing import Any
+
+import httpx
+from pydantic import BaseModel
+
+from oxylabs_ai_studio.batch import (
+    DEFAULT_MAX_CONCURRENCY,
+    NO_RETRIES,
+    BatchResult,
+    JobRetryPolicy,
+    run_with_retries,
+)
+from oxylabs_ai_studio.client import OxyStudioAIClient
+
+
+class JobSubmission(BaseModel):
+    """A job submitted to a `JobGroup`: `method(*args, **kwargs)` of `app`."""
+
+    id: int
+    app: str
+    method: str
+    args: tuple[Any, ...] = ()
+    kwargs: dict[str, Any] = {}
+
+
+GroupResult = BatchResult[JobSubmission, Any]
+
+
+class JobGroupProgress(BaseModel):
+    """Counts of the jobs of a `JobGroup`.
+
+    `done` jobs succeeded; `failed` ones raised or finished with a failed
+    status, after any retries.
+    """
+
+    submitted: int = 0
+    running: int = 0
+    done: int = 0
+    failed: int = 0
+
+    @property
+    def queued(self) -> int:
+        return self.submitted - self.running - self.done - self.failed
+
+    @property
+    def finished(self) -> int:
+        return self.done + self.failed
+
+
+def _job_failed(job: Any) -> bool:
+    return getattr(job, "data", job) is None
+
+
+class JobGroup:
+    """Runs jobs of any app with one concurrency limit and connection pool.
+
+    Use it as an async context manager. Leaving the block waits for the jobs
+    still running, or cancels them when the block raised.
+
+    Args:
+        max_concurrency: Most jobs running at once, over all apps.
+        retry_policy: Job-level retries, as for the batch methods.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        retry_policy: JobRetryPolicy = NO_RETRIES,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.retry_policy = retry_policy
+        self._progress = JobGroupProgress()
+        self._ids = itertools.count(1)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._transport: httpx.AsyncHTTPTransport | None = None
+        self._apps: list[OxyStudioAIClient] = []
+        self._tasks: set[asyncio.Task[GroupResult]] = set()
+        self._completed: asyncio.Queue[GroupResult] = asyncio.Queue()
+        self._yielded = 0
+
+    @property
+    def progress(self) -> JobGroupProgress:
+        """A snapshot of the job counts."""
+        return self._progress.model_copy()
+
+    async def __aenter__(self) -> "JobGroup":
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+        )
+        self._transport = httpx.AsyncHTTPTransport(limits=limits)
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        try:
+            if exc is not None:
+                for task in self._tasks:
+                    task.cancel()
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+        finally:
+            for app in self._apps:
+                app._session_client = None
+            self._apps.clear()
+            if self._transport is not None:
+                await self._transport.aclose()
+                self._transport = None
+
+    def _join(self, app: OxyStudioAIClient) -> None:
+        # Apps in a session of their own keep using it.
+        if app in self._apps or app._session_client is not None:
+            return
+        app._session_client = app._new_async_client(transport=self._transport)
+        self._apps.append(app)
+
+    def submit(
+        self, method: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any
+    ) -> "asyncio.Task[GroupResult]":
+        """Start `method(*args, **kwargs)`, an async method of an app.
+
+        The returned task resolves to the job's result, which is also yielded
+        by `as_completed`; it never raises.
+        """
+        if self._transport is None:
+            raise RuntimeError("use the JobGroup in an `async with` block")
+        app = getattr(method, "__self__", None)
+        if not isinstance(app, OxyStudioAIClient):
+            raise ValueError(
+                "method must be a method of an app, e.g. scraper.scrape_async"
+            )
+        self._join(app)
+        submission = JobSubmission(
+            id=next(self._ids),
+            app=type(app).__name__,
+            method=method.__name__,
+            args=args,
+            kwargs=kwargs,
+        )
+        self._progress.submitted += 1
+        task = asyncio.create_task(self._run(submission, method))
+        self._tasks.add(task)
+        task.add_done_callback(lambda task: self._discard(task, submission))
+        return task
+
+    def _discard(
+        self, task: "asyncio.Task[GroupResult]", submission: JobSubmission
+    ) -> None:
+        self._tasks.discard(task)
+        if task.cancelled():
+            # Still reported, so `as_completed` doesn't wait for it.
+            self._progress.failed += 1
+            self._completed.put_nowait(
+                GroupResult(input=submission, error="CancelledError: cancelled")
+            )
+
+    async def _run(
+        self, submission: JobSubmission, method: Callable[..., Awaitable[Any]]
+    ) -> GroupResult:
+        async with self._semaphore:
+            self._progress.running += 1
+            try:
+                result = await run_with_retries(
+                    submission,
+                    lambda job: method(*job.args, **job.kwargs),
+                    self.retry_policy,
+                    _job_failed,
+                )
+            finally:
+                self._progress.running -= 1
+        if result.ok and not _job_failed(result.job):
+            self._progress.done += 1
+        else:
+            self._progress.failed += 1
+        self._completed.put_nowait(result)
+        return result
+
+    async def as_completed(self) -> AsyncIterator[GroupResult]:
+        """Yield the results of the submitted jobs as they complete.
+
+        Ends when every job submitted so far, including those submitted
+        while iterating, has been yielded.
+        """
+        while self._yielded < self._progress.submitted:
+            result = await self._completed.get()
+            self._yielded += 1
+            yield result
@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+
+import httpx
+
+from oxylabs_ai_studio.logger import get_logger
+from oxylabs_ai_studio.retry import parse_retry_after
+
+logger = get_logger(__name__)
+
+# How many run_id -> key pins to remember. Pins are released when the apps
+# stop waiting for a run; this only bounds runs that are never waited for.
+# Oldest pins are dropped first.
+MAX_PINNED_RUNS = 100_000
+BACKOFF_MIN_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+
+class _KeyState:
+    __slots__ = ("key", "in_flight", "leases", "throttled_until", "consecutive_429")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.in_flight = 0
+        self.leases = 0
+        self.throttled_until = 0.0
+        self.consecutive_429 = 0
+
+
+class ApiKeyPool:
+    """Spreads requests over several API keys.
+
+    Each request is routed to the key with the fewest in-flight requests that
+    is not backing off after a 429 response, ties going to the least used key.
+    Keys that receive a 429 are backed off individually, honoring
+    `Retry-After` when the API sends it. Jobs are pinned to the key that
+    created them, so polling a `run_id` always uses the same key. The pool is
+    safe to share between threads.
+    """
+
+    def __init__(self, api_keys: Sequence[str]):
+        keys = list(dict.fromkeys(key for key in api_keys if key))
+        if not keys:
+            raise ValueError("At least one API key is required")
+        self._states = [_KeyState(key) for key in keys]
+        self._by_key = {state.key: state for state in self._states}
+        self._pinned_runs: OrderedDict[str, _KeyState] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def keys(self) -> list[str]:
+        return [state.key for state in self._states]
+
+    @contextmanager
+    def lease(self, run_id: str | None = None) -> Iterator[str]:
+        """Pick a key for one request and count it as in flight until exit."""
+        with self._lock:
+            state = self._pinned_runs.get(run_id) if run_id else None
+            if state is None:
+                state = self._least_loaded()
+            state.in_flight += 1
+            state.leases += 1
+        try:
+            yield state.key
+        finally:
+            with self._lock:
+                state.in_flight -= 1
+
+    def pin_run(self, run_id: str, key: str) -> None:
+        """Remember that `run_id` was created with `key`."""
+        with self._lock:
+            self._pinned_runs[run_id] = self._by_key[key]
+            self._pinned_runs.move_to_end(run_id)
+            while len(self._pinned_runs) > MAX_PINNED_RUNS:
+                self._pinned_runs.popitem(last=False)
+
+    def release_run(self, run_id: str) -> None:
+        """Forget the key pin of a finished run."""
+        with self._lock:
+            self._pinned_runs.pop(run_id, None)
+
+    def key_for_run(self, run_id: str) -> str | None:
+        with self._lock:
+            state = self._pinned_runs.get(run_id)
+            return state.key if state is not None else None
+
+    def record_response(self, key: str, response: httpx.Response) -> None:
+        """Update the throttling state of `key` after a response."""
+        with self._lock:
+            state = self._by_key[key]
+            if response.status_code != 429:
+                state.consecutive_429 = 0
+                return
+            state.consecutive_429 += 1
+            delay = parse_retry_after(response)
+            if delay is None:
+                delay = min(
+                    BACKOFF_MAX_SECONDS,
+                    BACKOFF_MIN_SECONDS * 2 ** (state.consecutive_429 - 1),
+                )
+            state.throttled_until = max(state.throttled_until, time.monotonic() + delay)
+        logger.warning(
+            "API key ...%s is rate limited, backing off for %.1fs.", key[-4:], delay
+        )
+
+    def _least_loaded(self) -> _KeyState:
+        now = time.monotonic()
+        return min(
+            self._states,
+            key=lambda state: (
+                max(0.0, state.throttled_until - now),
+                state.in_flight,
+                state.consecutive_429,
+                state.leases,
+            ),
+        )
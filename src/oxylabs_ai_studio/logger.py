@@ -1,5 +1,12 @@
+import json
 import logging
 import sys
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
 
 # Package logger name
 LOGGER_NAME = "oxylabs_ai_studio"
@@ -7,6 +14,21 @@ LOGGER_NAME = "oxylabs_ai_studio"
 # Default log level
 DEFAULT_LOG_LEVEL = logging.INFO
 
+DEFAULT_SAMPLE_INTERVAL_SECONDS = 10.0
+
+# Pass as `extra=SAMPLED` for events that may repeat many times a second,
+# e.g. rate limits or failed polls; see `SamplingFilter`.
+SAMPLED = {"sampled": True}
+
+_context: ContextVar[dict[str, Any] | None] = ContextVar(
+    "oxylabs_ai_studio_log_context", default=None
+)
+
+# Attributes every LogRecord has; anything else came in through `extra`.
+_RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__
+) | {"message", "asctime", "sampled", "context"}
+
 
 def get_logger(name: str | None = None) -> logging.Logger:
     """Get a logger instance for the SDK."""
@@ -25,12 +47,114 @@ def get_logger(name: str | None = None) -> logging.Logger:
     return logger
 
 
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """Add `fields`, e.g. a `run_id`, to the records logged inside the block.
+
+    The fields follow the current thread or asyncio task, so concurrent jobs
+    don't see each other's.
+    """
+    token = _context.set({**(_context.get() or {}), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Puts the `log_context` fields on every record as `record.context`."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.context = _context.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Lets through one record per `interval_seconds` of each sampled event.
+
+    Only records logged with `extra=SAMPLED` are sampled; an event is the
+    logger, level and unformatted message, so the arguments may differ. The
+    next record let through carries the number of dropped ones as
+    `record.suppressed`.
+    """
+
+    def __init__(self, interval_seconds: float = DEFAULT_SAMPLE_INTERVAL_SECONDS):
+        super().__init__()
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._events: dict[tuple[str, int, str], tuple[float, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._events.get(key, (-self.interval_seconds, 0))
+            if now - last < self.interval_seconds:
+                self._events[key] = (last, suppressed + 1)
+                return False
+            self._events[key] = (now, 0)
+        record.suppressed = suppressed
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line.
+
+    The object has `time`, `level`, `logger` and `message`, the
+    `log_context` fields, any `extra` fields and `exc_info` for exceptions.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "context", None) or _context.get() or {})
+        for name, value in record.__dict__.items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _TextFormatter(logging.Formatter):
+    """The plain text format, followed by the `log_context` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text = f"{text} ({suppressed} similar messages suppressed)"
+        context = getattr(record, "context", None)
+        if context:
+            fields = " ".join(f"{key}={value}" for key, value in context.items())
+            text = f"{text} [{fields}]"
+        return text
+
+
 def configure_logging(
     level: int = DEFAULT_LOG_LEVEL,
     format_string: str | None = None,
     handler: logging.Handler | None = None,
+    json_output: bool = False,
+    sample_interval_seconds: float | None = DEFAULT_SAMPLE_INTERVAL_SECONDS,
 ) -> None:
-    """Configure logging for the Oxy Studio AI SDK."""
+    """Configure logging for the Oxy Studio AI SDK.
+
+    Args:
+        level: Lowest level logged.
+        format_string: Format of text records; ignored with `json_output`.
+        handler: Where records go; stderr by default.
+        json_output: Write one JSON object per record.
+        sample_interval_seconds: Log repetitive events, such as rate limits
+            and failed polls, at most once per this many seconds each. None
+            logs all of them.
+    """
     logger = logging.getLogger(LOGGER_NAME)
     for existing_handler in logger.handlers[:]:
         logger.removeHandler(existing_handler)
@@ -42,8 +166,15 @@ def configure_logging(
     if format_string is None:
         format_string = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
-    formatter = logging.Formatter(format_string)
+    formatter: logging.Formatter
+    if json_output:
+        formatter = JsonFormatter()
+    else:
+        formatter = _TextFormatter(format_string)
     handler.setFormatter(formatter)
+    handler.addFilter(ContextFilter())
+    if sample_interval_seconds is not None:
+        handler.addFilter(SamplingFilter(sample_interval_seconds))
     logger.addHandler(handler)
     logger.propagate = False
 
@@ -1,5 +1,7 @@
 from typing import Any, Literal, TypedDict
 
+from pydantic import BaseModel
+
 
 class SchemaResponse(TypedDict):
     openapi_schema: dict[str, Any] | None
@@ -30,3 +32,18 @@ class BrowserInstruction(TypedDict, total=False):
     timeout_s: int
     wait_time_s: int
     on_error: Literal["error", "skip"]
+
+
+class _BrowserAgentTaskRequired(TypedDict):
+    url: str
+
+
+class BrowserAgentTask(_BrowserAgentTaskRequired, total=False):
+    """One task of `BrowserAgent.run_many`."""
+
+    user_prompt: str
+    output_format: Literal["json", "markdown", "html", "screenshot", "csv", "toon"]
+    # A JSON schema or the pydantic model to generate it from.
+    schema: dict[str, Any] | type[BaseModel] | None
+    geo_location: str | None
+    long_running: bool
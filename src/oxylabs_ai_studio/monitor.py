@@ -0,0 +1,361 @@
+"""Incremental change monitoring on top of `AiScraper`.
+
+`ScrapeMonitor` keeps a fingerprint of the normalized content of every
+monitored URL in a local SQLite database and reports only the pages whose
+fingerprint changed. Each URL has its own re-check interval: it grows by
+`backoff_factor` every time the page is found unchanged and drops back to
+`min_interval_seconds` when it changes, so pages that rarely change are
+scraped rarely and the cost of a monitoring run follows the change rate.
+
+    monitor = ScrapeMonitor(AiScraper(api_key="..."), "monitor.db")
+    monitor.add(urls)
+    report = monitor.check()  # scrapes only the URLs that are due
+    for change in report.changes:
+        print(change.url, change.job.data)
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, Literal
+
+from pydantic import BaseModel
+
+from oxylabs_ai_studio.apps.ai_scraper import (
+    AiScraper,
+    AiScraperJob,
+    ScrapeOutputFormat,
+)
+from oxylabs_ai_studio.batch import DEFAULT_MAX_CONCURRENCY, run_batch
+from oxylabs_ai_studio.logger import get_logger
+from oxylabs_ai_studio.schema import SchemaArg
+
+logger = get_logger(__name__)
+
+DEFAULT_MIN_INTERVAL_SECONDS = 60 * 60
+DEFAULT_MAX_INTERVAL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_BACKOFF_FACTOR = 2.0
+
+_INLINE_WHITESPACE = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def normalize_content(data: Any) -> str:
+    """Canonical text of a scrape result, insensitive to formatting noise.
+
+    Strings (markdown, csv, ...) have runs of spaces collapsed, lines
+    stripped and blank lines squeezed; JSON data is serialized with sorted
+    keys.
+    """
+    if data is None:
+        return ""
+    if isinstance(data, str):
+        lines = (_INLINE_WHITESPACE.sub(" ", line).strip() for line in data.split("\n"))
+        return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+    return json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def fingerprint(data: Any) -> str:
+    """SHA-256 of the normalized content."""
+    return hashlib.sha256(normalize_content(data).encode()).hexdigest()
+
+
+class PageState(BaseModel):
+    url: str
+    fingerprint: str | None
+    first_seen: float
+    last_checked: float | None
+    last_changed: float | None
+    next_check: float
+    interval_seconds: float
+    checks: int
+    changes: int
+
+
+class FingerprintStore:
+    """SQLite table of monitored URLs, their fingerprints and schedule.
+
+    Args:
+        path: Database file, or ":memory:".
+    """
+
+    def __init__(self, path: str | Path = ":memory:"):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    fingerprint TEXT,
+                    first_seen REAL NOT NULL,
+                    last_checked REAL,
+                    last_changed REAL,
+                    next_check REAL NOT NULL,
+                    interval_seconds REAL NOT NULL,
+                    checks INTEGER NOT NULL DEFAULT 0,
+                    changes INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS pages_next_check ON pages (next_check)"
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def add(self, urls: Iterable[str], interval_seconds: float, now: float) -> int:
+        """Register URLs, due immediately; returns how many were new."""
+        with self._lock, self._db:
+            cursor = self._db.executemany(
+                "INSERT OR IGNORE INTO pages"
+                " (url, first_seen, next_check, interval_seconds)"
+                " VALUES (?, ?, ?, ?)",
+                ((url, now, now, interval_seconds) for url in urls),
+            )
+            return cursor.rowcount
+
+    def remove(self, urls: Iterable[str]) -> None:
+        with self._lock, self._db:
+            self._db.executemany(
+                "DELETE FROM pages WHERE url = ?", ((url,) for url in urls)
+            )
+
+    def get(self, url: str) -> PageState | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        return PageState(**dict(row)) if row is not None else None
+
+    def due(self, now: float, limit: int | None = None) -> list[str]:
+        """URLs whose next check is at or before `now`, most overdue first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url FROM pages WHERE next_check <= ?"
+                " ORDER BY next_check LIMIT ?",
+                (now, -1 if limit is None else limit),
+            ).fetchall()
+        return [row["url"] for row in rows]
+
+    def next_due(self) -> float | None:
+        """Time of the earliest scheduled check."""
+        with self._lock:
+            row = self._db.execute("SELECT MIN(next_check) FROM pages").fetchone()
+        return row[0] if row is not None else None
+
+    def record_check(
+        self,
+        url: str,
+        new_fingerprint: str,
+        interval_seconds: float,
+        now: float,
+    ) -> str | None:
+        """Store a check result; returns the previous fingerprint."""
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT fingerprint FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            previous = row["fingerprint"] if row is not None else None
+            changed = previous != new_fingerprint
+            self._db.execute(
+                "INSERT INTO pages (url, first_seen, next_check, interval_seconds)"
+                " VALUES (?, ?, ?, ?) ON CONFLICT (url) DO NOTHING",
+                (url, now, now, interval_seconds),
+            )
+            self._db.execute(
+                "UPDATE pages SET fingerprint = ?, last_checked = ?,"
+                " last_changed = CASE WHEN ? THEN ? ELSE last_changed END,"
+                " next_check = ?, interval_seconds = ?, checks = checks + 1,"
+                " changes = changes + ? WHERE url = ?",
+                (
+                    new_fingerprint,
+                    now,
+                    changed,
+                    now,
+                    now + interval_seconds,
+                    interval_seconds,
+                    int(changed),
+                    url,
+                ),
+            )
+        return previous
+
+    def reschedule(self, url: str, next_check: float) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE pages SET next_check = ? WHERE url = ?", (next_check, url)
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()
+        return int(row[0])
+
+
+class PageChange(BaseModel):
+    """A page that is new or whose content changed since the last check."""
+
+    url: str
+    job: AiScraperJob
+    fingerprint: str
+    previous_fingerprint: str | None
+
+    @property
+    def is_new(self) -> bool:
+        return self.previous_fingerprint is None
+
+
+class MonitorReport(BaseModel):
+    changes: list[PageChange]
+    checked: int
+    unchanged: int
+    errors: dict[str, str]
+
+
+class ScrapeMonitor:
+    """Re-scrapes monitored URLs when due and reports only changed pages.
+
+    Args:
+        scraper: The scraper used for checks.
+        store: A `FingerprintStore` or the path of its database.
+        min_interval_seconds: Re-check interval of new and changed pages,
+            and retry delay of failed checks.
+        max_interval_seconds: Upper bound of the re-check interval.
+        backoff_factor: Growth of the interval after each unchanged check.
+        output_format, schema, render_javascript, geo_location: Scrape
+            options of every check, encoded once into a `RequestTemplate`.
+    """
+
+    def __init__(
+        self,
+        scraper: AiScraper,
+        store: FingerprintStore | str | Path = ":memory:",
+        *,
+        min_interval_seconds: float = DEFAULT_MIN_INTERVAL_SECONDS,
+        max_interval_seconds: float = DEFAULT_MAX_INTERVAL_SECONDS,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        output_format: ScrapeOutputFormat = "markdown",
+        schema: SchemaArg | None = None,
+        render_javascript: bool | Literal["auto"] = False,
+        geo_location: str | None = None,
+    ):
+        if not 0 < min_interval_seconds <= max_interval_seconds:
+            raise ValueError(
+                "min_interval_seconds must be positive and at most max_interval_seconds"
+            )
+        if backoff_factor < 1:
+            raise ValueError("backoff_factor must be at least 1")
+        self.scraper = scraper
+        self.store = (
+            store if isinstance(store, FingerprintStore) else (FingerprintStore(store))
+        )
+        self.min_interval_seconds = min_interval_seconds
+        self.max_interval_seconds = max_interval_seconds
+        self.backoff_factor = backoff_factor
+        self._template = scraper.template(
+            output_format=output_format,
+            schema=schema,
+            render_javascript=render_javascript,
+            geo_location=geo_location,
+        )
+
+    def add(self, urls: Iterable[str]) -> int:
+        """Start monitoring `urls`; returns how many were not monitored yet."""
+        return self.store.add(urls, self.min_interval_seconds, time.time())
+
+    def remove(self, urls: Iterable[str]) -> None:
+        self.store.remove(urls)
+
+    def due(self, limit: int | None = None) -> list[str]:
+        return self.store.due(time.time(), limit)
+
+    def _next_interval(self, state: PageState | None, changed: bool) -> float:
+        if changed or state is None:
+            return self.min_interval_seconds
+        return min(
+            self.max_interval_seconds, state.interval_seconds * self.backoff_factor
+        )
+
+    async def check_async(
+        self,
+        urls: Iterable[str] | None = None,
+        limit: int | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> MonitorReport:
+        """Scrape the due URLs (or `urls`) and report the changed ones.
+
+        Args:
+            urls: URLs to check now regardless of their schedule; unknown
+                ones start being monitored. Defaults to the due URLs.
+            limit: Check at most this many due URLs, most overdue first.
+            max_concurrency: Maximum number of scrapes at the same time.
+        """
+        to_check = list(urls) if urls is not None else self.due(limit)
+        changes: list[PageChange] = []
+        errors: dict[str, str] = {}
+        unchanged = 0
+
+        async def scrape(url: str) -> AiScraperJob:
+            return await self.scraper.scrape_with_template_async(url, self._template)
+
+        async with self.scraper._batch_session():
+            async for result in run_batch(
+                to_check, scrape, max_concurrency=max_concurrency
+            ):
+                url, job = result.input, result.job
+                now = time.time()
+                if job is None or job.data is None:
+                    errors[url] = result.error or job and job.message or "no data"
+                    self.store.add([url], self.min_interval_seconds, now)
+                    self.store.reschedule(url, now + self.min_interval_seconds)
+                    continue
+                new_fingerprint = fingerprint(job.data)
+                state = self.store.get(url)
+                changed = state is None or state.fingerprint != new_fingerprint
+                previous = self.store.record_check(
+                    url, new_fingerprint, self._next_interval(state, changed), now
+                )
+                if changed:
+                    changes.append(
+                        PageChange(
+                            url=url,
+                            job=job,
+                            fingerprint=new_fingerprint,
+                            previous_fingerprint=previous,
+                        )
+                    )
+                else:
+                    unchanged += 1
+        logger.info(
+            "Checked %d pages: %d changed, %d unchanged, %d failed.",
+            len(to_check),
+            len(changes),
+            unchanged,
+            len(errors),
+        )
+        return MonitorReport(
+            changes=changes,
+            checked=len(to_check),
+            unchanged=unchanged,
+            errors=errors,
+        )
+
+    def check(
+        self,
+        urls: Iterable[str] | None = None,
+        limit: int | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> MonitorReport:
+        """Sync version of `check_async`."""
+        return self.scraper._run_sync(
+            self.check_async(urls, limit=limit, max_concurrency=max_concurrency)
+        )
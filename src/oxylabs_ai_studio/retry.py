@@ -0,0 +1,192 @@
+"""HTTP-level retries of API requests.
+
+`RetryPolicy` decides which failed requests are retried and how long to wait
+first: which status codes and transport errors count as transient, the
+exponential backoff and its jitter, and whether a `Retry-After` header is
+honoured. Every policy draws its retries from a `RetryBudget`, by default one
+shared by all clients, so an outage is not multiplied into a retry storm:
+once retries exceed a fraction of the requests made, failures are returned
+right away.
+
+    policy = RetryPolicy(max_attempts=3, jitter="full")
+    scraper = AiScraper(api_key="...", http_retry_policy=policy)
+
+These retries are separate from the job-level `JobRetryPolicy` of the batch
+methods. Polls of a running job are never retried here: the next poll is the
+retry.
+"""
+
+import random
+import threading
+import time
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Literal
+
+import httpx
+from pydantic import BaseModel, ConfigDict
+
+DEFAULT_RETRIES = 5
+DEFAULT_RETRY_STATUSES = frozenset({408, 429, *range(500, 600)})
+
+Jitter = Literal["none", "full", "equal"]
+
+# Errors raised before the request reached the server; retrying them can't
+# submit a job twice.
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def parse_retry_after(response: httpx.Response) -> float | None:
+    """Return the delay requested by a `Retry-After` header, in seconds.
+
+    The header holds seconds or an HTTP date, which is always in UTC; a date
+    without a zone is read as UTC too.
+    """
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)  # noqa: UP017 (3.11+)
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RetryBudget:
+    """Limits retries to a fraction of the requests made.
+
+    Every first attempt deposits `ratio` tokens, and `min_retries_per_second`
+    tokens are added over time so a client that makes few requests can still
+    retry; a retry takes one token. Thread-safe.
+
+    Args:
+        ratio: Retries allowed per request.
+        min_retries_per_second: Retries always allowed regardless of traffic.
+        max_tokens: Most retries that can be saved up.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        min_retries_per_second: float = 5.0,
+        max_tokens: float = 100.0,
+    ):
+        if ratio < 0 or min_retries_per_second < 0:
+            raise ValueError("ratio and min_retries_per_second can't be negative")
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.max_tokens = max_tokens
+        self.exhausted = 0
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, tokens: float) -> None:
+        now = time.monotonic()
+        tokens += (now - self._updated) * self.min_retries_per_second
+        self._tokens = min(self.max_tokens, self._tokens + tokens)
+        self._updated = now
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._refill(self.ratio)
+
+    def try_spend(self) -> bool:
+        """Take a token for one retry; False when the budget is used up."""
+        with self._lock:
+            self._refill(0.0)
+            if self._tokens < 1:
+                self.exhausted += 1
+                return False
+            self._tokens -= 1
+            return True
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(0.0)
+            return self._tokens
+
+
+GLOBAL_RETRY_BUDGET = RetryBudget()
+
+
+class RetryPolicy(BaseModel):
+    """Which failed API requests are retried, and when.
+
+    `max_attempts` counts the first attempt. The n-th retry waits
+    `backoff_seconds * backoff_multiplier ** (n - 1)`, at most
+    `max_backoff_seconds`, with `jitter` applied: "full" picks a random delay
+    up to that, "equal" between half of it and all of it. A `Retry-After`
+    header takes precedence when `respect_retry_after` is set; a request
+    asking for more than `max_retry_after_seconds` is not retried.
+
+    Transport errors are retried for GET requests. A POST is only retried
+    when it surely did not reach the server (connect errors and pool
+    timeouts) or the server answered with a retryable status, so a job is
+    not submitted twice, unless `retry_unsent_only` is disabled.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True)
+
+    max_attempts: int = DEFAULT_RETRIES
+    backoff_seconds: float = 1.0
+    backoff_multiplier: float = 2.0
+    max_backoff_seconds: float = 8.0
+    jitter: Jitter = "equal"
+    retry_statuses: frozenset[int] = DEFAULT_RETRY_STATUSES
+    retry_timeouts: bool = True
+    retry_transport_errors: bool = True
+    retry_unsent_only: bool = True
+    respect_retry_after: bool = True
+    max_retry_after_seconds: float = 60.0
+    budget: RetryBudget | None = GLOBAL_RETRY_BUDGET
+
+    def is_retryable(self, exc: BaseException, method: str = "GET") -> bool:
+        if isinstance(exc, httpx.HTTPStatusError):
+            return exc.response.status_code in self.retry_statuses
+        if isinstance(exc, httpx.TimeoutException):
+            if not self.retry_timeouts:
+                return False
+        elif not (
+            isinstance(exc, httpx.TransportError) and self.retry_transport_errors
+        ):
+            return False
+        return (
+            method == "GET"
+            or not self.retry_unsent_only
+            or isinstance(exc, _NOT_SENT_ERRORS)
+        )
+
+    def backoff(self, retry: int) -> float:
+        """Seconds to wait before the given retry (1 for the first one)."""
+        delay = min(
+            self.max_backoff_seconds,
+            self.backoff_seconds * self.backoff_multiplier ** (retry - 1),
+        )
+        if self.jitter == "full":
+            return random.uniform(0, delay)  # noqa: S311
+        if self.jitter == "equal":
+            return delay / 2 + random.uniform(0, delay / 2)  # noqa: S311
+        return float(delay)
+
+    def delay(self, retry: int, exc: BaseException) -> float | None:
+        """Seconds to wait before retrying after `exc`, or None to give up."""
+        if self.respect_retry_after and isinstance(exc, httpx.HTTPStatusError):
+            requested = parse_retry_after(exc.response)
+            if requested is not None:
+                if requested > self.max_retry_after_seconds:
+                    return None
+                return requested
+        return self.backoff(retry)
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+# Polls are repeated by the poll loop itself, so they get a single attempt.
+NO_RETRY_POLICY = RetryPolicy(max_attempts=1, budget=None)
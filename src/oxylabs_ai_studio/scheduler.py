@@ -0,0 +1,213 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import ParamSpec, TypeVar
+
+from pydantic import BaseModel
+
+DEFAULT_TENANT = "default"
+DEFAULT_MAX_CONCURRENCY = 10
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class TenantStats(BaseModel):
+    queued: int
+    running: int
+    submitted: int
+    completed: int
+    weight: float
+    avg_wait_seconds: float
+    max_wait_seconds: float
+
+
+class SchedulerMetrics(BaseModel):
+    max_concurrency: int
+    queue_depth: int
+    running: int
+    tenants: dict[str, TenantStats]
+
+
+@dataclass(order=True)
+class _QueuedJob:
+    sort_key: tuple[int, int]
+    turn: "asyncio.Future[None]" = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+@dataclass
+class _Tenant:
+    weight: float
+    queue: list[_QueuedJob] = field(default_factory=list)
+    virtual_time: float = 0.0
+    running: int = 0
+    submitted: int = 0
+    started: int = 0
+    completed: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+class JobScheduler:
+    """Priority job queue with weighted fair sharing between tenants.
+
+    Jobs are any coroutine functions, typically bound app methods such as
+    `AiScraper.scrape_async`, `AiCrawler.crawl_async` or `BrowserAgent.run_async`.
+    At most `max_concurrency` jobs run at once. Free slots are handed to the
+    tenant with the lowest virtual time (start-time fair queuing), so each
+    tenant receives a share of the slots proportional to its weight no matter
+    how many jobs it has queued. Within a tenant, jobs with a higher `priority`
+    run first, ties are broken in submission order.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        tenant_weights: dict[str, float] | None = None,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            max_concurrency: Maximum number of jobs running at the same time.
+            tenant_weights: Relative share of the concurrency limit per tenant.
+                Tenants not listed here get a weight of 1.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self._tenant_weights = dict(tenant_weights or {})
+        for weight in self._tenant_weights.values():
+            if weight <= 0:
+                raise ValueError("tenant weights must be positive")
+        self._tenants: dict[str, _Tenant] = {}
+        self._sequence = itertools.count()
+        self._running = 0
+        self._virtual_clock = 0.0
+
+    def set_tenant_weight(self, tenant: str, weight: float) -> None:
+        if weight <= 0:
+            raise ValueError("tenant weights must be positive")
+        self._tenant_weights[tenant] = weight
+        if tenant in self._tenants:
+            self._tenants[tenant].weight = weight
+
+    async def submit(
+        self,
+        func: Callable[P, Awaitable[T]],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        """Wait for a slot and run `func(*args, **kwargs)` with the default
+        tenant and priority. Use `submit_for` to pick them explicitly."""
+        return await self.submit_for(DEFAULT_TENANT, 0, func, *args, **kwargs)
+
+    async def submit_for(
+        self,
+        tenant: str,
+        priority: int,
+        func: Callable[P, Awaitable[T]],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        """Queue a job for `tenant`, wait for its turn and return its result.
+
+        Args:
+            tenant: Name of the tenant the job is accounted to.
+            priority: Jobs with higher priority run first within the tenant.
+            func: Coroutine function to run, e.g. `scraper.scrape_async`.
+        """
+        state = self._tenant(tenant)
+        turn: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        job = _QueuedJob(
+            sort_key=(-priority, next(self._sequence)),
+            turn=turn,
+            enqueued_at=time.monotonic(),
+        )
+        if not state.queue and state.running == 0:
+            # An idle tenant must not bank credit for the time it was away.
+            state.virtual_time = max(state.virtual_time, self._virtual_clock)
+        heapq.heappush(state.queue, job)
+        state.submitted += 1
+        self._dispatch()
+        try:
+            await turn
+        except asyncio.CancelledError:
+            if turn.done() and not turn.cancelled():
+                # The slot was granted just before cancellation; give it back.
+                self._release(state)
+            raise
+
+        wait = time.monotonic() - job.enqueued_at
+        state.started += 1
+        state.total_wait += wait
+        state.max_wait = max(state.max_wait, wait)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            state.completed += 1
+            self._release(state)
+
+    def metrics(self) -> SchedulerMetrics:
+        """Return a snapshot of queue depth, running jobs and wait times."""
+        tenants = {
+            name: TenantStats(
+                queued=sum(1 for job in state.queue if not job.turn.done()),
+                running=state.running,
+                submitted=state.submitted,
+                completed=state.completed,
+                weight=state.weight,
+                avg_wait_seconds=(
+                    state.total_wait / state.started if state.started else 0.0
+                ),
+                max_wait_seconds=state.max_wait,
+            )
+            for name, state in self._tenants.items()
+        }
+        return SchedulerMetrics(
+            max_concurrency=self.max_concurrency,
+            queue_depth=sum(stats.queued for stats in tenants.values()),
+            running=self._running,
+            tenants=tenants,
+        )
+
+    def _tenant(self, tenant: str) -> _Tenant:
+        state = self._tenants.get(tenant)
+        if state is None:
+            state = _Tenant(weight=self._tenant_weights.get(tenant, 1.0))
+            self._tenants[tenant] = state
+        return state
+
+    def _release(self, state: _Tenant) -> None:
+        state.running -= 1
+        self._running -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._running < self.max_concurrency:
+            state = self._next_tenant()
+            if state is None:
+                return
+            job = heapq.heappop(state.queue)
+            if job.turn.done():
+                # Cancelled while waiting in the queue.
+                continue
+            self._virtual_clock = state.virtual_time
+            state.virtual_time += 1.0 / state.weight
+            state.running += 1
+            self._running += 1
+            job.turn.set_result(None)
+
+    def _next_tenant(self) -> _Tenant | None:
+        best: _Tenant | None = None
+        for state in self._tenants.values():
+            while state.queue and state.queue[0].turn.done():
+                heapq.heappop(state.queue)
+            if not state.queue:
+                continue
+            if best is None or state.virtual_time < best.virtual_time:
+                best = state
+        return best
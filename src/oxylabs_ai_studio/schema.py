@@ -0,0 +1,612 @@
+"""Local validation of `openapi_schema` and of structured results.
+
+`compile_schema` checks that a schema is well formed and turns it into a tree
+of small validator functions, cached per schema hash, so a malformed schema is
+rejected before a request is sent and result data can be validated (and
+coerced, e.g. numeric strings of CSV cells) without walking the schema again
+for every item.
+
+Supported keywords: `type` (also as a list), `nullable`, `enum`, `const`,
+`properties`, `required`, `additionalProperties`, `items` (also as a list of
+per-position schemas), `minItems`, `maxItems`, `minLength`, `maxLength`,
+`pattern`, `minimum`, `maximum`, `exclusiveMinimum`, `exclusiveMaximum`,
+`anyOf`, `oneOf` (treated like `anyOf`), `allOf` and local `$ref`s
+(`#/$defs/...`, `#/definitions/...`, `#/components/schemas/...`). Other
+keywords, e.g. `format` or `description`, are ignored, and so are what the
+compiler can't check: `type`s outside of JSON's, e.g. extensions, and
+references to other documents. Only schemas that are malformed whatever the
+API accepts, e.g. a `required` that is not a list, raise `SchemaError`.
+
+Apps also accept a pydantic model class as `schema`: `model_schema` generates
+its JSON schema and request body bytes once per class, and `parse_model` /
+`parse_models` turn result data back into instances of the model.
+"""
+
+import copy
+import hashlib
+import json
+import math
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from functools import lru_cache
+from typing import Any, TypeVar
+
+from pydantic import BaseModel, TypeAdapter
+
+from oxylabs_ai_studio.client import RawJson, dumps_json
+
+SCHEMA_CACHE_SIZE = 256
+
+JSON_TYPES = frozenset(
+    {"object", "array", "string", "number", "integer", "boolean", "null"}
+)
+
+# A validator checks `value` found at JSON pointer `path` and returns it,
+# converted to the schema type when `coerce` is true.
+Validator = Callable[[Any, str, bool], Any]
+
+# An `openapi_schema` as a dict or as the pydantic model it is generated from.
+SchemaArg = dict[str, Any] | type[BaseModel]
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class SchemaError(ValueError):
+    """A schema is malformed or a value does not match it."""
+
+    def __init__(self, path: str, message: str):
+        super().__init__(f"{path or '#'}: {message}")
+        self.path = path or "#"
+        self.reason = message
+
+
+def _accept(value: Any, path: str, coerce: bool) -> Any:
+    return value
+
+
+def _is_integer(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    return isinstance(value, int) or (isinstance(value, float) and value.is_integer())
+
+
+def _to_integer(value: Any, path: str, coerce: bool) -> Any:
+    if _is_integer(value):
+        return int(value) if coerce else value
+    if coerce and isinstance(value, str):
+        try:
+            number = float(value.strip())
+        except ValueError:
+            pass
+        else:
+            if number.is_integer():
+                return int(number)
+    raise SchemaError(path, f"expected integer, got {value!r}")
+
+
+def _to_number(value: Any, path: str, coerce: bool) -> Any:
+    if isinstance(value, int | float) and not isinstance(value, bool):
+        return value
+    if coerce and isinstance(value, str):
+        try:
+            number = float(value.strip())
+        except ValueError:
+            pass
+        else:
+            if math.isfinite(number):
+                return number
+    raise SchemaError(path, f"expected number, got {value!r}")
+
+
+def _to_boolean(value: Any, path: str, coerce: bool) -> Any:
+    if isinstance(value, bool):
+        return value
+    if coerce and isinstance(value, str):
+        normalized = value.strip().lower()
+        if normalized in ("true", "1", "yes"):
+            return True
+        if normalized in ("false", "0", "no"):
+            return False
+    raise SchemaError(path, f"expected boolean, got {value!r}")
+
+
+def _to_string(value: Any, path: str, coerce: bool) -> Any:
+    if isinstance(value, str):
+        return value
+    if coerce and isinstance(value, int | float) and not isinstance(value, bool):
+        return str(value)
+    raise SchemaError(path, f"expected string, got {value!r}")
+
+
+def _to_null(value: Any, path: str, coerce: bool) -> Any:
+    if value is None:
+        return None
+    raise SchemaError(path, f"expected null, got {value!r}")
+
+
+def _to_object(value: Any, path: str, coerce: bool) -> Any:
+    if isinstance(value, dict):
+        return value
+    raise SchemaError(path, f"expected object, got {type(value).__name__}")
+
+
+def _to_array(value: Any, path: str, coerce: bool) -> Any:
+    if isinstance(value, list):
+        return value
+    raise SchemaError(path, f"expected array, got {type(value).__name__}")
+
+
+_TYPE_CHECKS: dict[str, Validator] = {
+    "object": _to_object,
+    "array": _to_array,
+    "string": _to_string,
+    "number": _to_number,
+    "integer": _to_integer,
+    "boolean": _to_boolean,
+    "null": _to_null,
+}
+
+
+def _chain(validators: list[Validator]) -> Validator:
+    if not validators:
+        return _accept
+    if len(validators) == 1:
+        return validators[0]
+
+    def validate(value: Any, path: str, coerce: bool) -> Any:
+        for validator in validators:
+            value = validator(value, path, coerce)
+        return value
+
+    return validate
+
+
+class _Compiler:
+    def __init__(self, root: dict[str, Any]):
+        self.root = root
+        self.refs: dict[str, Validator] = {}
+
+    def compile(self, node: Any, path: str) -> Validator:
+        if node is True or node == {}:
+            return _accept
+        if not isinstance(node, dict):
+            raise SchemaError(path, "schema must be an object")
+        if "$ref" in node:
+            return self._ref(node["$ref"], path)
+
+        nullable = node.get("nullable") is True
+        validators: list[Validator] = []
+        types = self._types(node, path)
+        if "null" in types and len(types) > 1:
+            nullable = True
+            types = [item for item in types if item != "null"]
+        if types:
+            validators.append(self._type_check(types))
+        if "enum" in node or "const" in node:
+            validators.append(self._enum(node, path))
+        for keyword in ("anyOf", "oneOf"):
+            if keyword in node:
+                validators.append(self._any_of(node[keyword], f"{path}/{keyword}"))
+        if "allOf" in node:
+            options = self._options(node["allOf"], f"{path}/allOf")
+            validators.append(_chain(options))
+        if "properties" in node or "required" in node or "additionalProperties" in node:
+            validators.append(self._object(node, path))
+        if "items" in node or "minItems" in node or "maxItems" in node:
+            validators.append(self._array(node, path))
+        if {"minLength", "maxLength", "pattern"} & node.keys():
+            validators.append(self._string(node, path))
+        if {"minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum"} & (
+            node.keys()
+        ):
+            validators.append(self._bounds(node, path))
+
+        validate = _chain(validators)
+        if not nullable or validate is _accept:
+            return validate
+
+        def validate_nullable(value: Any, value_path: str, coerce: bool) -> Any:
+            return None if value is None else validate(value, value_path, coerce)
+
+        return validate_nullable
+
+    def _types(self, node: dict[str, Any], path: str) -> list[str]:
+        declared = node.get("type")
+        if declared is None:
+            return []
+        types = declared if isinstance(declared, list) else [declared]
+        if not all(isinstance(item, str) for item in types):
+            raise SchemaError(f"{path}/type", "must be a string or array of strings")
+        # A value may be of a type the compiler doesn't know, so none is checked.
+        if not JSON_TYPES.issuperset(types):
+            return []
+        return list(types)
+
+    def _type_check(self, types: list[str]) -> Validator:
+        if len(types) == 1:
+            return _TYPE_CHECKS[types[0]]
+        checks = [_TYPE_CHECKS[item] for item in types]
+
+        def validate(value: Any, path: str, coerce: bool) -> Any:
+            # Exact matches first, so coercion never changes a valid value.
+            for check in checks:
+                try:
+                    return check(value, path, False)
+                except SchemaError:
+                    pass
+            if coerce:
+                for check in checks:
+                    try:
+                        return check(value, path, True)
+                    except SchemaError:
+                        pass
+            raise SchemaError(path, f"expected {' or '.join(types)}, got {value!r}")
+
+        return validate
+
+    def _enum(self, node: dict[str, Any], path: str) -> Validator:
+        if "const" in node:
+            allowed = [node["const"]]
+        else:
+            allowed = node["enum"]
+            if not isinstance(allowed, list) or not allowed:
+                raise SchemaError(f"{path}/enum", "enum must be a non-empty array")
+
+        def validate(value: Any, value_path: str, coerce: bool) -> Any:
+            if value not in allowed or (
+                isinstance(value, bool)
+                and not any(isinstance(item, bool) for item in allowed)
+            ):
+                raise SchemaError(value_path, f"{value!r} is not one of {allowed!r}")
+            return value
+
+        return validate
+
+    def _options(self, options: Any, path: str) -> list[Validator]:
+        if not isinstance(options, list) or not options:
+            raise SchemaError(path, "must be a non-empty array of schemas")
+        return [
+            self.compile(option, f"{path}/{index}")
+            for index, option in enumerate(options)
+        ]
+
+    def _any_of(self, options: Any, path: str) -> Validator:
+        validators = self._options(options, path)
+
+        def validate(value: Any, value_path: str, coerce: bool) -> Any:
+            for exact in (True, False) if coerce else (True,):
+                for validator in validators:
+                    try:
+                        return validator(value, value_path, not exact)
+                    except SchemaError:
+                        pass
+            raise SchemaError(value_path, "does not match any allowed schema")
+
+        return validate
+
+    def _object(self, node: dict[str, Any], path: str) -> Validator:
+        properties = node.get("properties", {})
+        if not isinstance(properties, dict):
+            raise SchemaError(f"{path}/properties", "must be an object")
+        required = node.get("required", [])
+        if not isinstance(required, list) or not all(
+            isinstance(name, str) for name in required
+        ):
+            raise SchemaError(f"{path}/required", "must be an array of strings")
+        fields = {
+            name: self.compile(prop, f"{path}/properties/{name}")
+            for name, prop in properties.items()
+        }
+        additional = node.get("additionalProperties", True)
+        extra: Validator | None = None
+        if additional is False:
+            extra = None
+        elif additional is True:
+            extra = _accept
+        else:
+            extra = self.compile(additional, f"{path}/additionalProperties")
+
+        def validate(value: Any, value_path: str, coerce: bool) -> Any:
+            if not isinstance(value, dict):
+                return value
+            for name in required:
+                if name not in value:
+                    raise SchemaError(value_path, f"missing required property {name!r}")
+            result = dict(value) if coerce else value
+            for name, item in value.items():
+                field = fields.get(name, extra)
+                if field is None:
+                    raise SchemaError(value_path, f"unexpected property {name!r}")
+                if field is _accept:
+                    continue
+                checked = field(item, f"{value_path}/{name}", coerce)
+                if coerce:
+                    result[name] = checked
+            return result
+
+        return validate
+
+    def _array(self, node: dict[str, Any], path: str) -> Validator:
+        items = node.get("items", True)
+        # The tuple form has one schema per position; later items go unchecked.
+        positional: list[Validator] = []
+        rest: Validator = _accept
+        if isinstance(items, list):
+            positional = [
+                self.compile(item, f"{path}/items/{index}")
+                for index, item in enumerate(items)
+            ]
+        else:
+            rest = self.compile(items, f"{path}/items")
+        check_items = rest is not _accept or any(
+            check is not _accept for check in positional
+        )
+        min_items = node.get("minItems")
+        max_items = node.get("maxItems")
+
+        def validate(value: Any, value_path: str, coerce: bool) -> Any:
+            if not isinstance(value, list):
+                return value
+            if min_items is not None and len(value) < min_items:
+                raise SchemaError(value_path, f"expected at least {min_items} items")
+            if max_items is not None and len(value) > max_items:
+                raise SchemaError(value_path, f"expected at most {max_items} items")
+            if not check_items:
+                return value
+            checked = [
+                (positional[index] if index < len(positional) else rest)(
+                    item, f"{value_path}/{index}", coerce
+                )
+                for index, item in enumerate(value)
+            ]
+            return checked if coerce else value
+
+        return validate
+
+    def _string(self, node: dict[str, Any], path: str) -> Validator:
+        min_length = node.get("minLength")
+        max_length = node.get("maxLength")
+        pattern = None
+        if "pattern" in node:
+            try:
+                pattern = re.compile(node["pattern"])
+            except (re.error, TypeError) as exc:
+                raise SchemaError(
+                    f"{path}/pattern", f"invalid pattern: {exc}"
+                ) from None
+
+        def validate(value: Any, value_path: str, coerce: bool) -> Any:
+            if not isinstance(value, str):
+                return value
+            if min_length is not None and len(value) < min_length:
+                raise SchemaError(value_path, f"shorter than {min_length} characters")
+            if max_length is not None and len(value) > max_length:
+                raise SchemaError(value_path, f"longer than {max_length} characters")
+            if pattern is not None and pattern.search(value) is None:
+                raise SchemaError(
+                    value_path, f"does not match pattern {pattern.pattern!r}"
+                )
+            return value
+
+        return validate
+
+    def _bounds(self, node: dict[str, Any], path: str) -> Validator:
+        minimum = node.get("minimum")
+        maximum = node.get("maximum")
+        exclusive_minimum = node.get("exclusiveMinimum")
+        exclusive_maximum = node.get("exclusiveMaximum")
+        # OpenAPI 3.0 spells exclusive bounds as booleans next to the bound.
+        if exclusive_minimum is True:
+            exclusive_minimum, minimum = minimum, None
+        if exclusive_maximum is True:
+            exclusive_maximum, maximum = maximum, None
+        if exclusive_minimum is False:
+            exclusive_minimum = None
+        if exclusive_maximum is False:
+            exclusive_maximum = None
+
+        def validate(value: Any, value_path: str, coerce: bool) -> Any:
+            if isinstance(value, bool) or not isinstance(value, int | float):
+                return value
+            if minimum is not None and value < minimum:
+                raise SchemaError(value_path, f"less than {minimum}")
+            if maximum is not None and value > maximum:
+                raise SchemaError(value_path, f"greater than {maximum}")
+            if exclusive_minimum is not None and value <= exclusive_minimum:
+                raise SchemaError(value_path, f"not greater than {exclusive_minimum}")
+            if exclusive_maximum is not None and value >= exclusive_maximum:
+                raise SchemaError(value_path, f"not less than {exclusive_maximum}")
+            return value
+
+        return validate
+
+    def _ref(self, ref: Any, path: str) -> Validator:
+        if not isinstance(ref, str):
+            raise SchemaError(f"{path}/$ref", f"must be a string, got {ref!r}")
+        # Other documents and anchors can't be resolved here; anything goes.
+        if not ref.startswith("#/"):
+            return _accept
+        if ref in self.refs:
+            return self.refs[ref]
+        target: Any = self.root
+        for part in ref[2:].split("/"):
+            part = part.replace("~1", "/").replace("~0", "~")
+            if not isinstance(target, dict) or part not in target:
+                raise SchemaError(f"{path}/$ref", f"unresolvable reference {ref!r}")
+            target = target[part]
+
+        # Registered before compiling the target so recursive models resolve.
+        compiled: list[Validator] = []
+
+        def validate(value: Any, value_path: str, coerce: bool) -> Any:
+            return compiled[0](value, value_path, coerce)
+
+        self.refs[ref] = validate
+        compiled.append(self.compile(target, ref))
+        return validate
+
+
+class CompiledSchema:
+    """A validated schema with a precompiled validator.
+
+    Use `compile_schema` to get cached instances.
+    """
+
+    def __init__(self, schema: dict[str, Any], key: str | None = None):
+        if not isinstance(schema, dict):
+            raise SchemaError("#", "schema must be an object")
+        self.schema = schema
+        self.key = key or schema_key(schema)
+        self._validate = _Compiler(schema).compile(schema, "#")
+
+    def validate(self, data: Any) -> None:
+        """Raise `SchemaError` if `data` does not match the schema."""
+        self._validate(data, "#", False)
+
+    def is_valid(self, data: Any) -> bool:
+        try:
+            self._validate(data, "#", False)
+        except SchemaError:
+            return False
+        return True
+
+    def coerce(self, data: Any) -> Any:
+        """Return a copy of `data` with values converted to the schema types.
+
+        Numeric and boolean strings become numbers and booleans, numbers
+        become strings where strings are expected. Raises `SchemaError` for
+        values that can't be converted.
+        """
+        return self._validate(data, "#", True)
+
+    def validate_many(
+        self, items: Iterable[Any], coerce: bool = False
+    ) -> tuple[list[Any], dict[int, SchemaError]]:
+        """Validate items in bulk.
+
+        Returns the valid items (coerced if requested) and the errors by item
+        index.
+        """
+        validate = self._validate
+        valid: list[Any] = []
+        errors: dict[int, SchemaError] = {}
+        for index, item in enumerate(items):
+            try:
+                valid.append(validate(item, "#", coerce))
+            except SchemaError as exc:
+                errors[index] = exc
+        return valid, errors
+
+
+def schema_key(schema: dict[str, Any]) -> str:
+    """SHA-256 of the canonical JSON of a schema."""
+    try:
+        encoded = json.dumps(
+            schema, sort_keys=True, separators=(",", ":"), allow_nan=False
+        )
+    except (TypeError, ValueError) as exc:
+        raise SchemaError("#", f"schema is not valid JSON: {exc}") from None
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+_cache: OrderedDict[str, CompiledSchema] = OrderedDict()
+_cache_lock = threading.Lock()
+# The copies compiled from the schema dicts checked by `schema_body`, by id of
+# the original. A dict changed in place, or a new one reusing the id, no
+# longer equals its copy and is checked again.
+_checked: OrderedDict[int, dict[str, Any]] = OrderedDict()
+
+
+def compile_schema(schema: dict[str, Any]) -> CompiledSchema:
+    """Check and compile `schema`, reusing earlier compilations of it.
+
+    Raises `SchemaError` (a `ValueError`) if the schema is malformed.
+    """
+    key = schema_key(schema)
+    with _cache_lock:
+        compiled = _cache.get(key)
+        if compiled is not None:
+            _cache.move_to_end(key)
+            return compiled
+    # Compiled from a copy, so changing `schema` later can't alter it.
+    compiled = CompiledSchema(copy.deepcopy(schema), key)
+    with _cache_lock:
+        _cache[key] = compiled
+        while len(_cache) > SCHEMA_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return compiled
+
+
+def validate_data(data: Any, schema: dict[str, Any]) -> None:
+    """Shortcut for `compile_schema(schema).validate(data)`."""
+    compile_schema(schema).validate(data)
+
+
+class ModelSchema:
+    """The JSON schema of a pydantic model, generated and encoded once.
+
+    Use `model_schema` to get cached instances.
+    """
+
+    def __init__(self, model: type[BaseModel]):
+        self.model = model
+        self.schema = model.model_json_schema()
+        self.compiled = compile_schema(self.schema)
+        self.raw = RawJson(dumps_json(self.schema))
+        self.list_adapter = TypeAdapter(list[model])  # type: ignore[valid-type]
+
+
+@lru_cache(maxsize=SCHEMA_CACHE_SIZE)
+def model_schema(model: type[BaseModel]) -> ModelSchema:
+    """Cached `ModelSchema` of `model`."""
+    return ModelSchema(model)
+
+
+def resolve_schema(schema: SchemaArg) -> dict[str, Any]:
+    """The JSON schema dict of a schema argument."""
+    if isinstance(schema, type):
+        return model_schema(schema).schema
+    return schema
+
+
+def schema_body(schema: SchemaArg | None) -> dict[str, Any] | RawJson | None:
+    """Check a schema argument and return its `openapi_schema` body value.
+
+    Model schemas are returned pre-encoded. Raises `SchemaError` if the
+    schema is malformed. A dict passed again unchanged is compared with a
+    copy taken when it was checked instead of being hashed again.
+    """
+    if schema is None:
+        return None
+    if isinstance(schema, type):
+        return model_schema(schema).raw
+    key = id(schema)
+    with _cache_lock:
+        checked = _checked.get(key)
+        if checked is not None and checked == schema:
+            _checked.move_to_end(key)
+            return schema
+    checked = compile_schema(schema).schema
+    with _cache_lock:
+        _checked[key] = checked
+        _checked.move_to_end(key)
+        while len(_checked) > SCHEMA_CACHE_SIZE:
+            _checked.popitem(last=False)
+    return schema
+
+
+def parse_model(model: type[ModelT], data: Any) -> ModelT:  # noqa: UP047
+    """Validate one result item (a dict or a JSON string) as `model`."""
+    if isinstance(data, str | bytes):
+        return model.model_validate_json(data)
+    return model.model_validate(data)
+
+
+def parse_models(model: type[ModelT], data: Any) -> list[ModelT]:  # noqa: UP047
+    """Validate a list of result items as `model` in one pass."""
+    adapter = model_schema(model).list_adapter
+    if isinstance(data, str | bytes):
+        return adapter.validate_json(data)
+    return adapter.validate_python(data)
@@ -0,0 +1,309 @@
+"""Result sinks that write jobs to disk as they complete.
+
+Batch helpers yield `AiScraperJob`, `AiCrawlerJob`, `AiSearchJob` and similar
+results one by one; writing each one to a sink right away keeps memory flat
+instead of accumulating every result in a list first.
+"""
+
+import gzip
+import json
+import os
+from collections.abc import AsyncIterable, Iterable, Iterator
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Any, Literal, Protocol
+
+from pydantic import BaseModel
+
+FsyncPolicy = Literal["never", "flush", "always"]
+
+DEFAULT_BUFFER_BYTES = 1024 * 1024
+DEFAULT_ROW_GROUP_SIZE = 1000
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class ResultSink(Protocol):
+    def write(self, record: BaseModel | dict[str, Any]) -> None: ...
+
+    def close(self) -> None: ...
+
+
+def _to_record(record: BaseModel | dict[str, Any]) -> dict[str, Any]:
+    if isinstance(record, BaseModel):
+        return record.model_dump(mode="json")
+    return record
+
+
+class _FileWriter:
+    """Buffered, optionally gzip-compressed and size-rotated output file."""
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        compress: bool,
+        rotate_bytes: int | None,
+        buffer_bytes: int,
+        fsync: FsyncPolicy,
+        append: bool,
+    ):
+        if rotate_bytes is not None and rotate_bytes <= 0:
+            raise ValueError("rotate_bytes must be positive")
+        if append and rotate_bytes is not None:
+            raise ValueError("append is not supported together with rotate_bytes")
+        self.path = Path(path)
+        self.compress = compress
+        self.rotate_bytes = rotate_bytes
+        self.buffer_bytes = buffer_bytes
+        self.fsync = fsync
+        self.append = append
+        self.paths: list[Path] = []
+        self._buffer = bytearray()
+        self._written = 0
+        self._raw: IO[bytes] | None = None
+        self._file: IO[bytes] | gzip.GzipFile | None = None
+
+    def write(self, data: bytes) -> None:
+        if self._file is None:
+            self._open()
+        self._buffer += data
+        self._written += len(data)
+        if self.fsync == "always" or len(self._buffer) >= self.buffer_bytes:
+            self.flush()
+        if self.rotate_bytes is not None and self._written >= self.rotate_bytes:
+            self._close_file()
+
+    def flush(self) -> None:
+        if self._file is None or self._raw is None:
+            return
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+        self._file.flush()
+        if self.fsync != "never":
+            if self._file is not self._raw:
+                self._raw.flush()
+            os.fsync(self._raw.fileno())
+
+    def close(self) -> None:
+        self._close_file()
+
+    def _next_path(self) -> Path:
+        if self.rotate_bytes is None:
+            return self.path
+        suffixes = "".join(self.path.suffixes)
+        stem = self.path.name[: len(self.path.name) - len(suffixes)]
+        return self.path.with_name(f"{stem}-{len(self.paths):05d}{suffixes}")
+
+    def _open(self) -> None:
+        path = self._next_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        raw = path.open("a+b" if self.append else "wb")
+        if self.append and not self.compress and raw.tell() > 0:
+            raw.seek(-1, os.SEEK_END)
+            if raw.read(1) != b"\n":
+                # Terminate a line left partially written by an interrupted run.
+                raw.write(b"\n")
+        self._raw = raw
+        self._file = gzip.GzipFile(fileobj=raw, mode="ab") if self.compress else raw
+        self._written = 0
+        self.paths.append(path)
+
+    def _close_file(self) -> None:
+        if self._file is None or self._raw is None:
+            return
+        self.flush()
+        if self._file is not self._raw:
+            self._file.close()
+            if self.fsync != "never":
+                self._raw.flush()
+                os.fsync(self._raw.fileno())
+        self._raw.close()
+        self._file = None
+        self._raw = None
+
+
+class JsonlSink:
+    """Writes one JSON line per result.
+
+    Args:
+        path: Output file. With `rotate_bytes`, files are named
+            `<stem>-00000<suffixes>`, `<stem>-00001<suffixes>` and so on.
+        compress: Gzip-compress the output.
+        rotate_bytes: Start a new file once the current one holds this many
+            bytes of uncompressed JSONL.
+        buffer_bytes: Bytes buffered in memory before they are written out.
+        fsync: `"never"` leaves syncing to the OS, `"flush"` fsyncs whenever the
+            buffer is written out and `"always"` after every record.
+        append: Append to an existing file instead of truncating it.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        compress: bool = False,
+        rotate_bytes: int | None = None,
+        buffer_bytes: int = DEFAULT_BUFFER_BYTES,
+        fsync: FsyncPolicy = "never",
+        append: bool = False,
+    ):
+        self._writer = _FileWriter(
+            path,
+            compress=compress,
+            rotate_bytes=rotate_bytes,
+            buffer_bytes=buffer_bytes,
+            fsync=fsync,
+            append=append,
+        )
+        self.records_written = 0
+
+    @property
+    def paths(self) -> list[Path]:
+        """Files written so far."""
+        return list(self._writer.paths)
+
+    def write(self, record: BaseModel | dict[str, Any]) -> None:
+        line = json.dumps(_to_record(record), ensure_ascii=False)
+        self._writer.write(line.encode() + b"\n")
+        self.records_written += 1
+
+    def flush(self) -> None:
+        self._writer.flush()
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def __enter__(self) -> "JsonlSink":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+class ColumnarSink:
+    """Writes results in column-oriented row groups.
+
+    Every `row_group_size` records are transposed into one JSON line of the
+    form `{"num_rows": n, "columns": {"run_id": [...], "data": [...]}}`. Files
+    can be read back with `read_columnar`. Compression, rotation and fsync
+    options are the same as for `JsonlSink`.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        compress: bool = False,
+        rotate_bytes: int | None = None,
+        buffer_bytes: int = DEFAULT_BUFFER_BYTES,
+        fsync: FsyncPolicy = "never",
+    ):
+        if row_group_size < 1:
+            raise ValueError("row_group_size must be at least 1")
+        self.row_group_size = row_group_size
+        self._writer = _FileWriter(
+            path,
+            compress=compress,
+            rotate_bytes=rotate_bytes,
+            buffer_bytes=buffer_bytes,
+            fsync=fsync,
+            append=False,
+        )
+        self._columns: dict[str, list[Any]] = {}
+        self._rows = 0
+        self.records_written = 0
+
+    @property
+    def paths(self) -> list[Path]:
+        return list(self._writer.paths)
+
+    def write(self, record: BaseModel | dict[str, Any]) -> None:
+        values = _to_record(record)
+        for name in values.keys() - self._columns.keys():
+            self._columns[name] = [None] * self._rows
+        for name, column in self._columns.items():
+            column.append(values.get(name))
+        self._rows += 1
+        self.records_written += 1
+        if self._rows >= self.row_group_size:
+            self._write_row_group()
+
+    def flush(self) -> None:
+        self._write_row_group()
+        self._writer.flush()
+
+    def close(self) -> None:
+        self._write_row_group()
+        self._writer.close()
+
+    def _write_row_group(self) -> None:
+        if not self._rows:
+            return
+        group = {"num_rows": self._rows, "columns": self._columns}
+        self._writer.write(json.dumps(group, ensure_ascii=False).encode() + b"\n")
+        self._columns = {name: [] for name in self._columns}
+        self._rows = 0
+
+    def __enter__(self) -> "ColumnarSink":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def _open_for_read(path: str | os.PathLike[str]) -> IO[bytes] | gzip.GzipFile:
+    # Gzip is recognized by its magic bytes, whatever the file is named.
+    path = Path(path)
+    with path.open("rb") as file:
+        magic = file.read(len(GZIP_MAGIC))
+    if magic == GZIP_MAGIC:
+        return gzip.GzipFile(path, "rb")
+    return path.open("rb")
+
+
+def read_jsonl(path: str | os.PathLike[str]) -> Iterator[dict[str, Any]]:
+    """Iterate over records of a file written by `JsonlSink`."""
+    with _open_for_read(path) as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_columnar(path: str | os.PathLike[str]) -> Iterator[dict[str, list[Any]]]:
+    """Iterate over the row groups of a file written by `ColumnarSink`."""
+    for group in read_jsonl(path):
+        yield group["columns"]
+
+
+def write_results(
+    results: Iterable[BaseModel | dict[str, Any]], sink: ResultSink
+) -> int:
+    """Write every result to `sink` as it is produced and return the count."""
+    count = 0
+    for result in results:
+        sink.write(result)
+        count += 1
+    return count
+
+
+async def write_results_async(
+    results: AsyncIterable[BaseModel | dict[str, Any]], sink: ResultSink
+) -> int:
+    """Async version of write_results, for async result streams."""
+    count = 0
+    async for result in results:
+        sink.write(result)
+        count += 1
+    return count
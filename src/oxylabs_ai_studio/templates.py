@@ -0,0 +1,59 @@
+"""Pre-encoded request bodies for jobs that share most of their parameters.
+
+In a batch only a field or two (usually `url`) changes between request
+bodies, while the schema, browser instructions and options stay the same.
+A `RequestTemplate` encodes the invariant fields to JSON once; `encode` only
+serializes the per-job fields and splices them in.
+
+    template = scraper.template(output_format="json", schema=Product)
+    for url in urls:
+        job = scraper.scrape_with_template(url, template)
+"""
+
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from oxylabs_ai_studio.client import RawJson, dumps_json, encode_json_body
+
+
+class RequestTemplate:
+    """A request body with its invariant fields encoded once.
+
+    Args:
+        path: API path the body is posted to, e.g. "/scrape".
+        fields: The invariant fields.
+        job_fields: Names of the fields given to `encode` for every job.
+    """
+
+    def __init__(self, path: str, fields: Mapping[str, Any], job_fields: Iterable[str]):
+        self.path = path
+        self.job_fields = tuple(job_fields)
+        overlap = set(self.job_fields) & fields.keys()
+        if overlap:
+            raise ValueError(f"job fields are also template fields: {sorted(overlap)}")
+        self.fields = dict(fields)
+        encoded = encode_json_body(self.fields)
+        # `{...}` becomes `{...,` so per-job fields can be appended.
+        self._prefix = encoded[:-1]
+        if self.fields and self.job_fields:
+            self._prefix += b","
+        self._keys = [(name, dumps_json(name) + b":") for name in self.job_fields]
+
+    def check_path(self, path: str) -> None:
+        if path != self.path:
+            raise ValueError(
+                f"template is for {self.path}, can't be used for {path} requests"
+            )
+
+    def encode(self, **values: Any) -> RawJson:
+        """The full body with `values` for the job fields."""
+        if values.keys() != set(self.job_fields):
+            raise ValueError(
+                f"expected values for {sorted(self.job_fields)}, got {sorted(values)}"
+            )
+        parts = [key + dumps_json(values[name]) for name, key in self._keys]
+        return RawJson(self._prefix + b",".join(parts) + b"}")
+
+    def body(self, **values: Any) -> dict[str, Any]:
+        """The full body as a dict, e.g. for logging."""
+        return {**self.fields, **values}
@@ -0,0 +1,384 @@
+"""Local stand-in for the AI Studio API.
+
+`StandInServer` answers the endpoints used by the apps with synthetic data,
+so SDK code can be exercised and benchmarked without credentials or credits.
+It counts accepted TCP connections and requests per endpoint.
+
+Besides plain polling it supports the completion notifiers of
+`oxylabs_ai_studio.completion`: `run/data` honours a `wait` query parameter
+(long-poll) and `run/events` streams server-sent events of a run. Either can
+be switched off to exercise the fallback to polling. Jobs for the URLs in
+`failed_urls` finish with a `failed` status, and scrapes of the URLs in
+`pages` return the markdown set there, e.g. to simulate a page changing.
+`fail_next` makes the next requests to an endpoint fail, to exercise retries.
+Like accounts of the real API, a run is only found with the `x-api-key` that
+created it; `requests_by_key` counts the requests of every key.
+Runs created with a `callback_url` get a callback, signed with
+`callback_secret`, once they finish.
+Request bodies may be gzip or zstd compressed (`request_compression`).
+
+    with StandInServer(processing_seconds=0.2) as server:
+        scraper = AiScraper(api_key="test")
+        scraper.base_url = server.url
+        scraper.scrape(url="https://example.com")
+        print(server.connections, server.requests)
+"""
+
+import itertools
+import json
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Iterable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import TracebackType
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+
+from oxylabs_ai_studio.compression import decompress
+from oxylabs_ai_studio.webhooks import SIGNATURE_HEADER, TIMESTAMP_HEADER, sign_payload
+
+CREATE_PATHS = {
+    "/scrape": "scrape",
+    "/crawl/run": "crawl",
+    "/map": "map",
+    "/search/run": "search",
+    "/browser-agent/run": "browser-agent",
+}
+DATA_PATHS = {
+    "/scrape/run/data": "scrape",
+    "/crawl/run/data": "crawl",
+    "/map/run/data": "map",
+    "/search/run/data": "search",
+    "/browser-agent/run/data": "browser-agent",
+}
+EVENTS_PATHS = {
+    path.removesuffix("/data") + "/events": app for path, app in DATA_PATHS.items()
+}
+# Interval of the `processing` events, which also keep idle streams open.
+EVENT_INTERVAL_SECONDS = 1.0
+SCHEMA_PATHS = {
+    "/scrape/schema",
+    "/crawl/generate-params",
+    "/browser-agent/generate-params",
+}
+STAND_IN_SCHEMA = {
+    "type": "object",
+    "properties": {"title": {"type": "string"}},
+    "required": [],
+}
+
+
+def _search_results(query: str, limit: int, content: bool) -> list[dict[str, Any]]:
+    return [
+        {
+            "url": f"https://example.com/{query.replace(' ', '-')}/{rank}",
+            "title": f"{query} #{rank}",
+            "description": f"Stand-in result {rank} for {query}",
+            "content": f"# {query} #{rank}" if content else None,
+        }
+        for rank in range(limit)
+    ]
+
+
+class _Server(ThreadingHTTPServer):
+    # Benchmarks open hundreds of connections at once; the default listen
+    # backlog of 5 would reset some of them.
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class _Run:
+    __slots__ = ("api_key", "app", "body", "created_at")
+
+    def __init__(self, app: str, body: dict[str, Any], api_key: str):
+        self.app = app
+        self.body = body
+        self.api_key = api_key
+        self.created_at = time.monotonic()
+
+
+class StandInServer:
+    """Threaded HTTP server imitating the AI Studio API on localhost.
+
+    Args:
+        processing_seconds: How long a created job reports `processing`.
+        host: Interface to bind.
+        port: Port to bind, 0 picks a free one.
+        long_poll: Honour the `wait` parameter of `run/data`.
+        events: Serve `run/events` streams.
+        callback_secret: Secret the completion callbacks are signed with.
+        failed_urls: URLs whose jobs finish as `failed`.
+    """
+
+    def __init__(
+        self,
+        processing_seconds: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        long_poll: bool = True,
+        events: bool = True,
+        callback_secret: str | None = None,
+        failed_urls: Iterable[str] = (),
+    ):
+        self.processing_seconds = processing_seconds
+        self.failed_urls = set(failed_urls)
+        # Markdown returned by scrapes of these URLs instead of a stand-in page.
+        self.pages: dict[str, str] = {}
+        self.long_poll = long_poll
+        self.events = events
+        self.callback_secret = callback_secret
+        self.callbacks_sent = 0
+        self._callback_client: httpx.Client | None = None
+        self._lock = threading.Lock()
+        self._run_ids = itertools.count(1)
+        self._runs: dict[str, _Run] = {}
+        self.connections = 0
+        self.requests: Counter[str] = Counter()
+        self.requests_by_key: Counter[tuple[str, str]] = Counter()
+        self._faults: dict[str, deque[tuple[int, dict[str, str]]]] = {}
+        self._httpd = _Server((host, port), self._handler_class())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def start(self) -> "StandInServer":
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._httpd.serve_forever, name="stand-in-api", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+        if self._callback_client is not None:
+            self._callback_client.close()
+            self._callback_client = None
+
+    def fail_next(
+        self,
+        request: str,
+        status: int,
+        times: int = 1,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        """Answer the next `times` requests like "POST /scrape" with `status`."""
+        with self._lock:
+            faults = self._faults.setdefault(request, deque())
+            faults.extend([(status, dict(headers or {}))] * times)
+
+    def _take_fault(self, request: str) -> tuple[int, dict[str, str]] | None:
+        with self._lock:
+            faults = self._faults.get(request)
+            return faults.popleft() if faults else None
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.connections = 0
+            self.requests.clear()
+            self.requests_by_key.clear()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.stop()
+
+    def create_run(self, app: str, body: dict[str, Any], api_key: str = "") -> str:
+        run_id = f"stand-in-{next(self._run_ids)}"
+        with self._lock:
+            self._runs[run_id] = _Run(app, body, api_key)
+        callback_url = body.get("callback_url")
+        if callback_url:
+            timer = threading.Timer(
+                self.processing_seconds, self._send_callback, (callback_url, run_id)
+            )
+            timer.daemon = True
+            timer.start()
+        return run_id
+
+    def _send_callback(self, callback_url: str, run_id: str) -> None:
+        body = json.dumps({"run_id": run_id, "status": "completed"}).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.callback_secret is not None:
+            timestamp = str(int(time.time()))
+            headers[TIMESTAMP_HEADER] = timestamp
+            headers[SIGNATURE_HEADER] = sign_payload(
+                self.callback_secret, timestamp, body
+            )
+        with self._lock:
+            if self._callback_client is None:
+                self._callback_client = httpx.Client(timeout=10)
+            client = self._callback_client
+        try:
+            client.post(callback_url, content=body, headers=headers)
+        except httpx.HTTPError:
+            return
+        with self._lock:
+            self.callbacks_sent += 1
+
+    def run_state(
+        self, run_id: str, wait: float = 0.0, api_key: str | None = None
+    ) -> tuple[int, dict[str, Any]]:
+        """Return the status code and body of a `/run/data` response.
+
+        A processing run is waited for up to `wait` seconds. Runs created
+        with another key than `api_key` are not found.
+        """
+        run = self._runs.get(run_id)
+        if run is None or (api_key is not None and api_key != run.api_key):
+            return 404, {"detail": "run not found"}
+        remaining = run.created_at + self.processing_seconds - time.monotonic()
+        if remaining > 0 and wait > 0:
+            time.sleep(min(remaining, wait))
+            remaining = run.created_at + self.processing_seconds - time.monotonic()
+        if remaining > 0:
+            return 202, {"status": "processing"}
+        if run.body.get("url") in self.failed_urls:
+            return 200, {"status": "failed", "error_code": "stand_in_failure"}
+        return 200, {"status": "completed", "data": self._result(run)}
+
+    def _result(self, run: _Run) -> Any:
+        body = run.body
+        url = body.get("url", "")
+        output_format = body.get("output_format", "markdown")
+        if run.app == "scrape":
+            if url in self.pages and output_format != "json":
+                return self.pages[url]
+            if output_format == "json":
+                return {"title": f"Stand-in page for {url}"}
+            return f"# Stand-in page for {url}"
+        if run.app == "crawl":
+            return [f"# Stand-in page {page} of {url}" for page in range(3)]
+        if run.app == "map":
+            return [f"{url.rstrip('/')}/page-{page}" for page in range(body["limit"])]
+        if run.app == "search":
+            return _search_results(
+                body["query"], body.get("limit", 10), body.get("return_content", True)
+            )
+        return {"type": output_format, "content": f"Stand-in agent result for {url}"}
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; with Nagle's algorithm
+            # the body would wait for the delayed ACK of the headers.
+            disable_nagle_algorithm = True
+
+            def setup(self) -> None:
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                return
+
+            def do_GET(self) -> None:  # noqa: N802
+                self._dispatch("GET")
+
+            def do_POST(self) -> None:  # noqa: N802
+                self._dispatch("POST")
+
+            def _dispatch(self, method: str) -> None:
+                parts = urlsplit(self.path)
+                path = parts.path
+                request = f"{method} {path}"
+                api_key = self.headers.get("x-api-key", "")
+                with server._lock:
+                    server.requests[request] += 1
+                    server.requests_by_key[api_key, request] += 1
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                fault = server._take_fault(request)
+                if fault is not None:
+                    status, headers = fault
+                    self._send(status, {"detail": "stand-in fault"}, headers)
+                    return
+                try:
+                    raw = decompress(raw, self.headers.get("Content-Encoding", ""))
+                except (ImportError, ValueError) as exc:
+                    self._send(415, {"detail": str(exc)})
+                    return
+                except Exception as exc:
+                    self._send(400, {"detail": f"Invalid body: {exc}"})
+                    return
+                body = json.loads(raw) if raw else {}
+                query = {
+                    key: values[0] for key, values in parse_qs(parts.query).items()
+                }
+
+                if method == "POST" and path in CREATE_PATHS:
+                    run_id = server.create_run(CREATE_PATHS[path], body, api_key)
+                    self._send(200, {"run_id": run_id})
+                elif method == "GET" and path in DATA_PATHS:
+                    wait = float(query.get("wait", 0)) if server.long_poll else 0.0
+                    run_id = query.get("run_id", "")
+                    self._send(*server.run_state(run_id, wait, api_key))
+                elif method == "GET" and path in EVENTS_PATHS and server.events:
+                    self._stream_events(query.get("run_id", ""), api_key)
+                elif method == "POST" and path == "/search/instant":
+                    results = _search_results(
+                        body["query"], body.get("limit", 10), False
+                    )
+                    self._send(
+                        200, {"run_id": "", "status": "completed", "data": results}
+                    )
+                elif method == "POST" and path in SCHEMA_PATHS:
+                    self._send(200, {"openapi_schema": STAND_IN_SCHEMA})
+                elif method == "GET" and path == "/status":
+                    self._send(200, {"status": "ok"})
+                else:
+                    self._send(404, {"detail": "not found"})
+
+            def _stream_events(self, run_id: str, api_key: str) -> None:
+                status, payload = server.run_state(run_id, api_key=api_key)
+                if status == 404:
+                    self._send(status, payload)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                while True:
+                    event = json.dumps(payload).encode()
+                    self.wfile.write(b"event: status\ndata: " + event + b"\n\n")
+                    self.wfile.flush()
+                    if status != 202:
+                        return
+                    status, payload = server.run_state(run_id, EVENT_INTERVAL_SECONDS)
+
+            def _send(
+                self,
+                status: int,
+                payload: dict[str, Any],
+                headers: dict[str, str] | None = None,
+            ) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
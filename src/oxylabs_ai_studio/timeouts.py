@@ -0,0 +1,96 @@
+"""Per-phase and per-operation request timeouts.
+
+A request can stall while connecting, sending its body, waiting for the
+response or waiting for a free connection in the pool; `PhaseTimeouts`
+bounds each phase separately. `Timeouts` holds one set of phase timeouts per
+kind of API operation, since a status poll should fail fast while creating a
+job or fetching a large result may take a while:
+
+- `create`: submitting a job.
+- `poll`: asking whether a job finished (long-polls add their wait to the
+  read timeout).
+- `result`: fetching a finished result, e.g. after a completion callback,
+  and instant searches.
+- `generate_schema`: generating a schema from a prompt.
+
+    timeouts = Timeouts(poll=PhaseTimeouts(connect=2, read=5))
+    scraper = AiScraper(api_key="...", timeout=timeouts)
+
+A plain number, as accepted before, applies to every phase of every
+operation; `Timeouts.uniform(None)` disables timeouts.
+"""
+
+from typing import Literal
+
+import httpx
+from pydantic import BaseModel
+
+DEFAULT_TIMEOUT_SECONDS = 30.0
+
+Operation = Literal["create", "poll", "result", "generate_schema"]
+
+
+class PhaseTimeouts(BaseModel):
+    """Seconds allowed for each phase of a request; None waits forever.
+
+    `read` and `write` bound the time between two chunks, not the whole
+    transfer, so a large result is fine as long as it keeps arriving.
+    """
+
+    connect: float | None = DEFAULT_TIMEOUT_SECONDS
+    read: float | None = DEFAULT_TIMEOUT_SECONDS
+    write: float | None = DEFAULT_TIMEOUT_SECONDS
+    pool: float | None = DEFAULT_TIMEOUT_SECONDS
+
+    @classmethod
+    def uniform(cls, seconds: float | None) -> "PhaseTimeouts":
+        return cls(connect=seconds, read=seconds, write=seconds, pool=seconds)
+
+    def to_httpx(self, extra_read: float = 0.0) -> httpx.Timeout:
+        """The httpx timeout, with `extra_read` seconds added to `read`."""
+        read = None if self.read is None else self.read + extra_read
+        return httpx.Timeout(
+            connect=self.connect, read=read, write=self.write, pool=self.pool
+        )
+
+
+class Timeouts(BaseModel):
+    """Phase timeouts per operation; unset operations use `default`."""
+
+    default: PhaseTimeouts = PhaseTimeouts()
+    create: PhaseTimeouts | None = None
+    poll: PhaseTimeouts | None = PhaseTimeouts(connect=5.0, read=15.0, write=15.0)
+    result: PhaseTimeouts | None = PhaseTimeouts(read=120.0)
+    generate_schema: PhaseTimeouts | None = None
+
+    @classmethod
+    def uniform(cls, seconds: float | None) -> "Timeouts":
+        """The same timeout for every phase of every operation."""
+        return cls(
+            default=PhaseTimeouts.uniform(seconds),
+            poll=None,
+            result=None,
+        )
+
+    def phases(self, operation: Operation | None) -> PhaseTimeouts:
+        if operation is None:
+            return self.default
+        return getattr(self, operation) or self.default
+
+    def for_operation(
+        self, operation: Operation | None, extra_read: float = 0.0
+    ) -> httpx.Timeout:
+        """The httpx timeout of `operation` (the default one for None)."""
+        return self.phases(operation).to_httpx(extra_read)
+
+
+DEFAULT_TIMEOUTS = Timeouts()
+
+
+def resolve_timeouts(timeout: float | Timeouts | None) -> Timeouts:
+    """The `timeout` argument of the clients as `Timeouts`."""
+    if timeout is None:
+        return DEFAULT_TIMEOUTS
+    if isinstance(timeout, Timeouts):
+        return timeout
+    return Timeouts.uniform(timeout)
@@ -0,0 +1,363 @@
+"""URL canonicalization and deduplication.
+
+The same page often shows up under several spellings across map, search and
+crawl results: tracking parameters, a trailing slash, a fragment, an
+uppercase host. `UrlCanonicalizer` reduces such variants to one canonical
+URL with configurable rules, and `DedupIndex` / `BloomDedupIndex` remember
+which canonical URLs were already seen, so batch methods asked to
+deduplicate don't submit the same page twice.
+"""
+
+import hashlib
+import math
+import re
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator
+from typing import Protocol, overload
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
+
+from pydantic import BaseModel
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+TRACKING_PARAMS = frozenset(
+    {
+        "fbclid",
+        "gclid",
+        "dclid",
+        "gbraid",
+        "wbraid",
+        "msclkid",
+        "yclid",
+        "mc_cid",
+        "mc_eid",
+        "_ga",
+        "_gl",
+        "igshid",
+        "ref_src",
+    }
+)
+TRACKING_PARAM_PREFIXES = ("utm_",)
+
+_MULTIPLE_SLASHES = re.compile(r"/{2,}")
+_PERCENT_ENCODED = re.compile(r"%([0-9A-Fa-f]{2})")
+_UNRESERVED = frozenset(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~"
+)
+
+
+def _normalize_escape(match: re.Match[str]) -> str:
+    # Decoding unreserved characters never changes the meaning of a URL
+    # (RFC 3986, section 6.2.2.2); other escapes only get uppercase hex.
+    char = chr(int(match[1], 16))
+    return char if char in _UNRESERVED else f"%{match[1].upper()}"
+
+
+class UrlCanonicalizer(BaseModel):
+    """Rules for reducing URL variants to one canonical form.
+
+    Scheme and host are always lowercased and a missing scheme is
+    `default_scheme`.
+    """
+
+    default_scheme: str = "https"
+    force_https: bool = False
+    strip_www: bool = False
+    strip_default_port: bool = True
+    strip_fragment: bool = True
+    strip_trailing_slash: bool = True
+    collapse_slashes: bool = True
+    normalize_percent_encoding: bool = True
+    sort_query: bool = True
+    strip_empty_query_values: bool = False
+    remove_params: frozenset[str] = TRACKING_PARAMS
+    remove_param_prefixes: tuple[str, ...] = TRACKING_PARAM_PREFIXES
+
+    def __call__(self, url: str) -> str:
+        return self.canonicalize(url)
+
+    def canonicalize(self, url: str) -> str:
+        url = url.strip()
+        parts = urlsplit(url if "//" in url else f"{self.default_scheme}://{url}")
+        scheme = parts.scheme.lower() or self.default_scheme
+        if self.force_https and scheme == "http":
+            scheme = "https"
+
+        host = (parts.hostname or "").rstrip(".")
+        if self.strip_www and host.startswith("www."):
+            host = host[4:]
+        if ":" in host:
+            # An IPv6 literal, which `hostname` returns without its brackets.
+            host = f"[{host}]"
+        netloc = host
+        port = parts.port
+        if port is not None and not (
+            self.strip_default_port and port == DEFAULT_PORTS.get(scheme)
+        ):
+            netloc = f"{host}:{port}"
+        if parts.username:
+            credentials = parts.username
+            if parts.password:
+                credentials = f"{credentials}:{parts.password}"
+            netloc = f"{credentials}@{netloc}"
+
+        path = parts.path or "/"
+        if self.collapse_slashes:
+            path = _MULTIPLE_SLASHES.sub("/", path)
+        if self.normalize_percent_encoding:
+            path = _PERCENT_ENCODED.sub(_normalize_escape, path)
+        if self.strip_trailing_slash and len(path) > 1:
+            path = path.rstrip("/") or "/"
+
+        query = self._canonical_query(parts.query)
+        fragment = "" if self.strip_fragment else parts.fragment
+        return urlunsplit((scheme, netloc, path, query, fragment))
+
+    def _canonical_query(self, query: str) -> str:
+        if not query:
+            return ""
+        params = [
+            (key, value)
+            for key, value in parse_qsl(query, keep_blank_values=True)
+            if key not in self.remove_params
+            and not key.startswith(self.remove_param_prefixes)
+            and (value or not self.strip_empty_query_values)
+        ]
+        if self.sort_query:
+            params.sort()
+        return urlencode(params, quote_via=quote)
+
+
+DEFAULT_CANONICALIZER = UrlCanonicalizer()
+
+_MINIMAL_CANONICALIZER = UrlCanonicalizer(
+    strip_trailing_slash=False,
+    collapse_slashes=False,
+    normalize_percent_encoding=False,
+    sort_query=False,
+    remove_params=frozenset(),
+    remove_param_prefixes=(),
+)
+
+
+def canonicalize_url(url: str) -> str:
+    """Canonicalize `url` with the default rules."""
+    return DEFAULT_CANONICALIZER.canonicalize(url)
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL so equivalent spellings compare equal.
+
+    Lowercases the scheme and host, drops the default port and the fragment
+    and uses `/` for an empty path. URLs without a scheme get `https`. Unlike
+    `canonicalize_url`, the path and query are kept as they are.
+    """
+    return _MINIMAL_CANONICALIZER.canonicalize(url)
+
+
+def _digest(url: str) -> bytes:
+    return hashlib.blake2b(url.encode(), digest_size=16).digest()
+
+
+class UrlIndex(Protocol):
+    """A set of canonical URLs."""
+
+    canonicalizer: UrlCanonicalizer
+
+    def add(self, url: str) -> bool:
+        """Add `url`; returns False when it was (probably) seen before."""
+        ...
+
+    def __contains__(self, url: object) -> bool: ...
+
+    def __len__(self) -> int: ...
+
+
+class DedupIndex:
+    """Exact set of canonical URLs.
+
+    Stores a 16-byte hash per URL instead of the URL itself.
+
+    Args:
+        canonicalizer: Rules applied to every URL before lookup.
+    """
+
+    def __init__(self, canonicalizer: UrlCanonicalizer = DEFAULT_CANONICALIZER):
+        self.canonicalizer = canonicalizer
+        self._digests: set[bytes] = set()
+
+    def add(self, url: str) -> bool:
+        digest = _digest(self.canonicalizer.canonicalize(url))
+        if digest in self._digests:
+            return False
+        self._digests.add(digest)
+        return True
+
+    def __contains__(self, url: object) -> bool:
+        if not isinstance(url, str):
+            return False
+        return _digest(self.canonicalizer.canonicalize(url)) in self._digests
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+
+class BloomDedupIndex:
+    """Bloom filter of canonical URLs for very large sets.
+
+    Uses about 1.2 bytes per URL at a 1% false positive rate. A false
+    positive makes a new URL look already seen, so it is skipped; URLs that
+    were seen are never reported as new.
+
+    Args:
+        capacity: Expected number of URLs.
+        error_rate: False positive rate at `capacity` URLs.
+        canonicalizer: Rules applied to every URL before lookup.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float = 0.01,
+        canonicalizer: UrlCanonicalizer = DEFAULT_CANONICALIZER,
+    ):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.canonicalizer = canonicalizer
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def _positions(self, url: str) -> Iterator[int]:
+        digest = _digest(self.canonicalizer.canonicalize(url))
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for index in range(self.num_hashes):
+            yield (first + index * second) % self.num_bits
+
+    def add(self, url: str) -> bool:
+        bits = self._bits
+        new = False
+        for position in self._positions(url):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                new = True
+        if new:
+            self._count += 1
+        return new
+
+    def __contains__(self, url: object) -> bool:
+        if not isinstance(url, str):
+            return False
+        bits = self._bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(url)
+        )
+
+    def __len__(self) -> int:
+        """Number of URLs added as new."""
+        return self._count
+
+
+def dedup_index(
+    capacity: int | None = None,
+    error_rate: float | None = None,
+    canonicalizer: UrlCanonicalizer = DEFAULT_CANONICALIZER,
+) -> UrlIndex:
+    """An exact `DedupIndex`, or a `BloomDedupIndex` when `error_rate` is set."""
+    if error_rate is None:
+        return DedupIndex(canonicalizer)
+    if capacity is None:
+        raise ValueError("capacity is required for a Bloom filter index")
+    return BloomDedupIndex(capacity, error_rate, canonicalizer)
+
+
+def unique_urls(urls: Iterable[str], index: UrlIndex | None = None) -> Iterator[str]:
+    """Yield the URLs not seen before, lazily and in input order."""
+    seen = DedupIndex() if index is None else index
+    for url in urls:
+        if seen.add(url):
+            yield url
+
+
+async def unique_urls_async(
+    urls: AsyncIterable[str], index: UrlIndex | None = None
+) -> AsyncIterator[str]:
+    """Like `unique_urls`, for an async iterable."""
+    seen = DedupIndex() if index is None else index
+    async for url in urls:
+        if seen.add(url):
+            yield url
+
+
+def _skip_seen(shared: UrlIndex | None) -> Callable[[str], bool]:
+    """A filter passing URLs not in `shared` nor passed by the filter before.
+
+    `shared` is only read; `remember_succeeded` adds to it.
+    """
+    seen = DedupIndex(
+        shared.canonicalizer if shared is not None else DEFAULT_CANONICALIZER
+    )
+
+    def is_new(url: str) -> bool:
+        return (shared is None or url not in shared) and seen.add(url)
+
+    return is_new
+
+
+def _filter_urls(urls: Iterable[str], is_new: Callable[[str], bool]) -> Iterator[str]:
+    for url in urls:
+        if is_new(url):
+            yield url
+
+
+async def _filter_urls_async(
+    urls: AsyncIterable[str], is_new: Callable[[str], bool]
+) -> AsyncIterator[str]:
+    async for url in urls:
+        if is_new(url):
+            yield url
+
+
+@overload
+def deduplicated(
+    urls: Iterable[str], deduplicate: bool | UrlIndex
+) -> Iterable[str]: ...
+
+
+@overload
+def deduplicated(
+    urls: AsyncIterable[str], deduplicate: bool | UrlIndex
+) -> AsyncIterable[str]: ...
+
+
+def deduplicated(
+    urls: Iterable[str] | AsyncIterable[str], deduplicate: bool | UrlIndex
+) -> Iterable[str] | AsyncIterable[str]:
+    """Apply the `deduplicate` argument of the batch methods to `urls`.
+
+    False keeps every URL, True skips repeated URLs within `urls` and an
+    index also skips the URLs it holds. The index is not changed here: pass
+    the URLs whose job succeeded to `remember_succeeded`, so failed ones are
+    tried again by later calls. Async iterables stay async.
+    """
+    if deduplicate is False:
+        return urls
+    is_new = _skip_seen(None if deduplicate is True else deduplicate)
+    if isinstance(urls, AsyncIterable):
+        return _filter_urls_async(urls, is_new)
+    return _filter_urls(urls, is_new)
+
+
+def remember_succeeded(deduplicate: bool | UrlIndex, url: str) -> None:
+    """Add `url`, whose job succeeded, to the index given as `deduplicate`."""
+    if not isinstance(deduplicate, bool):
+        deduplicate.add(url)
@@ -0,0 +1,366 @@
+"""Job completion callbacks.
+
+With a `WebhookNotifier`, every run is created with a `callback_url` and the
+API calls it when the run finishes, so long crawls and browser agent runs
+don't have to be polled. `WebhookReceiver` accepts the callbacks, either as
+its own small HTTP server or mounted as an ASGI app in an existing one, and
+wakes up the waiting jobs by `run_id`; they then fetch their result from
+`run/data`. A slow safety-net poll covers lost callbacks.
+
+    receiver = WebhookReceiver(secret="...", public_url="https://me.example/cb")
+    receiver.start(port=8080)
+    crawler = AiCrawler(api_key="...", notifier=WebhookNotifier(receiver))
+
+A callback is a JSON `POST` of at least `{"run_id": ..., "status": ...}`. With
+a secret it must carry `X-AI-Studio-Timestamp` (unix seconds) and
+`X-AI-Studio-Signature: sha256=<hex>`, the HMAC-SHA256 of
+`"<timestamp>.<body>"`; see `sign_payload`.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, MutableMapping
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import TracebackType
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+from oxylabs_ai_studio.completion import fetch_final_body
+from oxylabs_ai_studio.logger import get_logger
+from oxylabs_ai_studio.timeouts import Operation
+
+if TYPE_CHECKING:
+    from oxylabs_ai_studio.client import OxyStudioAIClient
+
+logger = get_logger(__name__)
+
+SIGNATURE_HEADER = "X-AI-Studio-Signature"
+TIMESTAMP_HEADER = "X-AI-Studio-Timestamp"
+DEFAULT_CALLBACK_PATH = "/callbacks"
+DEFAULT_TOLERANCE_SECONDS = 300
+DEFAULT_SAFETY_POLL_SECONDS = 60.0
+# At most this many callbacks that arrive before their job waits are kept.
+MAX_EARLY_CALLBACKS = 10_000
+
+AsgiScope = MutableMapping[str, Any]
+AsgiReceive = Callable[[], Awaitable[MutableMapping[str, Any]]]
+AsgiSend = Callable[[MutableMapping[str, Any]], Awaitable[None]]
+
+
+def sign_payload(secret: str, timestamp: str, body: bytes) -> str:
+    """Signature header value of a callback body."""
+    message = timestamp.encode() + b"." + body
+    digest = hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def verify_signature(
+    secret: str,
+    timestamp: str | None,
+    signature: str | None,
+    body: bytes,
+    tolerance_seconds: float = DEFAULT_TOLERANCE_SECONDS,
+    now: float | None = None,
+) -> bool:
+    """Check a callback signature and that its timestamp is recent."""
+    if not timestamp or not signature:
+        return False
+    try:
+        sent_at = float(timestamp)
+    except ValueError:
+        return False
+    now = time.time() if now is None else now
+    if abs(now - sent_at) > tolerance_seconds:
+        return False
+    return hmac.compare_digest(sign_payload(secret, timestamp, body), signature)
+
+
+class _Server(ThreadingHTTPServer):
+    # Callbacks of a large batch arrive together; the default listen backlog
+    # of 5 would drop some of them.
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def _set_result(
+    future: "asyncio.Future[dict[str, Any]]", payload: dict[str, Any]
+) -> None:
+    if not future.done():
+        future.set_result(payload)
+
+
+class WebhookReceiver:
+    """Accepts completion callbacks and wakes up the jobs waiting for them.
+
+    Args:
+        secret: Shared secret the callbacks are signed with. Without one,
+            callbacks are not verified; only use that on trusted networks.
+        path: Path the callbacks are posted to.
+        public_url: URL the API should call, when the receiver is reached
+            through a proxy or mounted in another server. Defaults to the
+            address of the built-in server.
+        tolerance_seconds: Maximum age of a signed callback.
+    """
+
+    def __init__(
+        self,
+        secret: str | None = None,
+        path: str = DEFAULT_CALLBACK_PATH,
+        public_url: str | None = None,
+        tolerance_seconds: float = DEFAULT_TOLERANCE_SECONDS,
+    ):
+        self.secret = secret
+        self.path = path
+        self.public_url = public_url
+        self.tolerance_seconds = tolerance_seconds
+        self.received = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._pending: dict[
+            str,
+            list[tuple[asyncio.AbstractEventLoop, asyncio.Future[dict[str, Any]]]],
+        ] = {}
+        self._early: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._httpd: _Server | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def callback_url(self) -> str:
+        if self.public_url is not None:
+            return self.public_url
+        if self._httpd is None:
+            raise RuntimeError("set public_url or start the receiver first")
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host!s}:{port}{self.path}"
+
+    def expect(self, run_id: str) -> "asyncio.Future[dict[str, Any]]":
+        """Future resolved with the callback payload of `run_id`."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[dict[str, Any]] = loop.create_future()
+        with self._lock:
+            payload = self._early.pop(run_id, None)
+            if payload is None:
+                self._pending.setdefault(run_id, []).append((loop, future))
+        if payload is not None:
+            future.set_result(payload)
+        return future
+
+    def discard(self, run_id: str, future: "asyncio.Future[dict[str, Any]]") -> None:
+        """Stop waiting for the callback of `run_id` with `future`."""
+        with self._lock:
+            waiters = self._pending.get(run_id, [])
+            waiters[:] = [waiter for waiter in waiters if waiter[1] is not future]
+            if not waiters:
+                self._pending.pop(run_id, None)
+
+    def resolve(self, payload: dict[str, Any]) -> None:
+        """Wake up the jobs waiting for `payload["run_id"]`."""
+        run_id = str(payload["run_id"])
+        with self._lock:
+            self.received += 1
+            waiters = self._pending.pop(run_id, [])
+            if not waiters:
+                self._early[run_id] = payload
+                while len(self._early) > MAX_EARLY_CALLBACKS:
+                    self._early.popitem(last=False)
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_set_result, future, payload)
+            except RuntimeError:  # The waiting loop was closed meanwhile.
+                pass
+
+    def handle(
+        self, method: str, path: str, headers: dict[str, str], body: bytes
+    ) -> tuple[int, dict[str, Any]]:
+        """Process one HTTP request; returns the status code and JSON body.
+
+        Header names must be lowercase.
+        """
+        if path != self.path:
+            return 404, {"detail": "not found"}
+        if method != "POST":
+            return 405, {"detail": "method not allowed"}
+        if self.secret is not None and not verify_signature(
+            self.secret,
+            headers.get(TIMESTAMP_HEADER.lower()),
+            headers.get(SIGNATURE_HEADER.lower()),
+            body,
+            self.tolerance_seconds,
+        ):
+            with self._lock:
+                self.rejected += 1
+            logger.warning("Rejected a callback with an invalid signature.")
+            return 401, {"detail": "invalid signature"}
+        try:
+            payload = json.loads(body)
+            if not isinstance(payload, dict) or "run_id" not in payload:
+                raise ValueError("run_id is missing")
+        except ValueError as exc:
+            return 400, {"detail": f"invalid callback: {exc}"}
+        self.resolve(payload)
+        return 200, {"status": "ok"}
+
+    async def __call__(
+        self, scope: AsgiScope, receive: AsgiReceive, send: AsgiSend
+    ) -> None:
+        """ASGI entry point, for mounting the receiver in an ASGI server."""
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        headers = {
+            name.decode("latin-1").lower(): value.decode("latin-1")
+            for name, value in scope.get("headers", [])
+        }
+        status, payload = self.handle(scope["method"], scope["path"], headers, body)
+        content = json.dumps(payload).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(content)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": content})
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> "WebhookReceiver":
+        """Serve callbacks from a background thread."""
+        if self._thread is None:
+            self._httpd = _Server((host, port), self._handler_class())
+            self._thread = threading.Thread(
+                target=self._httpd.serve_forever, name="webhook-receiver", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None and self._httpd is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._httpd.server_close()
+        self._thread = None
+
+    def __enter__(self) -> "WebhookReceiver":
+        return self.start()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.stop()
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                return
+
+            def do_POST(self) -> None:  # noqa: N802
+                self._dispatch("POST")
+
+            def do_GET(self) -> None:  # noqa: N802
+                self._dispatch("GET")
+
+            def _dispatch(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                headers = {name.lower(): value for name, value in self.headers.items()}
+                path = self.path.split("?", 1)[0]
+                status, payload = receiver.handle(method, path, headers, body)
+                content = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+        return Handler
+
+
+class WebhookNotifier:
+    """Waits for a callback instead of polling, then fetches the result.
+
+    Runs are created with the receiver's `callback_url`. `run/data` is still
+    asked every `safety_poll_seconds` in case a callback is lost.
+
+    Args:
+        receiver: The receiver the callbacks arrive at.
+        safety_poll_seconds: Interval of the safety-net polls.
+    """
+
+    def __init__(
+        self,
+        receiver: WebhookReceiver,
+        safety_poll_seconds: float = DEFAULT_SAFETY_POLL_SECONDS,
+    ):
+        if safety_poll_seconds <= 0:
+            raise ValueError("safety_poll_seconds must be positive")
+        self.receiver = receiver
+        self.safety_poll_seconds = safety_poll_seconds
+
+    @property
+    def callback_url(self) -> str:
+        return self.receiver.callback_url
+
+    async def wait(
+        self,
+        app: "OxyStudioAIClient",
+        client: httpx.AsyncClient,
+        data_path: str,
+        run_id: str,
+        *,
+        poll_interval: float,
+        max_attempts: int,
+    ) -> dict[str, Any] | None:
+        deadline = time.monotonic() + poll_interval * max_attempts
+        future = self.receiver.expect(run_id)
+        called_back = False
+        try:
+            while (remaining := deadline - time.monotonic()) > 0:
+                if not called_back:
+                    try:
+                        await asyncio.wait_for(
+                            asyncio.shield(future),
+                            min(self.safety_poll_seconds, remaining),
+                        )
+                        called_back = True
+                    except asyncio.TimeoutError:  # noqa: UP041 (builtin only on 3.11+)
+                        pass
+                operation: Operation = "result" if called_back else "poll"
+                body = await fetch_final_body(app, client, data_path, run_id, operation)
+                if body is not None:
+                    return body
+                if called_back:
+                    # Called back, but the result isn't readable yet.
+                    await asyncio.sleep(min(poll_interval, max(0.0, remaining)))
+        finally:
+            self.receiver.discard(run_id, future)
+            future.cancel()
+        return None
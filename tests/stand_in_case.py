@@ -0,0 +1,41 @@
+"""Base test case running the apps against a fresh `StandInServer`."""
+
+import unittest
+from typing import Any
+from unittest import mock
+
+from oxylabs_ai_studio.apps import (
+    ai_crawler,
+    ai_map,
+    ai_scraper,
+    ai_search,
+    browser_agent,
+)
+from oxylabs_ai_studio.client import OxyStudioAIClient
+from oxylabs_ai_studio.testing import StandInServer
+
+PROCESSING_SECONDS = 0.2
+POLL_INTERVAL_SECONDS = 0.05
+APP_MODULES = (ai_crawler, ai_map, ai_scraper, ai_search, browser_agent)
+
+
+class StandInTestCase(unittest.IsolatedAsyncioTestCase):
+    """Starts `self.server` with `server_options` and polls every 50 ms."""
+
+    server_options: dict[str, Any] = {}
+
+    def setUp(self) -> None:
+        for module in APP_MODULES:
+            patcher = mock.patch.object(
+                module, "POLL_INTERVAL_SECONDS", POLL_INTERVAL_SECONDS
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        options = {"processing_seconds": PROCESSING_SECONDS, **self.server_options}
+        self.server = StandInServer(**options).start()
+        self.addCleanup(self.server.stop)
+
+    def app(self, cls: type[OxyStudioAIClient], **kwargs: Any) -> Any:
+        app = cls(api_key="test", **kwargs)
+        app.base_url = self.server.url
+        return app
@@ -0,0 +1,48 @@
+"""Backpressure of the batch methods with a slow consumer, against `StandInServer`.
+
+Run with `python -m unittest discover tests`.
+"""
+
+import asyncio
+import unittest
+from collections.abc import Iterator
+
+from stand_in_case import PROCESSING_SECONDS, StandInTestCase
+
+from oxylabs_ai_studio.apps.ai_scraper import AiScraper
+
+CREATE = "POST /scrape"
+MAX_CONCURRENCY = 4
+MAX_BUFFERED = 2
+# Consumed, buffered and running, one of them waiting for a buffer slot.
+MOST_IN_PROGRESS = 1 + MAX_BUFFERED + MAX_CONCURRENCY
+
+
+class ScrapeManyBackpressureTest(StandInTestCase):
+    def urls(self, count: int) -> Iterator[str]:
+        for page in range(count):
+            self.read += 1
+            yield f"https://example.com/{page}"
+
+    async def test_slow_consumer_bounds_reads(self) -> None:
+        self.read = 0
+        scraper = self.app(AiScraper)
+        results = scraper.scrape_many(
+            self.urls(40), max_concurrency=MAX_CONCURRENCY, max_buffered=MAX_BUFFERED
+        )
+        inputs = [(await anext(results)).input]
+        # Long enough for every scrape to finish if nothing held them back.
+        await asyncio.sleep(PROCESSING_SECONDS * 5)
+        self.assertLessEqual(self.read, MOST_IN_PROGRESS)
+        self.assertLessEqual(self.server.requests[CREATE], MOST_IN_PROGRESS)
+
+        inputs += [result.input async for result in results]
+        self.assertEqual(self.read, 40)
+        self.assertCountEqual(
+            inputs, [f"https://example.com/{page}" for page in range(40)]
+        )
+        self.assertEqual(self.server.requests[CREATE], 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
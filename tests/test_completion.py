@@ -0,0 +1,88 @@
+"""The SSE and long-poll notifiers, and their fallbacks, against `StandInServer`.
+
+Run with `python -m unittest discover tests`.
+"""
+
+import unittest
+
+from stand_in_case import POLL_INTERVAL_SECONDS, StandInTestCase
+
+from oxylabs_ai_studio.apps.ai_scraper import AiScraper
+from oxylabs_ai_studio.completion import LongPollNotifier, SseNotifier
+
+URL = "https://example.com"
+EVENTS = "GET /scrape/run/events"
+POLLS = "GET /scrape/run/data"
+
+
+class SseNotifierTest(StandInTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.notifier = SseNotifier()
+        self.scraper = self.app(AiScraper, notifier=self.notifier)
+
+    async def test_one_stream_per_run(self) -> None:
+        job = await self.scraper.scrape_async(url=URL)
+        self.assertTrue(job.data)
+        self.assertTrue(self.notifier.supported)
+        self.assertEqual(self.server.requests[EVENTS], 1)
+        self.assertEqual(self.server.requests[POLLS], 0)
+
+    async def test_run_without_stream_is_polled(self) -> None:
+        await self.scraper.scrape_async(url=URL)
+        async with self.scraper.async_client() as client:
+            body = await self.notifier.wait(
+                self.scraper,
+                client,
+                "/scrape/run/data",
+                "unknown-run",
+                poll_interval=POLL_INTERVAL_SECONDS,
+                max_attempts=3,
+            )
+        self.assertIsNone(body)
+        self.assertEqual(self.server.requests[EVENTS], 2)
+        self.assertGreater(self.server.requests[POLLS], 0)
+
+        # Other runs keep using their event streams.
+        self.assertTrue(self.notifier.supported)
+        self.server.reset_counters()
+        await self.scraper.scrape_async(url=URL)
+        self.assertEqual(self.server.requests[EVENTS], 1)
+        self.assertEqual(self.server.requests[POLLS], 0)
+
+
+class SseFallbackTest(StandInTestCase):
+    server_options = {"events": False}
+
+    async def test_falls_back_to_polling_for_good(self) -> None:
+        notifier = SseNotifier()
+        scraper = self.app(AiScraper, notifier=notifier)
+        self.assertTrue((await scraper.scrape_async(url=URL)).data)
+        self.assertIs(notifier.supported, False)
+        self.assertEqual(self.server.requests[EVENTS], 1)
+        self.assertGreater(self.server.requests[POLLS], 1)
+
+        self.assertTrue((await scraper.scrape_async(url=URL)).data)
+        self.assertEqual(self.server.requests[EVENTS], 1)
+
+
+class LongPollNotifierTest(StandInTestCase):
+    async def test_one_request_per_run(self) -> None:
+        scraper = self.app(AiScraper, notifier=LongPollNotifier())
+        self.assertTrue((await scraper.scrape_async(url=URL)).data)
+        self.assertEqual(self.server.requests[POLLS], 1)
+
+
+class LongPollFallbackTest(StandInTestCase):
+    server_options = {"long_poll": False}
+
+    async def test_polls_at_interval_when_wait_is_ignored(self) -> None:
+        scraper = self.app(AiScraper, notifier=LongPollNotifier())
+        self.assertTrue((await scraper.scrape_async(url=URL)).data)
+        # 0.2 s of processing at one poll per 50 ms, not a busy loop.
+        self.assertGreater(self.server.requests[POLLS], 1)
+        self.assertLessEqual(self.server.requests[POLLS], 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
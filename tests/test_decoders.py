@@ -0,0 +1,54 @@
+"""`RowDecoder` against the schemas pydantic generates for list-of-model tables.
+
+Run with `python -m unittest discover tests`.
+"""
+
+import unittest
+
+from pydantic import BaseModel
+
+from oxylabs_ai_studio.decoders import RowDecoder
+
+
+class Row(BaseModel):
+    name: str
+    price: float
+    stock: int | None = None
+
+
+class Table(BaseModel):
+    rows: list[Row]
+
+
+CSV = "name,price,stock\nlamp,9.5,3\nchair,20,\n"
+TOON = "rows[2]{name,price,stock}:\n  lamp,9.5,3\n  chair,20,null\n"
+EXPECTED = [("lamp", 9.5, 3), ("chair", 20.0, None)]
+
+
+class RowDecoderTest(unittest.TestCase):
+    def test_model_class(self) -> None:
+        decoder = RowDecoder(Table)
+        self.assertEqual(decoder.table_name, "rows")
+        self.assertEqual(decoder.columns, ("name", "price", "stock"))
+        self.assertEqual(list(decoder.iter_rows(CSV, "csv")), EXPECTED)
+        self.assertEqual(list(decoder.iter_rows(TOON, "toon")), EXPECTED)
+
+    def test_schema_with_defs(self) -> None:
+        schema = Table.model_json_schema()
+        self.assertIn("$defs", schema)
+        decoder = RowDecoder(schema)
+        self.assertEqual(decoder.table_name, "rows")
+        self.assertEqual(list(decoder.iter_rows(CSV, "csv")), EXPECTED)
+        self.assertEqual(
+            decoder.to_columns(TOON, "toon"),
+            {"name": ["lamp", "chair"], "price": [9.5, 20.0], "stock": [3, None]},
+        )
+
+    def test_single_row_model(self) -> None:
+        decoder = RowDecoder(Row)
+        self.assertIsNone(decoder.table_name)
+        self.assertEqual(list(decoder.iter_rows(CSV, "csv")), EXPECTED)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""`UrlFrontier` bookkeeping and `MapExplorer` rounds against `StandInServer`.
+
+Run with `python -m unittest discover tests`.
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from stand_in_case import StandInTestCase
+
+from oxylabs_ai_studio.apps.ai_map import AiMap
+from oxylabs_ai_studio.frontier import MapExplorer, UrlFrontier
+
+SEEDS = ["https://a.example/docs", "https://b.example/blog"]
+
+
+class UrlFrontierTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.frontier = UrlFrontier()
+        self.addCleanup(self.frontier.close)
+
+    def test_merge_counts_new_urls(self) -> None:
+        self.assertEqual(self.frontier.merge([*SEEDS, SEEDS[0] + "/"], now=1), 2)
+        self.assertEqual(self.frontier.merge(SEEDS[:1], seed=SEEDS[1], now=2), 0)
+        entry = self.frontier.get(SEEDS[0])
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.times_seen, 2)
+        self.assertEqual((entry.first_seen, entry.last_seen), (1, 2))
+        self.assertIsNone(entry.seed)
+
+    def test_next_seeds_spread_over_regions(self) -> None:
+        self.frontier.merge(["https://a.example/docs/1", "https://a.example/docs/2"])
+        self.frontier.merge(["https://a.example/docs/0"], depth=1)
+        self.frontier.merge(["https://b.example/blog/1"], depth=2)
+        seeds = [entry.url for entry in self.frontier.next_seeds()]
+        self.assertEqual(
+            seeds, ["https://a.example/docs/1", "https://b.example/blog/1"]
+        )
+        self.assertEqual(
+            [entry.url for entry in self.frontier.next_seeds(max_depth=1)],
+            ["https://a.example/docs/1"],
+        )
+
+        # The least explored region goes first.
+        self.frontier.mark_explored("https://a.example/docs/1")
+        self.assertEqual(
+            [entry.url for entry in self.frontier.next_seeds(limit=1)],
+            ["https://b.example/blog/1"],
+        )
+        self.assertEqual(
+            self.frontier.stats(),
+            {"urls": 4, "explored": 1, "unexplored": 3, "regions": 2, "max_depth": 2},
+        )
+
+
+class MapExplorerTest(StandInTestCase):
+    server_options = {"failed_urls": {"https://c.example/broken"}}
+
+    def explorer(self, frontier: UrlFrontier | str | Path = ":memory:") -> MapExplorer:
+        return MapExplorer(self.app(AiMap), frontier, limit=2)
+
+    async def test_rounds(self) -> None:
+        explorer = self.explorer()
+        report = await explorer.explore_async(SEEDS, rounds=2, seeds_per_round=2)
+        # Round two maps the shallowest URL of each region found in round one.
+        self.assertCountEqual(
+            report.seeds,
+            [*SEEDS, "https://a.example/docs/page-0", "https://b.example/blog/page-0"],
+        )
+        self.assertEqual(report.new_urls, 8)
+        self.assertEqual(report.errors, {})
+        self.assertEqual(self.server.requests["POST /map"], 4)
+        entry = explorer.frontier.get("https://a.example/docs/page-0/page-1")
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.seed, "https://a.example/docs/page-0")
+        self.assertEqual(entry.depth, 2)
+
+    async def test_failed_map(self) -> None:
+        explorer = self.explorer()
+        report = await explorer.explore_async(
+            [SEEDS[0], "https://c.example/broken"], rounds=2
+        )
+        self.assertIn("https://c.example/broken", report.errors)
+        # A failed seed is not mapped again in the next round.
+        self.assertEqual(report.seeds.count("https://c.example/broken"), 1)
+        self.assertEqual(len(report.seeds), 3)
+        self.assertEqual(report.new_urls, 4)
+
+    async def test_resume_from_file(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "frontier.db"
+            first = self.explorer(path)
+            await first.explore_async(SEEDS, seeds_per_round=2)
+            first.frontier.close()
+
+            second = self.explorer(path)
+            self.assertEqual(second.frontier.stats()["explored"], 2)
+            report = await second.explore_async(SEEDS, seeds_per_round=2)
+            second.frontier.close()
+        self.assertCountEqual(
+            report.seeds,
+            ["https://a.example/docs/page-0", "https://b.example/blog/page-0"],
+        )
+        self.assertEqual(self.server.requests["POST /map"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""`ApiKeyPool` routing, 429 back-off and run pinning, against `StandInServer`.
+
+Run with `python -m unittest discover tests`.
+"""
+
+import asyncio
+import unittest
+
+import httpx
+from stand_in_case import StandInTestCase
+
+from oxylabs_ai_studio.apps.ai_scraper import AiScraper
+from oxylabs_ai_studio.key_pool import ApiKeyPool
+from oxylabs_ai_studio.retry import RetryBudget, RetryPolicy
+
+URL = "https://example.com"
+CREATE = "POST /scrape"
+POLLS = "GET /scrape/run/data"
+
+
+class ApiKeyPoolTest(unittest.TestCase):
+    def test_throttled_key_is_avoided(self) -> None:
+        pool = ApiKeyPool(["a", "b", "a", ""])
+        self.assertEqual(pool.keys, ["a", "b"])
+        pool.record_response("a", httpx.Response(429))
+        for _ in range(3):
+            with pool.lease() as key:
+                self.assertEqual(key, "b")
+
+    def test_pinned_run_keeps_its_key(self) -> None:
+        pool = ApiKeyPool(["a", "b"])
+        pool.pin_run("run-1", "a")
+        pool.record_response("a", httpx.Response(429, headers={"Retry-After": "30"}))
+        with pool.lease("run-1") as key:
+            self.assertEqual(key, "a")
+        pool.release_run("run-1")
+        self.assertIsNone(pool.key_for_run("run-1"))
+        with pool.lease("run-1") as key:
+            self.assertEqual(key, "b")
+
+
+class KeyPoolScrapeTest(StandInTestCase):
+    async def test_runs_are_polled_with_their_key(self) -> None:
+        scraper = self.app(AiScraper, api_keys=["key-b"])
+        jobs = await asyncio.wait_for(
+            asyncio.gather(*(scraper.scrape_async(url=URL) for _ in range(6))), 10
+        )
+        self.assertTrue(all(job.data for job in jobs))
+        # The stand-in only finds a run with the key that created it.
+        self.assertEqual(self.server.requests_by_key["test", CREATE], 3)
+        self.assertEqual(self.server.requests_by_key["key-b", CREATE], 3)
+        for job in jobs:
+            self.assertIsNone(scraper.key_pool.key_for_run(job.run_id))
+
+    async def test_rate_limited_key_is_backed_off(self) -> None:
+        policy = RetryPolicy(
+            backoff_seconds=0.01,
+            jitter="none",
+            respect_retry_after=False,
+            budget=RetryBudget(),
+        )
+        scraper = self.app(AiScraper, api_keys=["key-b"], http_retry_policy=policy)
+        self.server.fail_next(CREATE, 429, headers={"Retry-After": "30"})
+        for _ in range(4):
+            self.assertTrue((await scraper.scrape_async(url=URL)).data)
+        # The retry of the first job and everything after go to the other key.
+        self.assertEqual(self.server.requests_by_key["test", CREATE], 1)
+        self.assertEqual(self.server.requests_by_key["key-b", CREATE], 4)
+        self.assertEqual(self.server.requests_by_key["test", POLLS], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
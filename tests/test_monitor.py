@@ -0,0 +1,69 @@
+"""`ScrapeMonitor` change detection and re-check scheduling, against `StandInServer`.
+
+Run with `python -m unittest discover tests`.
+"""
+
+import time
+import unittest
+
+from stand_in_case import StandInTestCase
+
+from oxylabs_ai_studio.apps.ai_scraper import AiScraper
+from oxylabs_ai_studio.monitor import ScrapeMonitor
+
+URLS = [f"https://example.com/{page}" for page in range(3)]
+
+
+class ScrapeMonitorTest(StandInTestCase):
+    server_options = {"failed_urls": {"https://example.com/broken"}}
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.monitor = ScrapeMonitor(self.app(AiScraper), min_interval_seconds=60)
+        self.monitor.add(URLS)
+
+    def interval(self, url: str) -> float:
+        state = self.monitor.store.get(url)
+        self.assertIsNotNone(state)
+        return state.interval_seconds
+
+    async def test_reports_only_changes(self) -> None:
+        report = await self.monitor.check_async()
+        self.assertEqual(len(report.changes), 3)
+        self.assertTrue(all(change.is_new for change in report.changes))
+
+        # Nothing is due until the interval has passed.
+        self.server.reset_counters()
+        report = await self.monitor.check_async()
+        self.assertEqual(report.checked, 0)
+        self.assertEqual(self.server.requests["POST /scrape"], 0)
+
+        self.server.pages[URLS[0]] = "# Changed\n\nNew content"
+        # Formatting noise is not a change.
+        self.server.pages[URLS[1]] = f"#   Stand-in page for {URLS[1]}\n\n\n"
+        report = await self.monitor.check_async(URLS)
+        self.assertEqual([change.url for change in report.changes], URLS[:1])
+        self.assertFalse(report.changes[0].is_new)
+        self.assertEqual(report.unchanged, 2)
+
+    async def test_interval_grows_while_unchanged(self) -> None:
+        await self.monitor.check_async(URLS)
+        await self.monitor.check_async(URLS)
+        await self.monitor.check_async(URLS)
+        self.assertEqual(self.interval(URLS[0]), 240)
+        self.server.pages[URLS[0]] = "# Changed"
+        await self.monitor.check_async(URLS)
+        self.assertEqual(self.interval(URLS[0]), 60)
+        self.assertEqual(self.interval(URLS[1]), 480)
+
+    async def test_failed_check_is_retried(self) -> None:
+        report = await self.monitor.check_async(["https://example.com/broken"])
+        self.assertIn("https://example.com/broken", report.errors)
+        state = self.monitor.store.get("https://example.com/broken")
+        self.assertIsNotNone(state)
+        self.assertIsNone(state.fingerprint)
+        self.assertAlmostEqual(state.next_check, time.time() + 60, delta=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""HTTP retries, backoff and `Retry-After`, against `StandInServer` faults.
+
+Run with `python -m unittest discover tests`.
+"""
+
+import time
+import unittest
+from email.utils import formatdate
+
+import httpx
+from stand_in_case import StandInTestCase
+
+from oxylabs_ai_studio.apps.ai_scraper import AiScraper
+from oxylabs_ai_studio.retry import RetryBudget, RetryPolicy, parse_retry_after
+
+URL = "https://example.com"
+CREATE = "POST /scrape"
+
+
+def retry_after(value: str) -> float | None:
+    return parse_retry_after(httpx.Response(429, headers={"Retry-After": value}))
+
+
+class ParseRetryAfterTest(unittest.TestCase):
+    def test_seconds(self) -> None:
+        self.assertEqual(retry_after("3"), 3)
+        self.assertEqual(retry_after("-1"), 0)
+        self.assertIsNone(retry_after("soon"))
+        self.assertIsNone(parse_retry_after(httpx.Response(429)))
+
+    def test_http_dates(self) -> None:
+        in_a_minute = time.time() + 60
+        self.assertAlmostEqual(
+            retry_after(formatdate(in_a_minute, usegmt=True)), 60, delta=2
+        )
+        # "-0000" means no zone; HTTP dates are UTC all the same.
+        zoneless = formatdate(in_a_minute)
+        self.assertTrue(zoneless.endswith("-0000"))
+        self.assertAlmostEqual(retry_after(zoneless), 60, delta=2)
+        self.assertEqual(retry_after(formatdate(time.time() - 60)), 0)
+
+    def test_backoff(self) -> None:
+        policy = RetryPolicy(backoff_seconds=1, max_backoff_seconds=5, jitter="none")
+        self.assertEqual([policy.backoff(retry) for retry in range(1, 5)], [1, 2, 4, 5])
+        policy = RetryPolicy(backoff_seconds=4, jitter="equal")
+        self.assertTrue(all(2 <= policy.backoff(1) <= 4 for _ in range(50)))
+
+
+class RetryPolicyTest(StandInTestCase):
+    def scraper(
+        self, budget: RetryBudget | None = None, **options: object
+    ) -> AiScraper:
+        policy = RetryPolicy(
+            backoff_seconds=0.01,
+            jitter="none",
+            budget=budget or RetryBudget(),
+            **options,
+        )
+        return self.app(AiScraper, http_retry_policy=policy)
+
+    async def test_retries_transient_statuses(self) -> None:
+        self.server.fail_next(CREATE, 503)
+        self.server.fail_next(CREATE, 429)
+        job = await self.scraper().scrape_async(url=URL)
+        self.assertTrue(job.data)
+        self.assertEqual(self.server.requests[CREATE], 3)
+
+    async def test_gives_up(self) -> None:
+        self.server.fail_next(CREATE, 503, times=3)
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.scraper(max_attempts=3).scrape_async(url=URL)
+        self.assertEqual(self.server.requests[CREATE], 3)
+
+    async def test_client_errors_are_not_retried(self) -> None:
+        self.server.fail_next(CREATE, 400)
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.scraper().scrape_async(url=URL)
+        self.assertEqual(self.server.requests[CREATE], 1)
+
+    async def test_honours_retry_after(self) -> None:
+        self.server.fail_next(CREATE, 429, headers={"Retry-After": "0.3"})
+        started = time.monotonic()
+        await self.scraper().scrape_async(url=URL)
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+        self.assertEqual(self.server.requests[CREATE], 2)
+
+    async def test_long_retry_after_is_not_waited_for(self) -> None:
+        self.server.fail_next(CREATE, 503, headers={"Retry-After": "120"})
+        with self.assertRaises(httpx.HTTPStatusError):
+            await self.scraper().scrape_async(url=URL)
+        self.assertEqual(self.server.requests[CREATE], 1)
+
+    async def test_budget_limits_retries(self) -> None:
+        budget = RetryBudget(ratio=0, min_retries_per_second=0, max_tokens=1)
+        scraper = self.scraper(budget)
+        self.server.fail_next(CREATE, 503, times=4)
+        with self.assertRaises(httpx.HTTPStatusError):
+            await scraper.scrape_async(url=URL)
+        self.assertEqual(self.server.requests[CREATE], 2)
+        self.assertEqual(budget.exhausted, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
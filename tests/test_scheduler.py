@@ -0,0 +1,76 @@
+"""`JobScheduler` fairness and priorities, with scrapes against `StandInServer`.
+
+Run with `python -m unittest discover tests`.
+"""
+
+import asyncio
+import unittest
+
+from stand_in_case import StandInTestCase
+
+from oxylabs_ai_studio.apps.ai_scraper import AiScraper, AiScraperJob
+from oxylabs_ai_studio.scheduler import JobScheduler
+
+
+class JobSchedulerTest(StandInTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.scraper = self.app(AiScraper)
+        self.started: list[str] = []
+        self.running = 0
+        self.most_running = 0
+
+    async def scrape(self, label: str, url: str) -> AiScraperJob:
+        self.started.append(label)
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        try:
+            return await self.scraper.scrape_async(url=url)
+        finally:
+            self.running -= 1
+
+    async def test_tenants_share_slots_by_weight(self) -> None:
+        scheduler = JobScheduler(max_concurrency=4, tenant_weights={"bulk": 3})
+        jobs = [
+            scheduler.submit_for(
+                "bulk", 0, self.scrape, "bulk", f"https://example.com/b{page}"
+            )
+            for page in range(24)
+        ]
+        jobs += [
+            scheduler.submit_for(
+                "small", 0, self.scrape, "small", f"https://example.com/s{page}"
+            )
+            for page in range(4)
+        ]
+        results = await asyncio.gather(*jobs)
+
+        self.assertTrue(all(job.data for job in results))
+        self.assertEqual(self.most_running, 4)
+        # The bulk tenant takes every slot before the small one submits; from
+        # then on one start in four goes to the small tenant, although 20 bulk
+        # jobs were queued before its jobs.
+        self.assertEqual(self.started[:4], ["bulk"] * 4)
+        self.assertEqual(self.started[4:20], ["small", "bulk", "bulk", "bulk"] * 4)
+        metrics = scheduler.metrics()
+        self.assertEqual(metrics.queue_depth, 0)
+        self.assertEqual(metrics.running, 0)
+        self.assertEqual(metrics.tenants["bulk"].completed, 24)
+        self.assertEqual(metrics.tenants["small"].completed, 4)
+        self.assertGreater(metrics.tenants["bulk"].max_wait_seconds, 0)
+
+    async def test_priorities_within_a_tenant(self) -> None:
+        scheduler = JobScheduler(max_concurrency=1)
+        jobs = [
+            scheduler.submit_for(
+                "team", priority, self.scrape, str(priority), "https://example.com"
+            )
+            for priority in (0, 1, 5, 1)
+        ]
+        await asyncio.gather(*jobs)
+        # The first job takes the free slot right away.
+        self.assertEqual(self.started, ["0", "5", "1", "1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
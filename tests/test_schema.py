@@ -0,0 +1,40 @@
+"""`schema_body` checks of schema dicts reused across requests.
+
+Run with `python -m unittest discover tests`.
+"""
+
+import gc
+import unittest
+import weakref
+from typing import Any
+
+from oxylabs_ai_studio.schema import SchemaError, schema_body
+
+
+class SchemaBodyTest(unittest.TestCase):
+    def test_reused_schema(self) -> None:
+        schema = {"type": "object", "properties": {"title": {"type": "string"}}}
+        self.assertIs(schema_body(schema), schema)
+        self.assertIs(schema_body(schema), schema)
+
+    def test_schema_changed_in_place_is_checked_again(self) -> None:
+        schema: dict[str, Any] = {"type": "object", "required": ["title"]}
+        schema_body(schema)
+        schema["required"] = "title"
+        with self.assertRaises(SchemaError):
+            schema_body(schema)
+
+    def test_schema_is_not_kept_alive(self) -> None:
+        class Schema(dict[str, Any]):
+            pass
+
+        schema = Schema(type="object")
+        schema_body(schema)
+        ref = weakref.ref(schema)
+        del schema
+        gc.collect()
+        self.assertIsNone(ref())
+
+
+if __name__ == "__main__":
+    unittest.main()
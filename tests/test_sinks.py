@@ -0,0 +1,40 @@
+"""Reading back the files written by the result sinks.
+
+Run with `python -m unittest discover tests`.
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from oxylabs_ai_studio.sinks import JsonlSink, read_jsonl
+
+RECORDS = [{"url": f"https://example.com/{page}", "data": "#"} for page in range(3)]
+
+
+class ReadJsonlTest(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def write(self, name: str, compress: bool) -> Path:
+        path = self.directory / name
+        with JsonlSink(path, compress=compress) as sink:
+            for record in RECORDS:
+                sink.write(record)
+        return path
+
+    def test_plain(self) -> None:
+        self.assertEqual(list(read_jsonl(self.write("a.jsonl", False))), RECORDS)
+
+    def test_gzip(self) -> None:
+        self.assertEqual(list(read_jsonl(self.write("a.jsonl.gz", True))), RECORDS)
+
+    def test_renamed_gzip(self) -> None:
+        path = self.write("a.jsonl.gz", True).rename(self.directory / "a.jsonl.1")
+        self.assertEqual(list(read_jsonl(path)), RECORDS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+"""Connections and requests of each async operation, against `StandInServer`.
+
+Every operation should use a single connection for its create request and
+all of its polls. Run with `python -m unittest discover tests`.
+"""
+
+import unittest
+from collections.abc import Awaitable, Callable
+from typing import Any
+from unittest import mock
+
+import httpx
+from stand_in_case import StandInTestCase
+
+from oxylabs_ai_studio.apps.ai_crawler import AiCrawler
+from oxylabs_ai_studio.apps.ai_map import AiMap
+from oxylabs_ai_studio.apps.ai_scraper import AiScraper
+from oxylabs_ai_studio.apps.ai_search import AiSearch
+from oxylabs_ai_studio.apps.browser_agent import BrowserAgent
+from oxylabs_ai_studio.timeouts import PhaseTimeouts, Timeouts
+
+
+class OperationConnectionsTest(StandInTestCase):
+    async def check(
+        self,
+        operation: Callable[[], Awaitable[Any]],
+        create: str,
+        data: str | None = None,
+    ) -> Any:
+        """Run `operation` and check it used one connection.
+
+        `create` is the request starting the operation and `data` the polled
+        endpoint, if any.
+        """
+        self.server.reset_counters()
+        result = await operation()
+        requests = dict(self.server.requests)
+        self.assertEqual(self.server.connections, 1, requests)
+        self.assertEqual(requests.pop(create), 1, requests)
+        if data is not None:
+            # The run is processing for a few poll intervals.
+            self.assertGreaterEqual(requests.pop(data), 2, requests)
+        self.assertEqual(requests, {})
+        return result
+
+    async def test_scrape(self) -> None:
+        job = await self.check(
+            lambda: self.app(AiScraper).scrape_async(url="https://example.com"),
+            "POST /scrape",
+            "GET /scrape/run/data",
+        )
+        self.assertEqual(job.data, "# Stand-in page for https://example.com")
+
+    async def test_crawl(self) -> None:
+        job = await self.check(
+            lambda: self.app(AiCrawler).crawl_async(
+                url="https://example.com", user_prompt="all pages"
+            ),
+            "POST /crawl/run",
+            "GET /crawl/run/data",
+        )
+        self.assertEqual(len(job.data), 3)
+
+    async def test_map(self) -> None:
+        job = await self.check(
+            lambda: self.app(AiMap).map_async(
+                url="https://example.com", user_prompt="all pages"
+            ),
+            "POST /map",
+            "GET /map/run/data",
+        )
+        self.assertTrue(job.data)
+
+    async def test_search(self) -> None:
+        job = await self.check(
+            lambda: self.app(AiSearch).search_async(query="stand in", limit=5),
+            "POST /search/run",
+            "GET /search/run/data",
+        )
+        self.assertEqual(len(job.data), 5)
+
+    async def test_search_without_content_is_instant(self) -> None:
+        job = await self.check(
+            lambda: self.app(AiSearch).search_async(
+                query="stand in", limit=5, return_content=False
+            ),
+            "POST /search/instant",
+        )
+        self.assertEqual(len(job.data), 5)
+
+    async def test_instant_search(self) -> None:
+        await self.check(
+            lambda: self.app(AiSearch).instant_search_async(query="stand in"),
+            "POST /search/instant",
+        )
+
+    async def test_browser_agent(self) -> None:
+        job = await self.check(
+            lambda: self.app(BrowserAgent).run_async(
+                url="https://example.com", user_prompt="find the title"
+            ),
+            "POST /browser-agent/run",
+            "GET /browser-agent/run/data",
+        )
+        self.assertIsNotNone(job.data)
+
+    async def test_generate_schema(self) -> None:
+        for cls, path in (
+            (AiScraper, "POST /scrape/schema"),
+            (AiCrawler, "POST /crawl/generate-params"),
+            (BrowserAgent, "POST /browser-agent/generate-params"),
+        ):
+            with self.subTest(app=cls.__name__):
+                schema = await self.check(
+                    lambda cls=cls: self.app(cls).generate_schema_async(prompt="x"),
+                    path,
+                )
+                self.assertIsNotNone(schema)
+
+    async def test_generate_schema_timeouts(self) -> None:
+        timeouts = Timeouts(generate_schema=PhaseTimeouts.uniform(7.0))
+        request = httpx.AsyncClient.request
+        sent: list[Any] = []
+
+        async def record(client: Any, *args: Any, **kwargs: Any) -> Any:
+            sent.append(kwargs.get("timeout"))
+            return await request(client, *args, **kwargs)
+
+        with mock.patch.object(httpx.AsyncClient, "request", record):
+            for cls in (AiScraper, AiCrawler, BrowserAgent):
+                with self.subTest(app=cls.__name__):
+                    sent.clear()
+                    app = self.app(cls, timeout=timeouts)
+                    await app.generate_schema_async(prompt="x")
+                    self.assertEqual(sent, [httpx.Timeout(7.0)])
+
+    async def test_compressed_request_body(self) -> None:
+        scraper = self.app(
+            AiScraper, request_compression="gzip", compression_threshold=0
+        )
+        job = await self.check(
+            lambda: scraper.scrape_async(url="https://example.com"),
+            "POST /scrape",
+            "GET /scrape/run/data",
+        )
+        self.assertEqual(job.data, "# Stand-in page for https://example.com")
+        self.assertEqual(scraper.compression_stats.requests_compressed, 1)
+
+    async def test_search_many_fetches_each_content_once(self) -> None:
+        self.server.reset_counters()
+        merged = await self.app(AiSearch).search_many(
+            ["lamps", "chairs", "lamps"], limit=3, fetch_content_once=True
+        )
+        self.assertEqual(merged.errors, {})
+        self.assertEqual(len(merged.queries["lamps"]), 3)
+        self.assertEqual(len(merged.results), 6)
+        for result in merged.results:
+            self.assertEqual(result.content, f"# Stand-in page for {result.url}")
+        self.assertEqual(self.server.requests["POST /search/instant"], 2)
+        self.assertEqual(self.server.requests["POST /scrape"], 6)
+
+    async def test_session_shares_one_connection(self) -> None:
+        self.server.reset_counters()
+        async with self.app(AiScraper) as scraper:
+            for page in range(3):
+                await scraper.scrape_async(url=f"https://example.com/{page}")
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.server.requests["POST /scrape"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""URL canonicalization and the `deduplicate` option of the batch methods.
+
+Run with `python -m unittest discover tests`.
+"""
+
+import unittest
+from unittest import mock
+
+from stand_in_case import StandInTestCase
+
+from oxylabs_ai_studio.apps.ai_map import AiMap
+from oxylabs_ai_studio.apps.ai_scraper import AiScraper
+from oxylabs_ai_studio.frontier import MapExplorer, UrlFrontier
+from oxylabs_ai_studio.urls import DedupIndex, canonicalize_url, deduplicated
+
+VARIANTS = [
+    "https://example.com/a",
+    "https://example.com/a/",
+    "https://example.com/a#x",
+]
+
+
+class CanonicalizeTest(unittest.TestCase):
+    def test_ipv6_host_keeps_brackets(self) -> None:
+        self.assertEqual(
+            canonicalize_url("http://[::1]:8080/a/"), "http://[::1]:8080/a"
+        )
+        self.assertEqual(
+            canonicalize_url("https://[2001:DB8::1]:443"), "https://[2001:db8::1]/"
+        )
+
+    def test_deduplicated(self) -> None:
+        self.assertEqual(list(deduplicated(VARIANTS, False)), VARIANTS)
+        self.assertEqual(list(deduplicated(VARIANTS, True)), VARIANTS[:1])
+
+    def test_shared_index_is_only_read(self) -> None:
+        index = DedupIndex()
+        self.assertEqual(list(deduplicated(VARIANTS, index)), VARIANTS[:1])
+        self.assertEqual(len(index), 0)
+
+    def test_frontier_keeps_original_url(self) -> None:
+        frontier = UrlFrontier()
+        self.assertEqual(frontier.merge(["https://Example.com/Docs/"]), 1)
+        self.assertEqual(frontier.merge(["https://example.com/Docs"]), 0)
+        (entry,) = frontier
+        self.assertEqual(entry.url, "https://example.com/Docs")
+        self.assertEqual(entry.original_url, "https://Example.com/Docs/")
+
+
+class BatchDeduplicationTest(StandInTestCase):
+    server_options = {"failed_urls": {"https://example.com/broken"}}
+
+    async def scrape(self, urls: list[str], **kwargs: object) -> list[str]:
+        scraper = self.app(AiScraper)
+        return [result.input async for result in scraper.scrape_many(urls, **kwargs)]
+
+    async def test_every_url_is_scraped_by_default(self) -> None:
+        self.assertCountEqual(await self.scrape(VARIANTS), VARIANTS)
+        self.assertEqual(self.server.requests["POST /scrape"], 3)
+
+    async def test_deduplicate(self) -> None:
+        self.assertEqual(await self.scrape(VARIANTS, deduplicate=True), VARIANTS[:1])
+
+    async def test_shared_index_retries_failed_urls(self) -> None:
+        index = DedupIndex()
+        urls = ["https://example.com/ok", "https://example.com/broken"]
+        self.assertCountEqual(await self.scrape(urls, deduplicate=index), urls)
+        self.assertIn(urls[0], index)
+        self.assertNotIn(urls[1], index)
+        self.assertEqual(await self.scrape(urls, deduplicate=index), urls[1:])
+
+    async def test_explorer_maps_original_url(self) -> None:
+        mapper = self.app(AiMap)
+        explorer = MapExplorer(mapper, limit=2)
+        with mock.patch.object(
+            mapper, "map_with_template_async", wraps=mapper.map_with_template_async
+        ) as map_with_template:
+            report = await explorer.explore_async(seeds=["https://Example.com/Docs/"])
+        self.assertEqual(report.seeds, ["https://example.com/Docs"])
+        self.assertEqual(
+            map_with_template.call_args.args[0], "https://Example.com/Docs/"
+        )
+        self.assertEqual(report.new_urls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
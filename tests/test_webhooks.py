@@ -0,0 +1,93 @@
+"""Signed completion callbacks with `WebhookNotifier`, against `StandInServer`.
+
+Run with `python -m unittest discover tests`.
+"""
+
+import asyncio
+import json
+import unittest
+
+from stand_in_case import StandInTestCase
+
+from oxylabs_ai_studio.apps.ai_scraper import AiScraper
+from oxylabs_ai_studio.webhooks import (
+    SIGNATURE_HEADER,
+    TIMESTAMP_HEADER,
+    WebhookNotifier,
+    WebhookReceiver,
+    sign_payload,
+    verify_signature,
+)
+
+CALLBACK_KEY = "callback-key"
+URL = "https://example.com"
+POLLS = "GET /scrape/run/data"
+BODY = json.dumps({"run_id": "run-1", "status": "completed"}).encode()
+
+
+class SignatureTest(unittest.TestCase):
+    def test_verify_signature(self) -> None:
+        signature = sign_payload(CALLBACK_KEY, "1000", BODY)
+        self.assertTrue(
+            verify_signature(CALLBACK_KEY, "1000", signature, BODY, now=1010)
+        )
+        self.assertFalse(verify_signature("other", "1000", signature, BODY, now=1010))
+        self.assertFalse(
+            verify_signature(CALLBACK_KEY, "1000", signature, b"{}", now=1010)
+        )
+        self.assertFalse(
+            verify_signature(CALLBACK_KEY, "1001", signature, BODY, now=1010)
+        )
+        # Replayed too late.
+        self.assertFalse(
+            verify_signature(CALLBACK_KEY, "1000", signature, BODY, now=2000)
+        )
+        self.assertFalse(verify_signature(CALLBACK_KEY, None, signature, BODY))
+        self.assertFalse(verify_signature(CALLBACK_KEY, "soon", signature, BODY))
+
+    def test_handle(self) -> None:
+        receiver = WebhookReceiver()
+        self.assertEqual(receiver.handle("POST", "/other", {}, BODY)[0], 404)
+        self.assertEqual(receiver.handle("GET", receiver.path, {}, b"")[0], 405)
+        self.assertEqual(receiver.handle("POST", receiver.path, {}, b"[]")[0], 400)
+        self.assertEqual(receiver.handle("POST", receiver.path, {}, BODY)[0], 200)
+        self.assertEqual(receiver.received, 1)
+
+        signed = WebhookReceiver(secret=CALLBACK_KEY)
+        headers = {TIMESTAMP_HEADER.lower(): "1000", SIGNATURE_HEADER.lower(): "x"}
+        self.assertEqual(signed.handle("POST", signed.path, headers, BODY)[0], 401)
+        self.assertEqual((signed.received, signed.rejected), (0, 1))
+
+
+class WebhookNotifierTest(StandInTestCase):
+    server_options = {"callback_secret": CALLBACK_KEY}
+
+    def scraper(self, secret: str, safety_poll_seconds: float) -> AiScraper:
+        self.receiver = WebhookReceiver(secret=secret).start()
+        self.addCleanup(self.receiver.stop)
+        notifier = WebhookNotifier(self.receiver, safety_poll_seconds)
+        return self.app(AiScraper, notifier=notifier)
+
+    async def callbacks_sent(self, count: int) -> None:
+        while self.server.callbacks_sent < count:
+            await asyncio.sleep(0.01)
+
+    async def test_callback_wakes_the_job(self) -> None:
+        scraper = self.scraper(CALLBACK_KEY, safety_poll_seconds=60)
+        job = await scraper.scrape_async(url=URL)
+        self.assertTrue(job.data)
+        self.assertEqual((self.receiver.received, self.receiver.rejected), (1, 0))
+        # Only the result is fetched after the callback.
+        self.assertEqual(self.server.requests[POLLS], 1)
+
+    async def test_safety_poll_covers_rejected_callbacks(self) -> None:
+        scraper = self.scraper("other", safety_poll_seconds=0.1)
+        job = await scraper.scrape_async(url=URL)
+        self.assertTrue(job.data)
+        await asyncio.wait_for(self.callbacks_sent(1), 5)
+        self.assertEqual((self.receiver.received, self.receiver.rejected), (0, 1))
+        self.assertGreater(self.server.requests[POLLS], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()